@@ -1,29 +1,59 @@
 """
-Add new documents to Pinecone
+Add new documents to the vector store
+
+Only files that were added or changed since the last run are embedded;
+chunks of modified or deleted files are replaced/purged. Use --dry-run
+to see what would change without touching the store.
 """
+import argparse
 from src.utils import suppress_warnings
-from src.data_loaders import load_pdf_files, load_text_files, chunk_documents
+from src.data_loaders import load_file, clear_pdf_page_cache
 from src.embeddings import get_huggingface_embeddings
-from src.vector_store import load_vector_store, add_new_documents_to_vectorstore
+from src.vector_store import load_vector_store
+from src.manifest import IngestionManifest, scan_files, sync_files
 from config.settings import NEW_PDF_PATH, NEW_TEXT_PATH
 
 suppress_warnings()
 
-print("📥 Adding new documents to Pinecone...\n")
 
-# Load new files
-new_pdfs = load_pdf_files(NEW_PDF_PATH)
-new_texts = load_text_files(NEW_TEXT_PATH)
+def main():
+    """Sync new document folders into the vector store"""
+    parser = argparse.ArgumentParser(description="Incrementally add new documents to the vector store")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    parser.add_argument("--clear-pdf-cache", action="store_true", help="re-extract every PDF page")
+    args = parser.parse_args()
+
+    if args.clear_pdf_cache:
+        clear_pdf_page_cache()
+
+    directories = [NEW_PDF_PATH, NEW_TEXT_PATH]
+    manifest = IngestionManifest()
+
+    if args.dry_run:
+        plan = manifest.plan(scan_files(directories), directories)
+        print("🔎 Dry run - no changes will be made\n")
+        print(plan.report(manifest))
+        return
+
+    print("📥 Syncing new documents...\n")
+
+    # Load embeddings and vector store
+    embeddings = get_huggingface_embeddings()
+    vectorstore = load_vector_store(embeddings)
+
+    plan = sync_files(vectorstore, directories, load_file, chunk_fn=None, manifest=manifest)
+    print(plan.report())
 
-# Combine and chunk
-all_new_docs = new_pdfs + new_texts
-new_chunks = chunk_documents(all_new_docs)
+    if hasattr(embeddings, "stats"):
+        print(f"🗃️  Embedding cache: {embeddings.stats.as_dict()}")
+    if hasattr(embeddings, "throughput"):
+        print(f"⚡ Ollama throughput: {embeddings.throughput.as_dict()}")
 
-# Load embeddings and vector store
-embeddings = get_huggingface_embeddings()
-vectorstore = load_vector_store(embeddings)
+    if plan.has_changes:
+        print("\n✅ Vector store is up to date with new documents!")
+    else:
+        print("\n✅ Nothing to do - all documents already ingested.")
 
-# Add new documents to Pinecone
-add_new_documents_to_vectorstore(vectorstore, new_chunks)
 
-print("\n✅ New documents added to Pinecone!")
+if __name__ == "__main__":
+    main()
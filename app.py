@@ -3,22 +3,22 @@ Streamlit UI for RAG System with AstraDB
 """
 import streamlit as st
 from src.utils import suppress_warnings
-from src.embeddings import get_huggingface_embeddings
-from src.vector_store import create_vector_store, load_vector_store
-from src.chain import create_rag_chain
-from src.data_loaders import load_text_files, load_pdf_files, load_web_data, chunk_documents
+from src.startup import RagWarmup, FAILED
 from config.settings import *
 
 # Load documents and create vector store if not exists
+# (streams load → chunk → embed → upsert in bounded batches, see ingest.py)
 # if 'vectorstore' not in st.session_state:
+#     from src.embeddings import get_huggingface_embeddings
+#     from src.vector_store import load_vector_store
+#     from src.data_loaders import iter_documents
+#     from src.ingestion import run_pipeline
 #     with st.spinner("🚀 Loading data and creating vector store..."):
-#         text_docs = load_text_files(TEXT_DATA_PATH)
-#         pdf_docs = load_pdf_files(PDF_DATA_PATH)
-#         web_docs = load_web_data(WEB_URLS)
-#         all_docs = text_docs + pdf_docs + web_docs
-#         chunks = chunk_documents(all_docs)
 #         embeddings = get_huggingface_embeddings()
-#         st.session_state.vectorstore = create_vector_store(chunks, embeddings)
+#         vectorstore = load_vector_store(embeddings)
+#         documents = iter_documents(PDF_DATA_PATH, TEXT_DATA_PATH, WEB_URLS)
+#         run_pipeline(vectorstore, documents, embeddings=embeddings)
+#         st.session_state.vectorstore = vectorstore
 #         st.success("✅ Data loaded and vector store created!")
 
 # Suppress warnings
@@ -67,12 +67,8 @@ st.markdown("""
 
 @st.cache_resource
 def initialize_rag_system():
-    """Initialize RAG system (cached to avoid reloading)"""
-    with st.spinner("🚀 Loading RAG system..."):
-        embeddings = get_huggingface_embeddings()
-        vectorstore = load_vector_store(embeddings)
-        rag_chain = create_rag_chain(vectorstore)
-    return rag_chain
+    """Start loading the RAG system in the background (cached, shared by all sessions)"""
+    return RagWarmup(embeddings_provider="huggingface").start()
 
 
 def display_chat_message(role, content, sources=None):
@@ -147,13 +143,34 @@ def main():
             st.session_state.messages = []
             st.rerun()
     
-    # Initialize RAG system
-    try:
-        rag_chain = initialize_rag_system()
-        st.success("✅ RAG system ready!", icon="✅")
-    except Exception as e:
-        st.error(f"❌ Error initializing RAG system: {str(e)}")
+    # Initialize RAG system (the page stays usable while it warms up)
+    warmup = initialize_rag_system()
+    if warmup.state == FAILED:
+        st.error(f"❌ Error initializing RAG system: {warmup.error}")
+        # Don't keep the failed warm-up cached: the next rerun retries
+        initialize_rag_system.clear()
         st.stop()
+    if warmup.ready:
+        st.success("✅ RAG system ready!", icon="✅")
+    else:
+        st.info(f"⏳ Warming up ({warmup.state})... you can already ask a question.", icon="⏳")
+    with st.sidebar.expander("🚀 Startup", expanded=False):
+        st.table({step: f"{seconds:.2f} s" for step, seconds in warmup.timings.items()})
+        if warmup.ready_seconds is not None:
+            st.caption(f"Ready {warmup.ready_seconds:.1f} s after start")
+
+    if warmup.ready and hasattr(warmup.rag_chain, "cache"):
+        st.sidebar.caption(f"🗃️ Answer cache: {warmup.rag_chain.cache.stats()}")
+    if st.session_state.get("last_metrics"):
+        metrics = st.session_state.last_metrics
+        with st.sidebar.expander("⏱️ Last answer timings", expanded=False):
+            st.table({name: f"{ms:.1f} ms" for name, ms in metrics["stages_ms"].items()})
+            st.caption(
+                f"Total {metrics['total_ms']:.0f} ms · "
+                f"{metrics['prompt_tokens']} prompt / {metrics['completion_tokens']} completion tokens"
+                f"{' (estimated)' if metrics['tokens_estimated'] else ''} · "
+                f"{metrics['retrieved_chars']} retrieved chars"
+            )
     
     # Initialize chat history
     if "messages" not in st.session_state:
@@ -184,12 +201,33 @@ def main():
         st.session_state.messages.append({"role": "user", "content": question})
         display_chat_message("user", question)
         
-        # Get response from RAG system
+        # Stream response from RAG system (sources first, then answer tokens)
+        if not warmup.ready:
+            with st.spinner(f"⏳ Waiting for the RAG system ({warmup.state})..."):
+                try:
+                    warmup.wait()
+                except Exception as e:
+                    st.error(f"❌ Error initializing RAG system: {str(e)}")
+                    initialize_rag_system.clear()
+                    st.stop()
+        rag_chain = warmup.rag_chain
+
         with st.spinner("🤔 Thinking..."):
             try:
-                response = rag_chain.invoke({"input": question})
-                answer = response["answer"]
-                sources = response.get("context", [])[:3]  # Get top 3 sources
+                from src.chain import stream_rag_response
+                placeholder = st.empty()
+                answer = ""
+                sources = []
+                for event, payload in stream_rag_response(rag_chain, question):
+                    if event == "sources":
+                        sources = payload[:3]  # Get top 3 sources
+                        placeholder.caption(f"📚 Found {len(sources)} sources, generating answer...")
+                    elif event == "metrics":
+                        st.session_state.last_metrics = payload
+                    else:
+                        answer += payload
+                        placeholder.markdown(f"**🤖 Assistant**\n\n{answer}▌")
+                placeholder.empty()
                 
                 # Add assistant message to history
                 st.session_state.messages.append({
@@ -0,0 +1,57 @@
+"""
+Answer a JSONL file of questions in bulk
+
+Each input line is a JSON object with a "question" (or "input" / "query" /
+"body") and optionally an "id". Answers are appended to the output JSONL with
+their sources and per-stage timings as they complete; re-running the same
+command resumes after the last answered question.
+"""
+import argparse
+import os
+from src.utils import suppress_warnings
+from src.batch_qa import read_questions, AdaptiveLimiter, BatchAnswerer
+from config.settings import BATCH_QA_CONCURRENCY, BATCH_QA_REQUESTS_PER_MINUTE, BATCH_QA_MAX_RETRIES
+
+suppress_warnings()
+
+
+def main():
+    """Answer every question in the input file"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="questions, one JSON object per line")
+    parser.add_argument("--output", help="answers JSONL (default: <input>.answers.jsonl)")
+    parser.add_argument("--field", help="question field (default: question, input, query or body)")
+    parser.add_argument("--id-field", help="id field (default: id, request_id or qid, else the line number)")
+    parser.add_argument("--embeddings", choices=["huggingface", "ollama"], default="huggingface",
+                        help="embedding model (must match the one the store was built with)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_QA_CONCURRENCY, help="LLM calls in flight")
+    parser.add_argument("--rpm", type=float, default=BATCH_QA_REQUESTS_PER_MINUTE,
+                        help="LLM calls started per minute, 0 = no fixed quota")
+    parser.add_argument("--max-retries", type=int, default=BATCH_QA_MAX_RETRIES, help="retries per question")
+    parser.add_argument("--limit", type=int, help="only the first N questions")
+    parser.add_argument("--no-resume", action="store_true", help="discard the existing output and start over")
+    args = parser.parse_args()
+
+    output = args.output or f"{os.path.splitext(args.input)[0]}.answers.jsonl"
+    questions = read_questions(args.input, field=args.field, id_field=args.id_field)[:args.limit]
+    print(f"📥 {len(questions)} questions from {args.input}")
+
+    from src.startup import get_embeddings_factory
+    from src.vector_store import load_vector_store
+    from src.chain import create_retrieval, get_document_chain
+    embeddings = get_embeddings_factory(args.embeddings)()
+    vectorstore = load_vector_store(embeddings)
+
+    answerer = BatchAnswerer(
+        embeddings=embeddings,
+        retrieval=create_retrieval(vectorstore, verbose=False),
+        document_chain=get_document_chain(),
+        limiter=AdaptiveLimiter(args.concurrency, args.rpm),
+        max_retries=args.max_retries
+    )
+    answerer.run(questions, output, resume=not args.no_resume)
+    print(f"\n💾 Answers written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Offline benchmark of loading, chunking, embedding and retrieval on the sample data
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from src.utils import suppress_warnings
+from src.fakes import HashingEmbeddings
+from src.benchmark import bench_loading, bench_chunking, bench_embedding, bench_retrieval, environment, compare
+from config.settings import PDF_DATA_PATH, TEXT_DATA_PATH, RETRIEVAL_K
+
+suppress_warnings()
+
+RETRIEVAL_CONFIGS = {
+    "flat": {},
+    "int8": {"quantization": "int8"},
+    "ivf": {"index_type": "ivf", "index_params": {"min_train_size": 1000}},
+}
+
+
+def _show(rate) -> str:
+    """Rates too fast to time are stored as null"""
+    return "-" if rate is None else str(rate)
+
+
+def main():
+    """Run every stage and write the results as JSON"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="retrieval corpus sizes")
+    parser.add_argument("--queries", type=int, default=200, help="retrieval queries per configuration")
+    parser.add_argument("--batch-size", type=int, default=64, help="embedding batch size")
+    parser.add_argument("--embed-delay", type=float, default=0.0,
+                        help="simulated seconds per embedded text (stand-in for a real model)")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    pdf_path, text_path = os.path.abspath(PDF_DATA_PATH), os.path.abspath(TEXT_DATA_PATH)
+    embeddings = HashingEmbeddings(delay=args.embed_delay)
+    results = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment()}
+
+    # Run in a scratch directory so page/BM25 caches start cold and nothing real is touched
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            print("⏱️  Loading...")
+            results["loading"], documents = bench_loading(pdf_path, text_path)
+            print("⏱️  Chunking...")
+            results["chunking"], chunks = bench_chunking(documents)
+            print("⏱️  Embedding...")
+            results["embedding"], vectors = bench_embedding(chunks, embeddings, args.batch_size)
+        finally:
+            os.chdir(cwd)
+
+    print("⏱️  Retrieval...")
+    rng = np.random.default_rng(0)
+    texts = [chunk.page_content for chunk in chunks]
+    picks = rng.choice(len(chunks), min(args.queries, len(chunks)), replace=False)
+    queries = [" ".join(texts[i].split()[:12]) for i in picks]
+    results["retrieval"] = bench_retrieval(vectors, texts, embeddings, args.sizes, RETRIEVAL_CONFIGS,
+                                           queries, RETRIEVAL_K)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print("\n📊 Results")
+    for stage, row in results["loading"].items():
+        rate = row.get("pages_per_s", row.get("documents_per_s"))
+        print(f"  {stage:<22} {_show(rate):>10} /s  ({row['seconds']}s)")
+    print(f"  {'chunk_documents':<22} {_show(results['chunking']['chunks_per_s']):>10} chunks/s")
+    print(f"  {'embed_documents':<22} {_show(results['embedding']['chunks_per_s']):>10} chunks/s")
+    for stage, row in results["retrieval"].items():
+        print(f"  {stage:<22} p50 {row['p50_ms']:>7.3f} ms  p95 {row['p95_ms']:>7.3f} ms  p99 {row['p99_ms']:>7.3f} ms")
+    print(f"\n💾 Saved results to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        changes = list(compare(previous, results))
+        print(f"\n🔍 Compared with {args.compare}: {len(changes)} metrics changed by 10% or more")
+        for stage, metric, before, after, change in changes:
+            print(f"  {stage:<22} {metric:<14} {before:>10} → {after:<10} ({change:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,24 +12,131 @@ TEXT_DATA_PATH = "./data/text_data"
 NEW_PDF_PATH = "./data/new_pdfs"
 NEW_TEXT_PATH = "./data/new_texts"
 MODELS_CACHE_PATH = "./models"
+LOCAL_STORE_PATH = "./vector_store"
+INGESTION_MANIFEST_PATH = "./cache/ingestion_manifest.json"
+COLLECTION_VERSION_PATH = "./cache/collection_version"  # Bumped on every write to the store
 
 # Vector Store Settings
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "astradb")  # "astradb" or "local"
+LOCAL_STORE_QUANTIZATION = os.getenv("LOCAL_STORE_QUANTIZATION", "none")  # "none", "int8" or "binary"
+LOCAL_STORE_RESCORE_FACTOR = 4  # Shortlist k * factor candidates for full-precision rescoring
+LOCAL_STORE_INDEX = os.getenv("LOCAL_STORE_INDEX", "flat")  # "flat" (brute force) or "ivf"
+IVF_NLIST = 0                # Number of IVF clusters (0 = 4 * sqrt(n))
+IVF_NPROBE = 8               # Clusters scanned per query (higher = better recall, slower)
+IVF_TRAIN_ITERATIONS = 10    # k-means iterations when (re)training centroids
+IVF_MIN_TRAIN_SIZE = 1000    # Below this many vectors search stays brute force
+IVF_RETRAIN_GROWTH = 4.0     # Re-train centroids once the store grows this many times
 COLLECTION_NAME = "rag_collection"
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 RETRIEVAL_K = 3
 
+# Context Packing Settings
+CONTEXT_PACKING_ENABLED = True
+CONTEXT_TOKEN_BUDGET = 2000      # Max (estimated) tokens of retrieved context in the prompt
+CONTEXT_DEDUP_THRESHOLD = 0.9    # Word-shingle Jaccard above which chunks count as duplicates
+
+# Hybrid Retrieval Settings
+RETRIEVAL_MODE = "hybrid"       # "similarity" or "hybrid" (BM25 + vector, fused with RRF)
+BM25_INDEX_ENABLED = True       # Index chunks once the store has accepted them (write_documents / ingestion)
+BM25_INDEX_PATH = "./cache/bm25"
+BM25_K1 = 1.5
+BM25_B = 0.75
+HYBRID_CANDIDATES = 20          # Results taken from each ranking before fusion
+RRF_K = 60
+
+# Answer Cache Settings
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_THRESHOLD = 0.95      # Min cosine similarity between questions for a hit
+ANSWER_CACHE_TTL_SECONDS = 3600
+ANSWER_CACHE_MAX_ENTRIES = 512
+ANSWER_CACHE_VERSION_CHECK_SECONDS = 1.0  # Min interval between collection version checks on lookup
+
+# Instrumentation Settings
+METRICS_ENABLED = True
+METRICS_LOG_PATH = "./logs/rag_metrics.jsonl"  # One JSON record per answered question
+
+# Ingestion Pipeline Settings
+INGEST_BATCH_SIZE = 64  # Chunks embedded and upserted together
+INGEST_QUEUE_SIZE = 4   # Batches buffered between pipeline stages
+
+# Near-Duplicate Chunk Settings
+DEDUP_ENABLED = True                   # Drop near-duplicate chunks before they are embedded
+DEDUP_THRESHOLD = 0.85                 # Estimated word-shingle Jaccard at which a chunk counts as a duplicate
+DEDUP_NUM_PERM = 128                   # MinHash signature length (more = more accurate, slower)
+DEDUP_INDEX_PATH = "./cache/dedup.npz"  # Signatures of indexed chunks
+
+# Upsert Settings
+UPSERT_BATCH_SIZE = 64
+UPSERT_CONCURRENCY = 4          # Batches written in parallel
+UPSERT_MAX_RETRIES = 3
+UPSERT_BACKOFF_SECONDS = 0.5    # Doubled after every failed attempt
+UPSERT_CHECKPOINT_PATH = "./cache/upsert_checkpoint.json"
+
+# PDF Parsing Settings
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))  # 1 = parse in-process
+PDF_PAGES_PER_TASK = 25  # Large PDFs are split into page ranges of this size
+PDF_EXTRACT_IMAGES = True
+PDF_PAGE_CACHE_ENABLED = True  # Reuse extracted page text for unchanged PDFs
+PDF_PAGE_CACHE_PATH = "./cache/pdf_pages.sqlite3"
+
 # Embedding Model Settings
 OLLAMA_MODEL = "mxbai-embed-large:latest"
 OLLAMA_BASE_URL = "http://localhost:11434"
 OLLAMA_NUM_THREADS = 10
+OLLAMA_POOLED_CLIENT = True      # Keep-alive, batched, concurrent /api/embed client
+OLLAMA_EMBED_BATCH_SIZE = 64     # Inputs per /api/embed request
+OLLAMA_EMBED_CONCURRENCY = 4     # Requests in flight (and pooled connections)
+OLLAMA_EMBED_MAX_RETRIES = 3     # Retries for connection errors, timeouts, 429 and 5xx
+OLLAMA_EMBED_TIMEOUT = 120.0
+OLLAMA_KEEP_ALIVE = "10m"        # Keep the model loaded between requests
 
 HUGGINGFACE_MODEL = "sentence-transformers/all-MiniLM-L12-v2"
 
+# Bulk Embedding Settings (ingest.py --bulk)
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", max(1, (os.cpu_count() or 1) // 2)))  # CPU processes
+EMBEDDING_BATCH_SIZE = 32          # Texts per length bucket / forward pass
+EMBEDDING_BULK_MIN_TEXTS = 256     # Smaller inputs are embedded in-process
+INGEST_BULK_BATCH_SIZE = 1024      # Pipeline batch size in bulk mode (more texts per bucketing pass)
+
+# Embedding Cache Settings
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_PATH = "./cache/embeddings.sqlite3"
+EMBEDDING_CACHE_MEMORY_SIZE = 10000  # Vectors kept in the in-memory LRU
+
+# Query Embedding Batching Settings
+QUERY_BATCHING_ENABLED = True
+QUERY_BATCH_WINDOW_MS = 5      # Max extra wait for other concurrent queries to join a batch
+QUERY_BATCH_MAX_SIZE = 32      # Queries per model call (matches the HuggingFace batch_size)
+
 # LLM Settings
 GROQ_MODEL = "openai/gpt-oss-120b"
 GROQ_TEMPERATURE = 0.2
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")  # "groq" or "fake" (offline streaming stand-in)
+FAKE_LLM_FIRST_TOKEN_DELAY = 0.2
+FAKE_LLM_TOKEN_DELAY = 0.02
+
+# Query Server Settings
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_EMBEDDINGS = os.getenv("SERVER_EMBEDDINGS", "huggingface")  # "huggingface" or "ollama"
+SERVER_MAX_CONCURRENCY = 4     # Questions answered at the same time
+SERVER_MAX_QUEUE = 32          # Requests allowed to wait for a slot (beyond that: 503)
+SERVER_QUEUE_TIMEOUT = 30.0    # Seconds a request may wait before giving up
+
+# Batch Question Answering Settings (batch_qa.py)
+BATCH_QA_CONCURRENCY = 4          # LLM calls in flight at once (halved on rate limits, then regrown)
+BATCH_QA_REQUESTS_PER_MINUTE = 0  # LLM call starts per minute, 0 = no fixed quota
+BATCH_QA_MAX_RETRIES = 5          # Retries per question before the error is recorded
+BATCH_QA_EMBED_BATCH_SIZE = 256   # Questions per embed_documents call
+
+# Web Loader Settings
+WEB_CACHE_ENABLED = True
+WEB_CACHE_PATH = "./cache/web"  # Extracted text + ETag/Last-Modified per URL
+WEB_MAX_CONCURRENCY = 8         # Pages fetched at once
+WEB_PER_HOST_LIMIT = 2          # Pages fetched at once from the same host
+WEB_TIMEOUT = 30.0
 
 # Web URLs for initial data loading
 WEB_URLS = [
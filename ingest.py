@@ -0,0 +1,50 @@
+"""
+Build the vector store from the initial data sources
+
+Documents are streamed through load → chunk → embed → upsert in bounded
+batches, so memory stays flat and early chunks are searchable while the
+rest of the corpus is still being processed.
+"""
+import argparse
+from src.utils import suppress_warnings
+from src.data_loaders import iter_documents
+from src.embeddings import get_huggingface_embeddings, get_bulk_huggingface_embeddings
+from src.vector_store import load_vector_store
+from src.ingestion import run_pipeline
+from config.settings import PDF_DATA_PATH, TEXT_DATA_PATH, WEB_URLS, INGEST_BATCH_SIZE, INGEST_BULK_BATCH_SIZE
+
+suppress_warnings()
+
+
+def main():
+    """Stream all initial data into the vector store"""
+    parser = argparse.ArgumentParser(description="Ingest the initial data sources")
+    parser.add_argument("--bulk", action="store_true",
+                        help="embed with length-bucketed batches spread over worker processes")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip web pages unchanged since the last run (the store already has them)")
+    args = parser.parse_args()
+
+    print("📥 Ingesting initial data...\n")
+
+    embeddings = get_bulk_huggingface_embeddings() if args.bulk else get_huggingface_embeddings()
+    vectorstore = load_vector_store(embeddings)
+
+    documents = iter_documents(PDF_DATA_PATH, TEXT_DATA_PATH, WEB_URLS, skip_unchanged=args.incremental)
+    batch_size = INGEST_BULK_BATCH_SIZE if args.bulk else INGEST_BATCH_SIZE
+    try:
+        run_pipeline(vectorstore, documents, embeddings=embeddings, batch_size=batch_size)
+    finally:
+        if hasattr(embeddings, "close"):
+            embeddings.close()
+
+    if hasattr(embeddings, "stats"):
+        print(f"🗃️  Embedding cache: {embeddings.stats.as_dict()}")
+    if hasattr(embeddings, "throughput"):
+        print(f"⚡ Ollama throughput: {embeddings.throughput.as_dict()}")
+
+    print("\n✅ Ingestion complete!")
+
+
+if __name__ == "__main__":
+    main()
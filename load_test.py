@@ -0,0 +1,132 @@
+"""
+Load test the RAG chain with concurrent simulated users
+
+Offline by default: stub LLM, embedding and vector store latencies over the
+sample text data. Pass --target real to drive the configured chain (needs
+the LLM and vector store credentials).
+"""
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+from src.utils import suppress_warnings
+from src.benchmark import environment
+from src.load_test import (
+    run_users,
+    summarize,
+    find_saturation,
+    load_questions,
+    questions_from_chunks,
+    build_offline_chain,
+    missing_credentials
+)
+from config.settings import TEXT_DATA_PATH, SERVER_MAX_CONCURRENCY
+
+suppress_warnings()
+
+
+def print_level(level: dict):
+    latency, first_token, queue = level["latency"], level["first_token"], level["queue"]
+    print(
+        f"  {level['users']:>5} {level['requests']:>8} {level['errors']:>6} {level['cache_hits']:>6}"
+        f" {level['throughput_rps']:>8.2f}"
+        f" {latency.get('p50_ms', 0):>9.0f} {latency.get('p95_ms', 0):>9.0f} {latency.get('p99_ms', 0):>9.0f}"
+        f" {first_token.get('p50_ms', 0):>9.0f} {queue.get('p50_ms', 0):>9.0f} {queue.get('p95_ms', 0):>9.0f}"
+    )
+
+
+def main():
+    """Sweep the number of concurrent users and report where the chain saturates"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["offline", "real"], default="offline", help="chain to drive")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="concurrent users per load level")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per load level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between a user's questions (s)")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help=f"requests allowed in the chain at once, 0 = unlimited like the Streamlit app "
+                             f"(the HTTP server uses {SERVER_MAX_CONCURRENCY})")
+    parser.add_argument("--questions", help="question corpus (.txt one per line, or .jsonl with 'question')")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="keep the semantic answer cache in the offline chain (off by default: questions "
+                             "drawn repeatedly from a small corpus would almost all be cache hits)")
+    parser.add_argument("--output", default="load_test_results.json", help="where to write the JSON results")
+    stubs = parser.add_argument_group("offline stub latencies (seconds)")
+    stubs.add_argument("--llm-first-token", type=float, default=0.3, help="LLM time to first token")
+    stubs.add_argument("--llm-token", type=float, default=0.01, help="LLM time per generated token")
+    stubs.add_argument("--answer-words", type=int, default=60, help="tokens per stub answer")
+    stubs.add_argument("--embed-delay", type=float, default=0.01, help="embedding model time per text")
+    stubs.add_argument("--search-latency", type=float, default=0.03, help="vector store round trip")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    questions = load_questions(args.questions) if args.questions else None
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "config": vars(args),
+        "levels": [],
+    }
+
+    cwd = os.getcwd()
+    scratch = None
+    if args.target == "real":
+        missing = missing_credentials()
+        if missing:
+            print(f"❌ The real chain needs: {', '.join(missing)} (set them in .env or use --target offline)")
+            return
+        if questions is None:
+            print("❌ --questions is required with --target real")
+            return
+        from src.server import build_rag_chain
+        rag_chain = build_rag_chain()
+    else:
+        # Caches, indexes and metrics of the offline run stay in a scratch directory
+        text_path = os.path.abspath(TEXT_DATA_PATH)
+        scratch = tempfile.TemporaryDirectory()
+        os.chdir(scratch.name)
+        rag_chain, chunks = build_offline_chain(
+            text_path,
+            embed_delay=args.embed_delay,
+            search_latency=args.search_latency,
+            first_token_delay=args.llm_first_token,
+            token_delay=args.llm_token,
+            answer_words=args.answer_words,
+            answer_cache=args.answer_cache
+        )
+        questions = questions or questions_from_chunks(chunks)
+
+    try:
+        print(f"\n🏋️  Load testing the {args.target} chain with {len(questions)} questions, "
+              f"{args.duration:.0f}s per level\n")
+        print(f"  {'users':>5} {'requests':>8} {'errors':>6} {'hits':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9} {'ttft p50':>9} {'queue p50':>9} {'queue p95':>9}")
+        for users in args.users:
+            # Keep per-request log lines from drowning the table
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                records, seconds, gate = run_users(rag_chain, questions, users, args.duration,
+                                                   think_time=args.think_time, max_concurrency=args.max_concurrency)
+            level = summarize(records, seconds, users, gate)
+            results["levels"].append(level)
+            print_level(level)
+    finally:
+        os.chdir(cwd)
+        if scratch is not None:
+            scratch.cleanup()
+
+    results["saturation"] = find_saturation(results["levels"])
+    saturation = results["saturation"]
+    print(f"\n📈 Peak throughput: {saturation['max_throughput_rps']:.2f} req/s")
+    print(f"   Throughput stops scaling after: {saturation['throughput_plateau_users'] or '-'} users")
+    print(f"   p95 latency doubles at: {saturation['latency_knee_users'] or '-'} users")
+    print(f"   Queueing exceeds service time at: {saturation['queueing_dominates_users'] or '-'} users")
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
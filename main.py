@@ -1,10 +1,8 @@
 """
 Main RAG System - Simple and Clean
 """
-from src.utils import suppress_warnings, print_response
-from src.embeddings import get_ollama_embeddings
-from src.vector_store import load_vector_store
-from src.chain import create_rag_chain
+from src.utils import suppress_warnings, print_streaming_response
+from src.startup import RagWarmup
 
 # Suppress warnings for clean output
 suppress_warnings()
@@ -14,21 +12,26 @@ def main():
     """Main RAG application"""
     print("🚀 Starting RAG System...\n")
 
-    # Load embeddings
-    embeddings = get_ollama_embeddings()
-
-    # Load vector store
-    vectorstore = load_vector_store(embeddings)
-
-    # Create RAG chain
-    rag_chain = create_rag_chain(vectorstore)
+    # Load embeddings, open the vector store and build the chain in the
+    # background while the question is being typed (its prints are held back
+    # so they don't interrupt the prompt)
+    warmup = RagWarmup(embeddings_provider="ollama", quiet=True).start()
 
     # Ask questions
     query = input("Enter your question: ")
     print(f"\n❓ Question: {query}")
 
-    response = rag_chain.invoke({"input": query})
-    print_response(response)
+    if not warmup.ready:
+        print(f"⏳ Waiting for the RAG system ({warmup.state})...")
+    try:
+        rag_chain = warmup.wait()
+    finally:
+        print(warmup.log, end="")
+    print(f"⚡ RAG system ready {warmup.ready_seconds}s after start {warmup.timings}")
+
+    # Stream sources first, then answer tokens as they are generated
+    from src.chain import stream_rag_response
+    print_streaming_response(stream_rag_response(rag_chain, query))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+"""
+Report recall@k of quantized and IVF local-index search against brute force
+"""
+import argparse
+import numpy as np
+from src.utils import suppress_warnings
+from src.quantization import evaluate_quantization
+from src.ann import evaluate_ivf
+from config.settings import LOCAL_STORE_PATH, COLLECTION_NAME, LOCAL_STORE_RESCORE_FACTOR, IVF_NLIST
+
+suppress_warnings()
+
+
+def load_matrix(synthetic: int, dim: int):
+    """Vectors from the local store, or random clustered vectors for offline runs"""
+    if synthetic:
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((max(1, synthetic // 100), dim))
+        matrix = centers[rng.integers(0, len(centers), synthetic)] + 0.5 * rng.standard_normal((synthetic, dim))
+    else:
+        from src.local_store import LocalVectorStore
+        store = LocalVectorStore(None, LOCAL_STORE_PATH, COLLECTION_NAME)
+        matrix = np.asarray(store._vectors())
+    matrix = matrix.astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def main():
+    """Print recall@k, memory and latency for each representation"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rescore-factor", type=int, default=LOCAL_STORE_RESCORE_FACTOR)
+    parser.add_argument("--synthetic", type=int, default=0, help="use N random vectors instead of the local store")
+    parser.add_argument("--dim", type=int, default=384, help="dimension for --synthetic")
+    parser.add_argument("--ann", action="store_true", help="also evaluate the IVF index")
+    parser.add_argument("--nlist", type=int, default=IVF_NLIST, help="IVF clusters (0 = 4 * sqrt(n))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32], help="IVF nprobe values")
+    args = parser.parse_args()
+
+    matrix = load_matrix(args.synthetic, args.dim)
+    if matrix.shape[0] == 0:
+        print("⚠️  Local store is empty - ingest with VECTOR_STORE_BACKEND=local or use --synthetic")
+        return
+
+    # Perturbed stored vectors make realistic "near" queries
+    rng = np.random.default_rng(1)
+    sample = matrix[rng.choice(matrix.shape[0], min(args.queries, matrix.shape[0]), replace=False)]
+    queries = sample + 0.1 * rng.standard_normal(sample.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    report = evaluate_quantization(matrix, queries, args.k, args.rescore_factor)
+    print(f"📏 {matrix.shape[0]} vectors x {matrix.shape[1]} dims, recall@{args.k}, rescore x{args.rescore_factor}\n")
+    for name, row in report.items():
+        latency = f"{row['ms_per_query']:>8.3f} ms/query" if "ms_per_query" in row else ""
+        print(f"{name:>8}: recall {row['recall']:.4f}  {row['bytes'] / 1e6:>9.2f} MB  {latency}")
+
+    if args.ann:
+        report = evaluate_ivf(matrix, queries, args.k, args.nlist, args.nprobe)
+        build = report.pop("build")
+        print(f"\n🗂️  IVF with {build['nlist']} clusters (trained in {build['seconds']:.2f}s)\n")
+        for name, row in report.items():
+            print(f"{name:>16}: recall {row['recall']:.4f}  {row['ms_per_query']:>8.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
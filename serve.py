@@ -0,0 +1,25 @@
+"""
+Run the SSE query server (shared RAG chain, bounded concurrency)
+"""
+import argparse
+import uvicorn
+from src.utils import suppress_warnings
+from src.server import create_app
+from config.settings import SERVER_HOST, SERVER_PORT
+
+suppress_warnings()
+
+
+def main():
+    """Start the HTTP server"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+
+    print(f"🌐 Serving RAG answers on http://{args.host}:{args.port} (POST /stream, /query; GET /health, /ready)")
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+IVF approximate nearest-neighbour index for the local vector store
+"""
+import os
+import time
+import numpy as np
+from src.local_store import top_k
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, block_rows: int = 8192) -> np.ndarray:
+    """Nearest centroid (by dot product) for every row, computed in blocks"""
+    out = np.empty(vectors.shape[0], dtype=np.int32)
+    for i in range(0, vectors.shape[0], block_rows):
+        out[i:i + block_rows] = np.argmax(np.asarray(vectors[i:i + block_rows]) @ centroids.T, axis=1)
+    return out
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Cluster unit vectors by cosine similarity; returns normalized centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=n_clusters)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty clusters with random points
+            sums[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index: rows are bucketed under their nearest centroid
+
+    A query scores the ``nprobe`` closest centroids and only the rows in
+    those buckets are compared exactly, so search cost grows with
+    ``n / nlist * nprobe`` instead of ``n``. Below ``min_train_size`` rows
+    the index stays untrained and callers fall back to brute force. New rows
+    are assigned to existing centroids; the centroids are re-trained once
+    the collection has grown ``retrain_growth`` times since the last
+    training.
+    """
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, train_iterations: int = 10,
+                 min_train_size: int = 1000, retrain_growth: float = 4.0, path: str = None):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.path = path
+        self.centroids = None
+        self.labels = np.empty(0, dtype=np.int32)
+        self.trained_size = 0
+        self._lists = None
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def _n_clusters(self, n: int) -> int:
+        return max(1, min(n, self.nlist or int(4 * np.sqrt(n))))
+
+    def train(self, matrix: np.ndarray):
+        """Fit centroids on (a sample of) the matrix and assign every row"""
+        n = matrix.shape[0]
+        n_clusters = self._n_clusters(n)
+        sample_size = min(n, max(n_clusters * 64, 10000))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(matrix[np.sort(rng.choice(n, sample_size, replace=False))])
+        self.centroids = spherical_kmeans(sample, n_clusters, self.train_iterations)
+        self.labels = _assign(matrix, self.centroids)
+        self.trained_size = n
+        self._lists = None
+
+    def rebuild(self, matrix):
+        """Re-derive assignments after rows were rewritten or deleted"""
+        n = 0 if matrix is None else matrix.shape[0]
+        if n < self.min_train_size:
+            self.centroids, self.labels, self.trained_size, self._lists = None, np.empty(0, dtype=np.int32), 0, None
+        elif not self.trained or n > self.trained_size * self.retrain_growth:
+            self.train(matrix)
+        else:
+            self.labels = _assign(matrix, self.centroids)
+            self._lists = None
+        self.save()
+
+    def add(self, matrix, new_rows: np.ndarray):
+        """Index rows appended at the end of ``matrix``"""
+        n = matrix.shape[0]
+        if not self.trained or n > self.trained_size * self.retrain_growth:
+            self.rebuild(matrix)
+            return
+        self.labels = np.concatenate([self.labels, _assign(new_rows, self.centroids)])
+        self._lists = None
+        self.save()
+
+    def update(self, rows: np.ndarray, vectors: np.ndarray):
+        """Re-assign rows overwritten in place, touching only the lists they move between"""
+        if not self.trained:
+            return
+        labels = _assign(vectors, self.centroids)
+        moved = labels != self.labels[rows]
+        if not moved.any():
+            return
+        rows, labels = rows[moved], labels[moved]
+        if self._lists is not None:
+            for old in np.unique(self.labels[rows]):
+                self._lists[old] = np.setdiff1d(self._lists[old], rows[self.labels[rows] == old])
+            for new in np.unique(labels):
+                self._lists[new] = np.union1d(self._lists[new], rows[labels == new])
+        self.labels[rows] = labels
+        self.save()
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self.labels, kind="stable")
+            bounds = np.searchsorted(self.labels[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        return self._lists
+
+    def candidates(self, query: np.ndarray, nprobe: int = None) -> np.ndarray:
+        """Rows in the buckets of the ``nprobe`` nearest centroids (None if untrained)"""
+        if not self.trained:
+            return None
+        probes = top_k(self.centroids @ query, nprobe or self.nprobe)
+        lists = self._inverted_lists()
+        return np.sort(np.concatenate([lists[i] for i in probes]))
+
+    def search(self, matrix, query: np.ndarray, k: int, nprobe: int = None):
+        """Return (rows, scores) of the best k rows among the probed buckets"""
+        rows = self.candidates(query, nprobe)
+        if rows is None:
+            scores = np.asarray(matrix) @ query
+            best = top_k(scores, k)
+            return best, scores[best]
+        scores = np.asarray(matrix[rows]) @ query
+        best = top_k(scores, k)
+        return rows[best], scores[best]
+
+    # ----- persistence -----
+
+    def save(self):
+        if not self.path:
+            return
+        if not self.trained:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, centroids=self.centroids, labels=self.labels, trained_size=np.array(self.trained_size))
+        os.replace(tmp, self.path)
+
+    def load(self, matrix):
+        """Restore from disk if it matches ``matrix``; otherwise rebuild"""
+        n = 0 if matrix is None else matrix.shape[0]
+        if self.path and os.path.exists(self.path):
+            data = np.load(self.path)
+            if data["labels"].shape[0] == n:
+                self.centroids = data["centroids"]
+                self.labels = data["labels"]
+                self.trained_size = int(data["trained_size"])
+                self._lists = None
+                return
+        self.rebuild(matrix)
+
+
+def evaluate_ivf(matrix: np.ndarray, queries: np.ndarray, k: int = 10, nlist: int = 0, nprobes=(1, 4, 8, 16, 32)):
+    """Recall@k and latency of IVF search at several nprobe values vs brute force"""
+    from src.quantization import recall_at_k
+
+    start = time.perf_counter()
+    exact = [top_k(matrix @ q, k) for q in queries]
+    brute_ms = 1000 * (time.perf_counter() - start) / max(1, len(queries))
+
+    index = IVFIndex(nlist=nlist, min_train_size=1)
+    start = time.perf_counter()
+    index.train(matrix)
+    build_seconds = time.perf_counter() - start
+
+    report = {"brute_force": {"recall": 1.0, "ms_per_query": round(brute_ms, 3)}}
+    for nprobe in nprobes:
+        if nprobe > len(index.centroids):
+            continue
+        start = time.perf_counter()
+        found = [index.search(matrix, q, k, nprobe)[0] for q in queries]
+        elapsed = time.perf_counter() - start
+        report[f"ivf nprobe={nprobe}"] = {
+            "recall": round(float(np.mean([recall_at_k(e, f) for e, f in zip(exact, found)])), 4),
+            "ms_per_query": round(1000 * elapsed / max(1, len(queries)), 3),
+        }
+    report["build"] = {"nlist": len(index.centroids), "seconds": round(build_seconds, 3)}
+    return report
@@ -0,0 +1,244 @@
+"""
+Semantic answer cache in front of the RAG chain
+"""
+import asyncio
+import os
+import threading
+import time
+import numpy as np
+from src.utils import read_collection_version
+from src.instrumentation import get_trace, stage
+from config.settings import (
+    COLLECTION_VERSION_PATH,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_VERSION_CHECK_SECONDS
+)
+
+
+class SemanticAnswerCache:
+    """Answers keyed by question embedding
+
+    A lookup is a hit when a stored question has cosine similarity of at
+    least ``threshold`` with the new one. Entries expire after ``ttl``
+    seconds, the least recently used entry is evicted when the cache is
+    full, and everything is dropped when the collection version changes
+    (i.e. after an ingestion run).
+
+    Lookups stay cheap: the version file is only stat'ed every
+    ``version_check_interval`` seconds (and read when its stat changed),
+    and the stacked vector matrix is only rebuilt when entries are added,
+    expire or are invalidated.
+    """
+
+    def __init__(self, embeddings, threshold: float = ANSWER_CACHE_THRESHOLD,
+                 ttl: float = ANSWER_CACHE_TTL_SECONDS, max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 version_check_interval: float = ANSWER_CACHE_VERSION_CHECK_SECONDS):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = []
+        self._vectors = None
+        self._lock = threading.Lock()
+        self._version = read_collection_version()
+        self._version_stat = self._stat_version()
+        self._version_checked = time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _rebuild(self):
+        self._vectors = np.stack([e["vector"] for e in self._entries]) if self._entries else None
+
+    @staticmethod
+    def _stat_version():
+        try:
+            stat = os.stat(COLLECTION_VERSION_PATH)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+    def _collection_changed(self) -> bool:
+        """Whether the collection version moved (checked at most every version_check_interval)"""
+        now = time.monotonic()
+        if now - self._version_checked < self.version_check_interval:
+            return False
+        self._version_checked = now
+        stat = self._stat_version()
+        if stat == self._version_stat:
+            return False
+        self._version_stat = stat
+        version = read_collection_version()
+        if version == self._version:
+            return False
+        self._version = version
+        return True
+
+    def _expire(self, now: float):
+        """Drop stale entries and everything if the collection changed"""
+        if self._collection_changed():
+            self._entries = []
+            self._rebuild()
+            return
+        # Entries are kept in creation order, so the expired ones are a prefix
+        expired = 0
+        while expired < len(self._entries) and now - self._entries[expired]["created"] >= self.ttl:
+            expired += 1
+        if expired:
+            self._entries = self._entries[expired:]
+            self._rebuild()
+
+    def lookup(self, question: str, vector=None):
+        """Return (response, vector); response is None on a miss"""
+        vector = self.embed(question) if vector is None else vector
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self._vectors is not None:
+                scores = self._vectors @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry = self._entries[best]
+                    entry["used"] = now
+                    self.hits += 1
+                    return {
+                        "input": question,
+                        "answer": entry["answer"],
+                        "context": entry["context"],
+                        "cached_question": entry["question"],
+                        "cache_similarity": float(scores[best]),
+                    }, vector
+            self.misses += 1
+        return None, vector
+
+    def store(self, question: str, response: dict, vector=None):
+        """Remember the answer and sources for a question"""
+        vector = self.embed(question) if vector is None else vector
+        now = time.time()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]["used"])
+                self._entries.pop(oldest)
+            self._entries.append({
+                "question": question,
+                "vector": vector,
+                "answer": response["answer"],
+                "context": response.get("context", []),
+                "created": now,
+                "used": now,
+            })
+            self._rebuild()
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._vectors = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class CachedRagChain:
+    """Wraps a RAG chain so repeated (or paraphrased) questions skip retrieval and generation
+
+    Exposes the same ``invoke``/``stream``/``ainvoke``/``astream`` calls the
+    rest of the code uses on the chain. On a hit, ``stream`` emits the
+    cached sources and then the whole answer as one chunk. On a miss the
+    lookup's query embedding is handed to the chain as ``query_vector`` so
+    retrieval does not embed the question a second time.
+    """
+
+    def __init__(self, chain, cache: SemanticAnswerCache):
+        self.chain = chain
+        self.cache = cache
+
+    def _lookup(self, inputs: dict, config):
+        trace = get_trace(config)
+        with stage(trace, "embed"):
+            vector = self.cache.embed(inputs["input"])
+        with stage(trace, "cache_lookup"):
+            cached, vector = self.cache.lookup(inputs["input"], vector)
+        if cached is not None and trace is not None:
+            trace.cache_hit = True
+        return cached, vector, {**inputs, "query_vector": vector}
+
+    def invoke(self, inputs: dict, config=None, **kwargs):
+        cached, vector, chain_inputs = self._lookup(inputs, config)
+        if cached is not None:
+            return cached
+        response = self.chain.invoke(chain_inputs, config, **kwargs)
+        response = {key: value for key, value in response.items() if key != "query_vector"}
+        self.cache.store(inputs["input"], response, vector)
+        return response
+
+    def stream(self, inputs: dict, config=None, **kwargs):
+        cached, vector, chain_inputs = self._lookup(inputs, config)
+        if cached is not None:
+            yield from _replay(cached)
+            return
+        response = {"answer": "", "context": []}
+        for chunk in self.chain.stream(chain_inputs, config, **kwargs):
+            chunk = _public(chunk)
+            if chunk:
+                _accumulate(response, chunk)
+                yield chunk
+        self.cache.store(inputs["input"], response, vector)
+
+    async def ainvoke(self, inputs: dict, config=None, **kwargs):
+        # Embedding the question blocks, so keep it off the event loop
+        cached, vector, chain_inputs = await asyncio.to_thread(self._lookup, inputs, config)
+        if cached is not None:
+            return cached
+        response = await self.chain.ainvoke(chain_inputs, config, **kwargs)
+        response = {key: value for key, value in response.items() if key != "query_vector"}
+        self.cache.store(inputs["input"], response, vector)
+        return response
+
+    async def astream(self, inputs: dict, config=None, **kwargs):
+        cached, vector, chain_inputs = await asyncio.to_thread(self._lookup, inputs, config)
+        if cached is not None:
+            for chunk in _replay(cached):
+                yield chunk
+            return
+        response = {"answer": "", "context": []}
+        async for chunk in self.chain.astream(chain_inputs, config, **kwargs):
+            chunk = _public(chunk)
+            if chunk:
+                _accumulate(response, chunk)
+                yield chunk
+        self.cache.store(inputs["input"], response, vector)
+
+
+def _replay(cached: dict):
+    """Stream chunks equivalent to a cached response"""
+    yield {"input": cached["input"]}
+    yield {"context": cached["context"]}
+    yield {"answer": cached["answer"]}
+
+
+def _public(chunk: dict) -> dict:
+    """Drop the internal query vector from streamed chunks"""
+    return {key: value for key, value in chunk.items() if key != "query_vector"}
+
+
+def _accumulate(response: dict, chunk: dict):
+    if "context" in chunk:
+        response["context"] = chunk["context"]
+    if chunk.get("answer"):
+        response["answer"] += chunk["answer"]
@@ -0,0 +1,387 @@
+"""
+Bulk question answering over JSONL files
+"""
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+import numpy as np
+from src.utils import serialize_sources
+from config.settings import (
+    BATCH_QA_CONCURRENCY,
+    BATCH_QA_REQUESTS_PER_MINUTE,
+    BATCH_QA_MAX_RETRIES,
+    BATCH_QA_EMBED_BATCH_SIZE
+)
+
+_QUESTION_FIELDS = ("question", "input", "query", "body")
+_ID_FIELDS = ("id", "request_id", "qid")
+
+
+class BatchQuestion:
+    """One input line: its id, question text and the original record"""
+
+    def __init__(self, qid: str, question: str, record: dict):
+        self.qid = qid
+        self.question = question
+        self.record = record
+
+
+def read_questions(path: str, field: str = None, id_field: str = None) -> list:
+    """Questions from a JSONL file
+
+    The question is taken from ``field`` or the first of question / input /
+    query / body present; the id from ``id_field`` or id / request_id / qid,
+    falling back to the line number.
+    """
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            fields = [field] if field else _QUESTION_FIELDS
+            question = next((record[name] for name in fields if record.get(name)), None)
+            if not question:
+                raise ValueError(f"{path}:{line_no}: no question field (tried {', '.join(fields)})")
+            ids = [id_field] if id_field else _ID_FIELDS
+            qid = next((record[name] for name in ids if record.get(name) is not None), line_no)
+            questions.append(BatchQuestion(str(qid), str(question).strip(), record))
+    return questions
+
+
+def completed_ids(output_path: str) -> set:
+    """Ids already answered in ``output_path``; failed rows are dropped so they are retried"""
+    if not os.path.exists(output_path):
+        return set()
+    done, kept = set(), []
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # Partial last line of an interrupted run
+            if row.get("error") is None:
+                done.add(row["id"])
+                kept.append(line if line.endswith("\n") else line + "\n")
+    tmp = output_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(kept)
+    os.replace(tmp, output_path)
+    return done
+
+
+def rate_limit_delay(error: Exception, default: float):
+    """Seconds to back off if ``error`` is an HTTP 429 / rate-limit error, else None
+
+    Honours a ``Retry-After`` header when the client exposes the response
+    (as the Groq and OpenAI clients do).
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429 and "ratelimit" not in type(error).__name__.lower():
+        return None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return default
+
+
+class AdaptiveLimiter:
+    """Bounded, rate-limit aware concurrency for LLM calls
+
+    At most ``limit`` calls run at once, starting at ``max_concurrency``.
+    A rate-limit error pauses every caller for the server's Retry-After
+    and halves the limit; each run of ``limit`` successful calls raises it
+    by one again. Other failures neither raise the limit nor count as a
+    success. ``requests_per_minute`` (0 = off) additionally spaces
+    call starts to stay under a known quota.
+    """
+
+    def __init__(self, max_concurrency: int = BATCH_QA_CONCURRENCY,
+                 requests_per_minute: float = BATCH_QA_REQUESTS_PER_MINUTE):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.active = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._next_start = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait for a slot; returns the seconds waited"""
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = max(self._paused_until, self._next_start) - now
+                if self.active < self.limit and wait <= 0:
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+            self.active += 1
+            self._next_start = max(now, self._next_start) + self.interval
+        return time.monotonic() - start
+
+    def release(self, rate_limited_for: float = None, failed: bool = False):
+        """Give the slot back; ``rate_limited_for`` backs off, ``failed`` marks a call that errored otherwise"""
+        with self._condition:
+            self.active -= 1
+            if rate_limited_for is not None:
+                self.rate_limited += 1
+                self._successes = 0
+                self.limit = max(1, self.limit // 2)
+                self._paused_until = max(self._paused_until, time.monotonic() + rate_limited_for)
+            elif failed:
+                self.failures += 1
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+class OutputWriter:
+    """Appends result rows to a JSONL file as soon as they are ready"""
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+
+    def write(self, row: dict):
+        with self._lock:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self.written += 1
+            self.failed += row.get("error") is not None
+
+    def close(self):
+        self._file.close()
+
+
+class BatchStats:
+    """Counters for a batch run"""
+
+    def __init__(self):
+        self.questions = 0
+        self.skipped = 0
+        self.unique_questions = 0
+        self.retrievals = 0
+        self.llm_calls = 0
+        self.lost = 0  # Questions whose rows could not be written
+        self.embed_seconds = 0.0
+        self.seconds = 0.0
+
+    def as_dict(self, writer=None, limiter=None) -> dict:
+        stats = {
+            "questions": self.questions,
+            "skipped_already_answered": self.skipped,
+            "unique_questions": self.unique_questions,
+            "retrievals": self.retrievals,
+            "llm_calls": self.llm_calls,
+            "lost": self.lost,
+            "embed_seconds": round(self.embed_seconds, 3),
+            "seconds": round(self.seconds, 3),
+        }
+        if writer is not None:
+            stats["written"] = writer.written
+            stats["failed"] = writer.failed
+        if limiter is not None:
+            stats["rate_limited"] = limiter.rate_limited
+            stats["llm_failures"] = limiter.failures
+            stats["final_concurrency"] = limiter.limit
+        return stats
+
+
+def _normalize(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+class BatchAnswerer:
+    """Answers many questions with shared work and bounded LLM concurrency
+
+    1. Questions that are identical after case/whitespace normalization
+       are answered once and the result is written for every id.
+    2. The remaining questions are embedded in bulk with
+       ``embed_documents`` (``embed_batch_size`` at a time).
+    3. Retrieval runs once per distinct query vector; a question whose
+       prompt (question + retrieved ids) was already sent reuses that answer.
+    4. LLM calls go through an ``AdaptiveLimiter``; rate-limit errors pause
+       and retry, other errors are retried with backoff up to
+       ``max_retries`` times and then recorded in the row's ``error``.
+
+    Rows are written to the output as each answer completes, with sources
+    and per-stage timings. Ids already answered in the output are skipped,
+    so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, embeddings, retrieval, document_chain, limiter: AdaptiveLimiter = None,
+                 max_retries: int = BATCH_QA_MAX_RETRIES, embed_batch_size: int = BATCH_QA_EMBED_BATCH_SIZE,
+                 backoff: float = 1.0):
+        self.embeddings = embeddings
+        self.retrieval = retrieval
+        self.document_chain = document_chain
+        self.limiter = limiter or AdaptiveLimiter()
+        self.max_retries = max_retries
+        self.embed_batch_size = embed_batch_size
+        self.backoff = backoff
+        self.stats = BatchStats()
+        self._retrievals = {}
+        self._answers = {}
+        self._lock = threading.Lock()
+
+    # ----- shared work -----
+
+    def _embed(self, questions: list) -> list:
+        start = time.perf_counter()
+        vectors = []
+        for i in range(0, len(questions), self.embed_batch_size):
+            vectors.extend(self.embeddings.embed_documents(questions[i:i + self.embed_batch_size]))
+        self.stats.embed_seconds += time.perf_counter() - start
+        return vectors
+
+    def _shared(self, memo: dict, key, fn):
+        """Run fn once per key, even when several workers ask at the same time"""
+        with self._lock:
+            future = memo.get(key)
+            owner = future is None
+            if owner:
+                future = memo[key] = Future()
+        if owner:
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result(), owner
+
+    def _retrieve(self, question: str, vector) -> tuple:
+        def run():
+            start = time.perf_counter()
+            docs = self.retrieval.invoke({"input": question, "query_vector": vector})
+            with self._lock:
+                self.stats.retrievals += 1
+            return docs, time.perf_counter() - start
+        key = np.asarray(vector, dtype=np.float32).tobytes()
+        (docs, seconds), owner = self._shared(self._retrievals, key, run)
+        return docs, seconds if owner else 0.0
+
+    def _generate(self, question: str, docs: list) -> str:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                answer = self.document_chain.invoke({"input": question, "context": docs})
+            except Exception as e:
+                delay = rate_limit_delay(e, default=self.backoff * (2 ** attempt))
+                self.limiter.release(rate_limited_for=delay, failed=delay is None)
+                if attempt == self.max_retries:
+                    raise
+                if delay is None:
+                    time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+                continue
+            self.limiter.release()
+            with self._lock:
+                self.stats.llm_calls += 1
+            return answer
+
+    def _answer(self, question: str, vector) -> dict:
+        started = time.perf_counter()
+        docs, retrieval_seconds = self._retrieve(question, vector)
+        prompt_key = (_normalize(question), tuple(getattr(doc, "id", None) or doc.page_content for doc in docs))
+
+        def run():
+            start = time.perf_counter()
+            answer = self._generate(question, docs)
+            return answer, time.perf_counter() - start
+        (answer, llm_seconds), owner = self._shared(self._answers, prompt_key, run)
+        return {
+            "answer": answer,
+            "sources": serialize_sources(docs),
+            "timings_ms": {
+                "retrieval": round(retrieval_seconds * 1000, 2),
+                "llm": round(llm_seconds * 1000, 2) if owner else 0.0,
+                "total": round((time.perf_counter() - started) * 1000, 2),
+            },
+            "shared_answer": not owner,
+        }
+
+    # ----- run -----
+
+    def run(self, questions: list, output_path: str, resume: bool = True, progress_every: int = 50):
+        """Answer ``questions`` (BatchQuestion list), streaming rows to ``output_path``"""
+        start = time.perf_counter()
+        if not resume and os.path.exists(output_path):
+            os.remove(output_path)
+        done = completed_ids(output_path) if resume else set()
+        pending = [q for q in questions if q.qid not in done]
+        self.stats.questions = len(questions)
+        self.stats.skipped = len(questions) - len(pending)
+        if self.stats.skipped:
+            print(f"⏭️  Resuming: {self.stats.skipped} questions already answered in {output_path}")
+
+        groups = {}
+        for q in pending:
+            groups.setdefault(_normalize(q.question), []).append(q)
+        unique = [members[0].question for members in groups.values()]
+        self.stats.unique_questions = len(unique)
+        if not unique:
+            return self.stats
+
+        print(f"🧮 Embedding {len(unique)} unique questions ({len(pending)} pending)...")
+        vectors = self._embed(unique)
+        embed_ms = round(self.stats.embed_seconds * 1000 / len(unique), 2)
+
+        writer = OutputWriter(output_path)
+        progress = {"done": 0}
+
+        def work(members, question, vector):
+            try:
+                result, error = self._answer(question, vector), None
+            except Exception as e:
+                result, error = {}, f"{type(e).__name__}: {e}"
+            for i, q in enumerate(members):
+                row = {"id": q.qid, "question": q.question, **result, "error": error}
+                if result:
+                    row["timings_ms"] = {"embed": embed_ms, **result["timings_ms"]}
+                    row["shared_answer"] = result["shared_answer"] or i > 0
+                writer.write(row)
+            with self._lock:
+                progress["done"] += len(members)
+                if progress["done"] % progress_every < len(members):
+                    rate = progress["done"] / (time.perf_counter() - start)
+                    print(f"✅ {progress['done']}/{len(pending)} answered ({rate:.1f}/s, "
+                          f"concurrency {self.limiter.limit}, rate limited {self.limiter.rate_limited}x)")
+
+        # More workers than LLM slots so retrieval overlaps with generation
+        futures = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.limiter.max_concurrency * 2) as pool:
+                for members, question, vector in zip(groups.values(), unique, vectors):
+                    futures[pool.submit(work, members, question, vector)] = members
+        finally:
+            writer.close()
+            self.stats.seconds = time.perf_counter() - start
+
+        # Errors outside _answer (e.g. writing a row) leave rows missing from the output
+        lost = []
+        for future, members in futures.items():
+            error = future.exception()
+            if error is not None:
+                lost.append(f"{members[0].qid}: {type(error).__name__}: {error}")
+                self.stats.lost += len(members)
+        print(f"📊 {self.stats.as_dict(writer, self.limiter)}")
+        if lost:
+            for line in lost[:5]:
+                print(f"❌ {line}")
+            raise RuntimeError(f"{self.stats.lost} questions were not written to {output_path}; "
+                               f"re-run to retry them")
+        return self.stats
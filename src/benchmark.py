@@ -0,0 +1,157 @@
+"""
+Offline benchmarks for ingestion and retrieval stages
+"""
+import math
+import os
+import platform
+import tempfile
+import time
+import numpy as np
+from src.local_store import LocalVectorStore
+
+
+def percentiles(samples) -> dict:
+    """Latency summary in milliseconds"""
+    ms = np.asarray(samples, dtype=np.float64) * 1000
+    if ms.size == 0:
+        return {"count": 0}
+    return {
+        "count": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    """Return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _rate(count: int, seconds: float):
+    """Items per second, or None when the run was too fast to time (keeps the report strict JSON)"""
+    return round(count / seconds, 2) if seconds > 0 else None
+
+
+def bench_loading(pdf_path: str, text_path: str) -> tuple[dict, list]:
+    """Pages/s of load_pdf_files (cold and warm page cache) and load_text_files, plus the loaded documents"""
+    from src.data_loaders import load_pdf_files, load_text_files
+
+    results = {}
+    pdf_docs, seconds = timed(load_pdf_files, pdf_path)
+    results["load_pdf_files_cold"] = {"pages": len(pdf_docs), "seconds": round(seconds, 3),
+                                      "pages_per_s": _rate(len(pdf_docs), seconds)}
+    _, seconds = timed(load_pdf_files, pdf_path)
+    results["load_pdf_files_warm"] = {"pages": len(pdf_docs), "seconds": round(seconds, 3),
+                                      "pages_per_s": _rate(len(pdf_docs), seconds)}
+    text_docs, seconds = timed(load_text_files, text_path)
+    results["load_text_files"] = {"documents": len(text_docs), "seconds": round(seconds, 3),
+                                  "documents_per_s": _rate(len(text_docs), seconds)}
+    return results, pdf_docs + text_docs
+
+
+def bench_chunking(documents: list) -> tuple[dict, list]:
+    """Throughput of chunk_documents over the loaded documents, plus the chunks"""
+    from src.data_loaders import chunk_documents
+
+    chunks, seconds = timed(chunk_documents, documents)
+    chars = sum(len(doc.page_content) for doc in documents)
+    return {
+        "documents": len(documents),
+        "chunks": len(chunks),
+        "seconds": round(seconds, 3),
+        "documents_per_s": _rate(len(documents), seconds),
+        "chunks_per_s": _rate(len(chunks), seconds),
+        "mb_per_s": _rate(chars / 1e6, seconds),
+    }, chunks
+
+
+def bench_embedding(chunks: list, embeddings, batch_size: int = 64) -> tuple[dict, np.ndarray]:
+    """Chunks/s of embed_documents in batches, plus the vectors"""
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(embeddings.embed_documents(texts[i:i + batch_size]))
+    seconds = time.perf_counter() - start
+    return {
+        "chunks": len(texts),
+        "batch_size": batch_size,
+        "seconds": round(seconds, 3),
+        "chunks_per_s": _rate(len(texts), seconds),
+    }, np.asarray(vectors, dtype=np.float32)
+
+
+def _corpus(vectors: np.ndarray, texts: list, size: int, rng):
+    """Real chunk vectors, padded to ``size`` with perturbed copies"""
+    if size <= len(vectors):
+        return vectors[:size], texts[:size]
+    extra = size - len(vectors)
+    base = rng.integers(0, len(vectors), extra)
+    noise = 0.05 * rng.standard_normal((extra, vectors.shape[1])).astype(np.float32)
+    padded = np.vstack([vectors, vectors[base] + noise])
+    return padded, texts + [texts[i] for i in base]
+
+
+def bench_retrieval(vectors: np.ndarray, texts: list, embeddings, sizes, configs, queries: list,
+                    k: int = 3) -> dict:
+    """Query latency percentiles of LocalVectorStore.similarity_search per corpus size and index config"""
+    rng = np.random.default_rng(0)
+    results = {}
+    for size in sizes:
+        matrix, corpus_texts = _corpus(vectors, texts, size, rng)
+        for name, options in configs.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                store = LocalVectorStore(embeddings, tmp, "bench", **options)
+                _, build_seconds = timed(store.add_vectors, matrix, corpus_texts,
+                                         ids=[str(i) for i in range(len(matrix))])
+                store.similarity_search(queries[0], k=k)  # warm-up
+                samples = []
+                for query in queries:
+                    _, seconds = timed(store.similarity_search, query, k=k)
+                    samples.append(seconds)
+            results[f"{name}@{size}"] = {
+                "corpus_size": size,
+                "index": name,
+                "build_seconds": round(build_seconds, 3),
+                **percentiles(samples),
+            }
+    return results
+
+
+def environment() -> dict:
+    """Settings and platform details that affect the numbers"""
+    from config import settings
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "chunk_size": settings.CHUNK_SIZE,
+        "chunk_overlap": settings.CHUNK_OVERLAP,
+        "retrieval_k": settings.RETRIEVAL_K,
+        "pdf_workers": settings.PDF_WORKERS,
+    }
+
+
+def compare(previous: dict, current: dict, tolerance: float = 0.1):
+    """Yield (stage, metric, before, after, change) for metrics that moved more than ``tolerance``"""
+    for section in ("loading", "chunking", "embedding", "retrieval"):
+        before_section = previous.get(section, {})
+        after_section = current.get(section, {})
+        if section in ("chunking", "embedding"):
+            before_section, after_section = {section: before_section}, {section: after_section}
+        for stage, after in after_section.items():
+            before = before_section.get(stage, {})
+            for metric, value in after.items():
+                if not metric.endswith(("_per_s", "_ms")) or value is None:
+                    continue
+                # Older reports may hold Infinity for rates too fast to time
+                if not before.get(metric) or not math.isfinite(before[metric]):
+                    continue
+                change = (value - before[metric]) / before[metric]
+                if abs(change) >= tolerance:
+                    yield stage, metric, before[metric], value, change
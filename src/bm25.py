@@ -0,0 +1,377 @@
+"""
+Local BM25 inverted index and hybrid (BM25 + vector) retrieval
+"""
+import json
+import math
+import os
+import re
+import threading
+import uuid
+from collections import Counter
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+from config.settings import BM25_INDEX_PATH, BM25_K1, BM25_B
+
+
+LOG_FILE = "log.jsonl"
+POSTINGS_FILE = "postings.npz"
+LEGACY_DOCS_FILE = "docs.jsonl"  # Text + metadata log of the previous format, migrated on load
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens; keeps things like 'gpt-4', 'l2' and 'x_i' intact"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Inverted index over chunk text, persisted under ``path``
+
+    Only what scoring needs is kept: chunk ids, lengths and postings. Hits
+    are resolved to text and metadata through the vector store
+    (``get_by_ids``), so the index holds no second copy of the corpus.
+
+    ``save()`` writes a compact ``.npz`` snapshot (ids, lengths, and for a
+    sorted vocabulary int32 doc slots / uint16 term frequencies with one
+    offset array) that is searched in place as numpy slices. Chunks added
+    since the snapshot live in small delta postings and in an append-only
+    JSONL log (term counts and delete tombstones) that is replayed on load
+    and reset by the next snapshot. Deleted slots are dropped from the
+    snapshot once they pile up.
+    """
+
+    def __init__(self, path: str = BM25_INDEX_PATH, k1: float = BM25_K1, b: float = BM25_B):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self._ids = np.empty(0, dtype=str)        # snapshot slot -> id
+        self._new_ids = []                        # ids of the slots added since the snapshot
+        self._new_slot = {}                       # id -> slot, for those
+        self.doc_len = np.empty(0, dtype=np.int32)
+        self.alive = np.empty(0, dtype=bool)
+        self._vocab = np.empty(0, dtype=str)      # sorted snapshot vocabulary
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._slots = np.empty(0, dtype=np.int32)
+        self._tfs = np.empty(0, dtype=np.uint16)
+        self._delta = {}                          # term -> ([slots], [tfs]) added since the snapshot
+        self._live = 0
+        self._total_len = 0
+        self._log_id = None
+        self._dirty = False
+
+    def __len__(self):
+        return self._live
+
+    # ----- persistence -----
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        if os.path.exists(self._file(LEGACY_DOCS_FILE)):
+            self._migrate()
+            return
+        if os.path.exists(self._file(POSTINGS_FILE)):
+            with np.load(self._file(POSTINGS_FILE), allow_pickle=False) as snapshot:
+                self._ids = snapshot["ids"]
+                self.doc_len = snapshot["doc_len"]
+                self.alive = snapshot["alive"]
+                self._vocab = snapshot["vocab"]
+                self._offsets = snapshot["offsets"]
+                self._slots = snapshot["slots"]
+                self._tfs = snapshot["tfs"]
+                self._log_id = str(snapshot["log_id"])
+            self._live = int(self.alive.sum())
+            self._total_len = int(self.doc_len[self.alive].sum())
+        if not os.path.exists(self._file(LOG_FILE)):
+            return
+        with open(self._file(LOG_FILE), encoding="utf-8") as f:
+            if json.loads(f.readline() or "{}").get("log_id") != self._log_id:
+                return  # Interrupted save: the snapshot already covers this log
+            self._replay(json.loads(line) for line in f)
+
+    def _replay(self, records):
+        """Apply logged adds and deletes, batching consecutive records of the same kind"""
+        adds, deletes = [], []
+        for record in records:
+            if "delete" in record:
+                if adds:
+                    self._add_terms(adds)
+                    adds = []
+                deletes.append(record["delete"])
+            else:
+                if deletes:
+                    self._remove(deletes)
+                    deletes = []
+                adds.append((record["id"], record["terms"]))
+        if adds:
+            self._add_terms(adds)
+        if deletes:
+            self._remove(deletes)
+
+    def _migrate(self):
+        """Re-index the text log of the previous format, keeping only term counts"""
+        texts = {}
+        with open(self._file(LEGACY_DOCS_FILE), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if "delete" in record:
+                    texts.pop(record["delete"], None)
+                else:
+                    texts.pop(record["id"], None)
+                    texts[record["id"]] = record["text"]
+        self._add_terms([(doc_id, Counter(tokenize(text))) for doc_id, text in texts.items()])
+        self._dirty = True
+        self.save()
+        os.remove(self._file(LEGACY_DOCS_FILE))
+
+    def save(self):
+        """Snapshot ids and postings (merging the delta) and start a new log"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            ids = np.concatenate([self._ids, np.array(self._new_ids, dtype=str)]) if self._new_ids else self._ids
+
+            # Merge snapshot and delta postings as (term id, slot, tf) triples
+            delta_terms = np.array(sorted(self._delta), dtype=str)
+            vocab = np.union1d(self._vocab, delta_terms)
+            delta_sizes = [len(self._delta[term][0]) for term in delta_terms.tolist()]
+            term_ids = np.concatenate([
+                np.repeat(np.searchsorted(vocab, self._vocab), np.diff(self._offsets)),
+                np.repeat(np.searchsorted(vocab, delta_terms), delta_sizes),
+            ]).astype(np.int32)
+            slots = np.concatenate([self._slots] + [
+                np.asarray(self._delta[term][0], dtype=np.int32) for term in delta_terms.tolist()
+            ]).astype(np.int32)
+            tfs = np.concatenate([self._tfs] + [
+                np.minimum(self._delta[term][1], np.iinfo(np.uint16).max).astype(np.uint16)
+                for term in delta_terms.tolist()
+            ]).astype(np.uint16)
+
+            doc_len, alive = self.doc_len, self.alive
+            dead = len(alive) - self._live
+            if dead > 100 and dead > self._live // 4:
+                # Drop deleted slots and renumber the rest
+                renumber = np.cumsum(alive) - 1
+                keep = alive[slots]
+                term_ids, slots, tfs = term_ids[keep], renumber[slots[keep]].astype(np.int32), tfs[keep]
+                ids, doc_len = ids[alive], doc_len[alive]
+                alive = np.ones(len(ids), dtype=bool)
+
+            order = np.argsort(term_ids, kind="stable")
+            term_ids, slots, tfs = term_ids[order], slots[order], tfs[order]
+            used, counts = np.unique(term_ids, return_counts=True)
+            vocab = vocab[used]
+            offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(counts)
+
+            log_id = uuid.uuid4().hex
+            tmp = self._file("postings.tmp.npz")
+            np.savez_compressed(
+                tmp,
+                ids=ids,
+                doc_len=doc_len,
+                alive=alive,
+                vocab=vocab,
+                offsets=offsets,
+                slots=slots,
+                tfs=tfs,
+                log_id=np.array(log_id),
+            )
+            os.replace(tmp, self._file(POSTINGS_FILE))
+            self._start_log(log_id)
+
+            self._ids, self.doc_len, self.alive = ids, doc_len, alive
+            self._vocab, self._offsets, self._slots, self._tfs = vocab, offsets, slots, tfs
+            self._new_ids, self._new_slot, self._delta = [], {}, {}
+            self._log_id = log_id
+            self._dirty = False
+
+    def _start_log(self, log_id):
+        tmp = self._file(LOG_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"log_id": log_id}) + "\n")
+        os.replace(tmp, self._file(LOG_FILE))
+
+    def _log(self, records):
+        os.makedirs(self.path, exist_ok=True)
+        if not os.path.exists(self._file(LOG_FILE)):
+            self._start_log(self._log_id)
+        with open(self._file(LOG_FILE), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    # ----- updates -----
+
+    def _add_terms(self, records):
+        """Append [(id, {term: tf})]; an id that is already indexed is replaced"""
+        self._remove([doc_id for doc_id, _ in records])
+        start = len(self.doc_len)
+        lengths = np.zeros(len(records), dtype=np.int32)
+        alive = np.ones(len(records), dtype=bool)
+        for i, (doc_id, terms) in enumerate(records):
+            previous = self._new_slot.get(doc_id)
+            if previous is not None:
+                # Same id twice in one batch: the last one wins
+                alive[previous - start] = False
+                self._live -= 1
+                self._total_len -= int(lengths[previous - start])
+            slot = start + i
+            self._new_ids.append(doc_id)
+            self._new_slot[doc_id] = slot
+            lengths[i] = sum(terms.values())
+            self._live += 1
+            self._total_len += int(lengths[i])
+            for term, tf in terms.items():
+                entry = self._delta.setdefault(term, ([], []))
+                entry[0].append(slot)
+                entry[1].append(tf)
+        self.doc_len = np.concatenate([self.doc_len, lengths])
+        self.alive = np.concatenate([self.alive, alive])
+        self._dirty = True
+
+    def _remove(self, ids) -> int:
+        ids = set(ids)
+        slots = [self._new_slot.pop(doc_id) for doc_id in ids if doc_id in self._new_slot]
+        if len(self._ids):
+            slots.extend(np.flatnonzero(np.isin(self._ids, list(ids))).tolist())
+        slots = [slot for slot in slots if self.alive[slot]]
+        if slots:
+            self.alive[slots] = False
+            self._live -= len(slots)
+            self._total_len -= int(self.doc_len[slots].sum())
+            self._dirty = True
+        return len(slots)
+
+    def add(self, documents):
+        """Index documents (by ``Document.id``); re-adding an id replaces it"""
+        with self._lock:
+            records = [(doc.id, dict(Counter(tokenize(doc.page_content)))) for doc in documents
+                       if doc.id is not None]
+            if records:
+                self._add_terms(records)
+                self._log([{"id": doc_id, "terms": terms} for doc_id, terms in records])
+
+    def delete(self, ids):
+        """Remove documents by id"""
+        with self._lock:
+            ids = list(ids)
+            if self._remove(ids):
+                self._log([{"delete": doc_id} for doc_id in ids])
+
+    # ----- search -----
+
+    def _id(self, slot: int) -> str:
+        if slot < len(self._ids):
+            return str(self._ids[slot])
+        return self._new_ids[slot - len(self._ids)]
+
+    def _postings(self, term: str):
+        """(slots, tfs) of a term: a slice of the snapshot arrays plus any delta"""
+        slots, tfs = [], []
+        i = int(np.searchsorted(self._vocab, term))
+        if i < len(self._vocab) and self._vocab[i] == term:
+            lo, hi = self._offsets[i], self._offsets[i + 1]
+            slots.append(self._slots[lo:hi])
+            tfs.append(self._tfs[lo:hi])
+        if term in self._delta:
+            slots.append(np.asarray(self._delta[term][0], dtype=np.int32))
+            tfs.append(np.asarray(self._delta[term][1], dtype=np.uint16))
+        if not slots:
+            return None
+        if len(slots) == 1:
+            return slots[0], tfs[0]
+        return np.concatenate(slots), np.concatenate(tfs)
+
+    def search(self, query: str, k: int = 10):
+        """Return [(id, score)] for the k best BM25 matches"""
+        with self._lock:
+            n = self._live
+            if n == 0:
+                return []
+            avgdl = self._total_len / n or 1.0
+            scores = np.zeros(len(self.doc_len), dtype=np.float32)
+            for term in set(tokenize(query)):
+                postings = self._postings(term)
+                if postings is None:
+                    continue
+                slots, tfs = postings
+                keep = self.alive[slots]
+                slots, tfs = slots[keep], tfs[keep].astype(np.float32)
+                if slots.size == 0:
+                    continue
+                idf = math.log(1.0 + (n - slots.size + 0.5) / (slots.size + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[slots] / avgdl)
+                scores[slots] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+            hits = np.flatnonzero(scores > 0)
+            if hits.size == 0:
+                return []
+            best = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+            return [(self._id(int(slot)), float(scores[slot])) for slot in best]
+
+
+_shared_index = None
+
+
+def get_bm25_index():
+    """Process-wide BM25 index loaded from BM25_INDEX_PATH"""
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = BM25Index()
+    return _shared_index
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60):
+    """Fuse ranked id lists: score(id) = sum(1 / (k + rank))"""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
+
+
+class HybridRetriever(BaseRetriever):
+    """Fuses vector similarity and BM25 rankings with reciprocal rank fusion"""
+
+    vectorstore: object
+    index: object
+    k: int = 3
+    candidates: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.search(query)
+
+    def search(self, query: str, vector=None):
+        """Fused results; pass ``vector`` to reuse an already computed query embedding"""
+        if vector is None:
+            vector_docs = self.vectorstore.similarity_search(query, k=self.candidates)
+        else:
+            vector_docs = self.vectorstore.similarity_search_by_vector(vector, k=self.candidates)
+        docs = {}
+        vector_ranking = []
+        for doc in vector_docs:
+            key = doc.id or doc.page_content
+            docs.setdefault(key, doc)
+            vector_ranking.append(key)
+        lexical_ranking = [doc_id for doc_id, _ in self.index.search(query, self.candidates)]
+
+        # Lexical-only hits are fetched from the store, a batch at a time
+        fused = reciprocal_rank_fusion([vector_ranking, lexical_ranking], self.rrf_k)
+        results = []
+        while fused and len(results) < self.k:
+            take, fused = fused[:self.k - len(results)], fused[self.k - len(results):]
+            missing = [key for key in take if key not in docs]
+            if missing:
+                for doc in self.vectorstore.get_by_ids(missing):
+                    docs[doc.id] = doc
+            results.extend(docs[key] for key in take if key in docs)
+        return results
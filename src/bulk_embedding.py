@@ -0,0 +1,138 @@
+"""
+Length-bucketed, multi-process bulk document embedding
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config.settings import (
+    HUGGINGFACE_MODEL,
+    MODELS_CACHE_PATH,
+    EMBEDDING_WORKERS,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BULK_MIN_TEXTS
+)
+
+
+def load_sentence_transformer(model_name: str, cache_folder: str):
+    """Load a CPU sentence-transformers model from the shared model cache"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, cache_folder=cache_folder, device="cpu")
+
+
+def length_buckets(texts: list, batch_size: int) -> list:
+    """Group text indices into batches of similar length (longest first)
+
+    Sorting by length before batching means every text in a batch is padded
+    only to its neighbours' length instead of the longest text in an
+    arbitrary batch.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def padding_ratio(texts: list, batches: list) -> float:
+    """Fraction of padded positions (approximated with characters) for the given batches"""
+    total = sum(len(texts[i]) for batch in batches for i in batch)
+    padded = sum(max(len(texts[i]) for i in batch) * len(batch) for batch in batches if batch)
+    return 1.0 - total / padded if padded else 0.0
+
+
+_worker_model = None
+
+
+def _init_worker(load_model, model_name: str, cache_folder: str, threads: int):
+    """Load the model once per worker process, limiting its intra-op threads"""
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = load_model(model_name, cache_folder)
+
+
+def _encode(model, texts: list, normalize: bool) -> np.ndarray:
+    vectors = model.encode(texts, batch_size=len(texts), normalize_embeddings=normalize,
+                           show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _encode_in_worker(texts: list, normalize: bool) -> np.ndarray:
+    return _encode(_worker_model, texts, normalize)
+
+
+class BulkEmbeddings(Embeddings):
+    """Sentence-transformers embeddings for bulk ingestion
+
+    ``embed_documents`` sorts texts into length buckets of ``batch_size``
+    and, for at least ``min_bulk_texts`` texts, spreads the buckets over
+    ``workers`` CPU processes. Each process loads the model once from
+    ``cache_folder`` (the parent loads it first so the download happens
+    only once). Vectors are returned in the original order. Queries and
+    small inputs are encoded in-process.
+    """
+
+    def __init__(self, model_name: str = HUGGINGFACE_MODEL, cache_folder: str = MODELS_CACHE_PATH,
+                 workers: int = EMBEDDING_WORKERS, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 min_bulk_texts: int = EMBEDDING_BULK_MIN_TEXTS, normalize: bool = True,
+                 load_model=load_sentence_transformer):
+        self.model_name = model_name
+        self.cache_folder = cache_folder
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.min_bulk_texts = min_bulk_texts
+        self.normalize = normalize
+        self.load_model = load_model
+        self.last_padding_saved = 0.0
+        self._model = None
+        self._pool = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.load_model(self.model_name, self.cache_folder)
+        return self._model
+
+    def _get_pool(self):
+        if self._pool is None:
+            self.model  # populate the shared cache before workers start loading from it
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.load_model, self.model_name, self.cache_folder, threads),
+            )
+        return self._pool
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        batches = length_buckets(texts, self.batch_size)
+        arrival = [list(range(i, min(i + self.batch_size, len(texts)))) for i in range(0, len(texts), self.batch_size)]
+        self.last_padding_saved = padding_ratio(texts, arrival) - padding_ratio(texts, batches)
+
+        if self.workers > 1 and len(texts) >= self.min_bulk_texts:
+            pool = self._get_pool()
+            results = pool.map(_encode_in_worker, [[texts[i] for i in batch] for batch in batches],
+                               [self.normalize] * len(batches))
+        else:
+            results = (_encode(self.model, [texts[i] for i in batch], self.normalize) for batch in batches)
+
+        vectors = [None] * len(texts)
+        for batch, block in zip(batches, results):
+            for i, vector in zip(batch, block):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text):
+        return _encode(self.model, [text], self.normalize)[0].tolist()
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
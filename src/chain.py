@@ -1,15 +1,37 @@
 """
 RAG chain setup
 """
-from langchain_groq import ChatGroq
+import time
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_classic.chains import create_retrieval_chain
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
-from config.settings import GROQ_MODEL, GROQ_TEMPERATURE, RETRIEVAL_K
+from config.settings import (
+    GROQ_MODEL,
+    GROQ_TEMPERATURE,
+    RETRIEVAL_K,
+    RETRIEVAL_MODE,
+    HYBRID_CANDIDATES,
+    RRF_K,
+    ANSWER_CACHE_ENABLED,
+    CONTEXT_PACKING_ENABLED,
+    METRICS_ENABLED,
+    LLM_PROVIDER,
+    FAKE_LLM_FIRST_TOKEN_DELAY,
+    FAKE_LLM_TOKEN_DELAY
+)
 
 
 def get_llm():
     """Initialize LLM"""
+    if LLM_PROVIDER == "fake":
+        from src.fakes import FakeStreamingChatModel
+        return FakeStreamingChatModel(
+            first_token_delay=FAKE_LLM_FIRST_TOKEN_DELAY,
+            token_delay=FAKE_LLM_TOKEN_DELAY
+        )
+
+    from langchain_groq import ChatGroq
     llm = ChatGroq(
         model=GROQ_MODEL,
         temperature=GROQ_TEMPERATURE
@@ -32,21 +54,133 @@ def get_prompt():
     return prompt
 
 
-def create_rag_chain(vectorstore):
-    """Create complete RAG chain"""
-    # Create retriever
-    retriever = vectorstore.as_retriever(
+def get_document_chain(llm=None):
+    """Prompt + LLM step answering ``{"input", "context"}`` with the context documents stuffed in"""
+    return create_stuff_documents_chain(llm or get_llm(), get_prompt())
+
+
+def get_retriever(vectorstore):
+    """Similarity retriever, or BM25 + vector hybrid when a local index exists"""
+    if RETRIEVAL_MODE == "hybrid":
+        from src.bm25 import HybridRetriever, get_bm25_index
+        index = get_bm25_index()
+        if len(index):
+            return HybridRetriever(
+                vectorstore=vectorstore,
+                index=index,
+                k=RETRIEVAL_K,
+                candidates=HYBRID_CANDIDATES,
+                rrf_k=RRF_K
+            )
+        print("⚠️  BM25 index is empty, falling back to similarity search")
+
+    return vectorstore.as_retriever(
         search_type="similarity",
         search_kwargs={"k": RETRIEVAL_K}
     )
 
-    # Get LLM and prompt
-    llm = get_llm()
-    prompt = get_prompt()
+
+def get_retrieval_step(vectorstore, retriever, packer=None):
+    """Runnable mapping the chain input to context documents, with embed and search timed separately"""
+    from src.instrumentation import get_trace, stage
+    embeddings = getattr(vectorstore, "embeddings", None)
+
+    def retrieve(inputs: dict, config):
+        trace = get_trace(config)
+        question = inputs["input"]
+        vector = inputs.get("query_vector")
+        if vector is None and embeddings is not None:
+            with stage(trace, "embed"):
+                vector = embeddings.embed_query(question)
+
+        with stage(trace, "search"):
+            if vector is None:
+                docs = retriever.invoke(question)
+            else:
+                vector = [float(x) for x in vector]
+                if hasattr(retriever, "search"):
+                    docs = retriever.search(question, vector)
+                else:
+                    k = retriever.search_kwargs.get("k", RETRIEVAL_K)
+                    docs = vectorstore.similarity_search_by_vector(vector, k=k)
+
+        if trace is not None:
+            trace.retrieved_docs = len(docs)
+            trace.retrieved_chars = sum(len(doc.page_content) for doc in docs)
+        if packer is not None:
+            with stage(trace, "pack"):
+                docs = packer.pack(docs)
+        if trace is not None:
+            trace.context_chars = sum(len(doc.page_content) for doc in docs)
+            trace.retrieval_end = time.perf_counter()
+        return docs
+
+    return RunnableLambda(retrieve).with_config(run_name="retrieve_documents")
+
+
+def create_retrieval(vectorstore, verbose: bool = True):
+    """Retrieval step of the RAG chain: configured retriever plus context packing"""
+    # Create retriever
+    retriever = get_retriever(vectorstore)
+
+    # Merge overlapping chunks and fit the token budget before prompting
+    packer = None
+    if CONTEXT_PACKING_ENABLED:
+        from src.context_packer import ContextPacker
+        packer = ContextPacker(verbose=verbose)
+    return get_retrieval_step(vectorstore, retriever, packer)
+
+
+def create_rag_chain(vectorstore, llm=None, answer_cache: bool = ANSWER_CACHE_ENABLED):
+    """Create complete RAG chain"""
+    retrieval = create_retrieval(vectorstore)
 
     # Create chains
-    document_chain = create_stuff_documents_chain(llm, prompt)
-    rag_chain = create_retrieval_chain(retriever, document_chain)
+    document_chain = get_document_chain(llm)
+    rag_chain = create_retrieval_chain(retrieval, document_chain)
+
+    # Serve repeated/paraphrased questions from the semantic answer cache
+    embeddings = getattr(vectorstore, "embeddings", None)
+    if answer_cache and embeddings is not None:
+        from src.answer_cache import CachedRagChain, SemanticAnswerCache
+        rag_chain = CachedRagChain(rag_chain, SemanticAnswerCache(embeddings))
+
+    # Time every stage and log it (outermost, so cache hits are measured too)
+    if METRICS_ENABLED:
+        from src.instrumentation import InstrumentedRagChain
+        rag_chain = InstrumentedRagChain(rag_chain)
 
     print("🔗 RAG chain created successfully")
     return rag_chain
+
+
+def stream_rag_response(rag_chain, question: str):
+    """Stream a RAG answer as ("sources", docs) then ("token", text) events
+
+    Retrieval finishes before generation starts, so the sources are always
+    emitted first; answer tokens follow as the LLM produces them. An
+    instrumented chain ends with a ("metrics", dict) event.
+    """
+    for chunk in rag_chain.stream({"input": question}):
+        if "context" in chunk:
+            yield "sources", chunk["context"]
+        if chunk.get("answer"):
+            yield "token", chunk["answer"]
+        if "metrics" in chunk:
+            yield "metrics", chunk["metrics"]
+
+
+async def astream_rag_response(rag_chain, question: str):
+    """Async version of stream_rag_response"""
+    async for chunk in rag_chain.astream({"input": question}):
+        if "context" in chunk:
+            yield "sources", chunk["context"]
+        if chunk.get("answer"):
+            yield "token", chunk["answer"]
+        if "metrics" in chunk:
+            yield "metrics", chunk["metrics"]
+
+
+async def ainvoke_rag_chain(rag_chain, question: str):
+    """Answer a question without blocking the event loop"""
+    return await rag_chain.ainvoke({"input": question})
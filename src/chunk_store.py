@@ -0,0 +1,256 @@
+"""
+Columnar chunk store: memory-mapped UTF-8 text blob, offsets and interned metadata
+"""
+import copy
+import json
+import os
+from array import array
+import numpy as np
+from langchain_core.documents import Document
+
+
+TEXT_FILE = "text.utf8"
+OFFSETS_FILE = "offsets.i64"
+ROWS_FILE = "rows.jsonl"
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _intern_key(value):
+    """Hashable key for a metadata value (1, 1.0 and True stay distinct)"""
+    if isinstance(value, _SCALARS):
+        return type(value).__name__, value
+    return "json", json.dumps(value, sort_keys=True)
+
+
+class MetadataColumns:
+    """One int32 code column per metadata key, pointing into that key's distinct values
+
+    Repeated values such as ``source`` (one per file) or ``page`` are stored
+    once; each row costs four bytes per key. -1 marks a key the row lacks.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.values = {}   # key -> [distinct values]
+        self.codes = {}    # key -> array('i') of per-row codes
+        self._index = {}   # key -> {intern key: code}
+        self.rows = 0
+
+    def _add_keys(self, metadata: dict):
+        for key in metadata:
+            if key not in self.codes:
+                self.keys.append(key)
+                self.values[key] = []
+                self._index[key] = {}
+                self.codes[key] = array("i", [-1]) * self.rows
+
+    def _code(self, key, metadata: dict) -> int:
+        if key not in metadata:
+            return -1
+        value = metadata[key]
+        index = self._index[key]
+        intern = _intern_key(value)
+        code = index.get(intern)
+        if code is None:
+            code = index[intern] = len(self.values[key])
+            self.values[key].append(value)
+        return code
+
+    def append(self, metadata: dict):
+        self._add_keys(metadata)
+        for key in self.keys:
+            self.codes[key].append(self._code(key, metadata))
+        self.rows += 1
+
+    def set(self, row: int, metadata: dict):
+        self._add_keys(metadata)
+        for key in self.keys:
+            self.codes[key][row] = self._code(key, metadata)
+
+    def get(self, row: int) -> dict:
+        metadata = {}
+        for key in self.keys:
+            code = self.codes[key][row]
+            if code >= 0:
+                value = self.values[key][code]
+                metadata[key] = value if isinstance(value, _SCALARS) else copy.deepcopy(value)
+        return metadata
+
+    def nbytes(self) -> int:
+        return sum(codes.itemsize * len(codes) for codes in self.codes.values())
+
+
+class ChunkStore:
+    """Chunk ids, text and metadata kept out of per-chunk Python objects
+
+    All chunk text lives in one UTF-8 file opened with ``np.memmap``, with a
+    parallel file of int64 end offsets; metadata is interned into
+    ``MetadataColumns``. ``rows.jsonl`` is the append-only record of ids and
+    metadata used to rebuild the columns on open; in-place updates are
+    appended to it as ``{"row": ...}`` records, and the rare replaced text is
+    held in memory until the next rewrite. A ``Document`` is only built when
+    a row is asked for (i.e. for search results).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ids = []
+        self.columns = MetadataColumns()
+        self._text = None
+        self._offsets = None
+        self._overrides = {}  # row -> replaced text
+        self._load()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        if not os.path.exists(self._file(ROWS_FILE)):
+            return
+        committed = 0
+        with open(self._file(ROWS_FILE), "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    break  # Torn write at the end of an interrupted append
+                committed += len(line)
+                self._apply(record)
+        self._trim(committed)
+        self._map()
+
+    def _apply(self, record: dict):
+        if "row" in record:
+            if "metadata" in record:
+                self.columns.set(record["row"], record["metadata"])
+            if "text" in record:
+                self._overrides[record["row"]] = record["text"]
+        else:
+            self.ids.append(record["id"])
+            self.columns.append(record["metadata"])
+
+    def _trim(self, rows_size: int):
+        """Cut files an interrupted append left longer than the rows recorded in rows.jsonl"""
+        n = len(self.ids)
+        end = 0
+        if n:
+            end = int(np.fromfile(self._file(OFFSETS_FILE), dtype=np.int64, count=1, offset=(n - 1) * 8)[0])
+        for name, size in ((ROWS_FILE, rows_size), (OFFSETS_FILE, n * 8), (TEXT_FILE, end)):
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def truncate(self, count: int):
+        """Drop every row from ``count`` on (rows an interrupted write never committed)"""
+        kept = []
+        rows = 0
+        with open(self._file(ROWS_FILE), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if "row" in record:
+                    if record["row"] < count:
+                        kept.append(line)
+                elif rows < count:
+                    kept.append(line)
+                    rows += 1
+        tmp = self._file(ROWS_FILE) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(kept)
+        os.replace(tmp, self._file(ROWS_FILE))
+        self.ids = []
+        self.columns = MetadataColumns()
+        self._overrides = {}
+        self._load()
+
+    def _map(self):
+        """(Re)open the text blob and offsets as read-only memory maps"""
+        if not self.ids:
+            self._text, self._offsets = None, None
+            return
+        offsets = np.memmap(self._file(OFFSETS_FILE), dtype=np.int64, mode="r", shape=(len(self.ids),))
+        size = int(offsets[-1])
+        text = np.memmap(self._file(TEXT_FILE), dtype=np.uint8, mode="r", shape=(size,)) if size else None
+        # The files only grow between rewrites, so readers holding the old maps stay valid
+        self._text, self._offsets = text, offsets
+
+    def _write(self, mode: str, ids, texts, metadatas, base: int, suffix: str = ""):
+        encoded = [text.encode("utf-8") for text in texts]
+        ends = base + np.cumsum([len(blob) for blob in encoded], dtype=np.int64)
+        with open(self._file(TEXT_FILE) + suffix, mode + "b") as f:
+            f.write(b"".join(encoded))
+        with open(self._file(OFFSETS_FILE) + suffix, mode + "b") as f:
+            ends.tofile(f)
+        with open(self._file(ROWS_FILE) + suffix, mode, encoding="utf-8") as f:
+            for row_id, metadata in zip(ids, metadatas):
+                f.write(json.dumps({"id": row_id, "metadata": metadata}) + "\n")
+
+    def append(self, ids, texts, metadatas):
+        """Add rows at the end"""
+        base = int(self._offsets[-1]) if self._offsets is not None else 0
+        self._write("a", ids, texts, metadatas, base)
+        for row_id, metadata in zip(ids, metadatas):
+            self.ids.append(row_id)
+            self.columns.append(metadata)
+        self._map()
+
+    def update(self, rows, texts, metadatas):
+        """Replace the text and metadata of existing rows in place"""
+        records = []
+        for row, text, metadata in zip(rows, texts, metadatas):
+            record = {"row": int(row)}
+            if text != self.text(row):
+                record["text"] = text
+            if metadata != self.metadata(row):
+                record["metadata"] = metadata
+            if len(record) > 1:
+                records.append(record)
+        if not records:
+            return
+        with open(self._file(ROWS_FILE), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        for record in records:
+            self._apply(record)
+
+    def rewrite(self, ids, texts, metadatas):
+        """Replace every row (used after updates and deletes)"""
+        ids, texts, metadatas = list(ids), list(texts), list(metadatas)
+        self._text, self._offsets = None, None
+        self._write("w", ids, texts, metadatas, 0, suffix=".tmp")
+        for name in (TEXT_FILE, OFFSETS_FILE, ROWS_FILE):
+            os.replace(self._file(name) + ".tmp", self._file(name))
+        self.ids = ids
+        self.columns = MetadataColumns()
+        self._overrides = {}
+        for metadata in metadatas:
+            self.columns.append(metadata)
+        self._map()
+
+    # ----- reads -----
+
+    def text(self, row: int) -> str:
+        if row in self._overrides:
+            return self._overrides[row]
+        start = int(self._offsets[row - 1]) if row else 0
+        end = int(self._offsets[row])
+        return self._text[start:end].tobytes().decode("utf-8") if end > start else ""
+
+    def metadata(self, row: int) -> dict:
+        return self.columns.get(row)
+
+    def document(self, row: int) -> Document:
+        return Document(id=self.ids[row], page_content=self.text(row), metadata=self.metadata(row))
+
+    def texts(self):
+        for row in range(len(self.ids)):
+            yield self.text(row)
+
+    def metadatas(self):
+        for row in range(len(self.ids)):
+            yield self.metadata(row)
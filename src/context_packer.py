@@ -0,0 +1,175 @@
+"""
+Token-budgeted context packing between the retriever and the prompt
+"""
+import threading
+from langchain_core.documents import Document
+from config.settings import (
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_DEDUP_THRESHOLD,
+    CHUNK_OVERLAP
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+
+def _shingles(text: str, size: int = 5) -> set:
+    words = text.lower().split()
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _text_overlap(left: str, right: str, max_overlap: int) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``"""
+    for size in range(min(len(left), len(right), max_overlap), 19, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_pair(left: Document, right: Document):
+    """Merged text if ``right`` continues ``left`` (overlapping or adjacent), else None"""
+    lstart = left.metadata.get("start_index")
+    rstart = right.metadata.get("start_index")
+    if lstart is not None and rstart is not None:
+        lend = lstart + len(left.page_content)
+        if rstart < lstart or rstart > lend + 1:
+            return None
+        if rstart == lend + 1:
+            # The splitter dropped the one separator between the chunks; put
+            # a space back so the boundary words don't run together
+            return left.page_content + " " + right.page_content
+        return left.page_content + right.page_content[max(0, lend - rstart):]
+    overlap = _text_overlap(left.page_content, right.page_content, CHUNK_OVERLAP * 2)
+    if overlap:
+        return left.page_content + right.page_content[overlap:]
+    return None
+
+
+class PackingStats:
+    """Token accounting for one packed context"""
+
+    def __init__(self, chunks_in=0, blocks_out=0, tokens_in=0, tokens_out=0, dropped_duplicates=0):
+        self.chunks_in = chunks_in
+        self.blocks_out = blocks_out
+        self.tokens_in = tokens_in
+        self.tokens_out = tokens_out
+        self.dropped_duplicates = dropped_duplicates
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_in - self.tokens_out
+
+    def as_dict(self):
+        return {
+            "chunks_in": self.chunks_in,
+            "blocks_out": self.blocks_out,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_saved": self.tokens_saved,
+            "dropped_duplicates": self.dropped_duplicates,
+        }
+
+
+class ContextPacker:
+    """Merges overlapping chunks, drops near-duplicates and fits a token budget
+
+    Documents are expected in relevance order (best first). Chunks from the
+    same source and page that overlap or touch are stitched into one block,
+    near-identical chunks (word-shingle Jaccard >= ``dedup_threshold``) are
+    dropped, and blocks are then added best-first until ``token_budget`` is
+    reached.
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                 dedup_threshold: float = CONTEXT_DEDUP_THRESHOLD, verbose: bool = True):
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.verbose = verbose
+        self.last_stats = PackingStats()
+        self.total_tokens_saved = 0
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def _dedup(self, docs):
+        kept, signatures, dropped = [], [], 0
+        for doc in docs:
+            signature = _shingles(doc.page_content)
+            if any(_jaccard(signature, seen) >= self.dedup_threshold for seen in signatures):
+                dropped += 1
+                continue
+            kept.append(doc)
+            signatures.append(signature)
+        return kept, dropped
+
+    def _merge(self, docs):
+        """Return blocks as [rank, Document, member_count] in rank order"""
+        groups = {}
+        for rank, doc in enumerate(docs):
+            key = (doc.metadata.get("source"), doc.metadata.get("page"))
+            groups.setdefault(key, []).append((rank, doc))
+
+        blocks = []
+        for members in groups.values():
+            if all("start_index" in doc.metadata for _, doc in members):
+                members.sort(key=lambda item: item[1].metadata["start_index"])
+            merged = []
+            for rank, doc in members:
+                for block in merged:
+                    text = _merge_pair(block[1], doc) or _merge_pair(doc, block[1])
+                    if text is not None:
+                        block[0] = min(block[0], rank)
+                        block[1] = Document(
+                            id=block[1].id,
+                            page_content=text,
+                            metadata={**block[1].metadata, "merged_chunks": block[2] + 1}
+                        )
+                        if "start_index" in doc.metadata and "start_index" in block[1].metadata:
+                            block[1].metadata["start_index"] = min(
+                                block[1].metadata["start_index"], doc.metadata["start_index"]
+                            )
+                        block[2] += 1
+                        break
+                else:
+                    merged.append([rank, doc, 1])
+            blocks.extend(merged)
+        return sorted(blocks, key=lambda block: block[0])
+
+    def pack(self, docs):
+        """Pack retrieved documents into the context sent to the LLM"""
+        docs = list(docs)
+        tokens_in = sum(estimate_tokens(doc.page_content) for doc in docs)
+        unique, dropped = self._dedup(docs)
+
+        packed, used = [], 0
+        for _, doc, _ in self._merge(unique):
+            tokens = estimate_tokens(doc.page_content)
+            if used + tokens > self.token_budget:
+                if packed:
+                    continue
+                # Always keep (a truncated copy of) the best block
+                doc = Document(id=doc.id, page_content=doc.page_content[:self.token_budget * 4],
+                               metadata=dict(doc.metadata))
+                tokens = estimate_tokens(doc.page_content)
+            packed.append(doc)
+            used += tokens
+
+        stats = PackingStats(len(docs), len(packed), tokens_in, used, dropped)
+        with self._lock:
+            self.last_stats = stats
+            self.queries += 1
+            self.total_tokens_saved += stats.tokens_saved
+        if self.verbose:
+            print(f"📦 Packed {stats.chunks_in} chunks into {stats.blocks_out} blocks: "
+                  f"{stats.tokens_in} → {stats.tokens_out} tokens (saved {stats.tokens_saved})")
+        return packed
+
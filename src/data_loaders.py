@@ -1,14 +1,44 @@
 """
 Document loading and chunking functions
 """
+from pathlib import Path
 from langchain_community.document_loaders import (
     TextLoader,
-    WebBaseLoader,
-    DirectoryLoader,
-    PyPDFDirectoryLoader
+    DirectoryLoader
 )
 from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
-from config.settings import CHUNK_SIZE, CHUNK_OVERLAP
+from src.pdf_parsing import parse_pdfs
+from src.page_cache import PdfPageCache
+from src.manifest import with_chunk_ids
+from config.settings import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    PDF_WORKERS,
+    PDF_PAGES_PER_TASK,
+    PDF_EXTRACT_IMAGES,
+    PDF_PAGE_CACHE_ENABLED,
+    PDF_PAGE_CACHE_PATH,
+    WEB_CACHE_ENABLED,
+    WEB_CACHE_PATH
+)
+
+_pdf_page_cache = None
+
+
+def get_pdf_page_cache():
+    """Shared PDF page cache (None when disabled)"""
+    global _pdf_page_cache
+    if PDF_PAGE_CACHE_ENABLED and _pdf_page_cache is None:
+        _pdf_page_cache = PdfPageCache(PDF_PAGE_CACHE_PATH)
+    return _pdf_page_cache
+
+
+def clear_pdf_page_cache():
+    """Explicitly invalidate every cached PDF page"""
+    cache = get_pdf_page_cache()
+    removed = cache.invalidate() if cache is not None else 0
+    print(f"🧹 Cleared {removed} cached PDF pages")
+    return removed
 
 
 def load_text_files(directory_path: str):
@@ -25,34 +55,91 @@ def load_text_files(directory_path: str):
     return text_docs
 
 
+def _load_pdfs(paths: list):
+    """Parse PDFs in parallel, reporting failed files without aborting"""
+    cache = get_pdf_page_cache()
+    before = cache.stats() if cache is not None else None
+    pdf_docs, errors = parse_pdfs(
+        paths,
+        workers=PDF_WORKERS,
+        pages_per_task=PDF_PAGES_PER_TASK,
+        extract_images=PDF_EXTRACT_IMAGES,
+        cache=cache
+    )
+    for path, error in errors.items():
+        print(f"⚠️  Failed to load {path}: {error}")
+    if cache is not None:
+        after = cache.stats()
+        cached = after["cached_pages"] - before["cached_pages"]
+        parsed = after["parsed_pages"] - before["parsed_pages"]
+        print(f"🗃️  PDF page cache: {cached} pages from cache, {parsed} parsed")
+    return pdf_docs
+
+
 def load_pdf_files(directory_path: str):
     """Load all PDF files from a directory"""
-    pdf_loader = PyPDFDirectoryLoader(
-        path=directory_path,
-        glob="**/[!.]*.pdf",
-        silent_errors=False,
-        recursive=False,
-        extract_images=True
-    )
-    pdf_docs = pdf_loader.load()
+    paths = sorted(str(p) for p in Path(directory_path).glob("**/[!.]*.pdf"))
+    pdf_docs = _load_pdfs(paths)
     print(f"📑 Loaded {len(pdf_docs)} PDF documents")
     return pdf_docs
 
 
-def load_web_data(urls: list):
-    """Load data from web URLs"""
-    web_loader = WebBaseLoader(urls)
-    web_docs = web_loader.load()
-    print(f"🌐 Loaded {len(web_docs)} web pages")
+def load_file(file_path: str):
+    """Load a single PDF or text file"""
+    if file_path.lower().endswith(".pdf"):
+        return _load_pdfs([file_path])
+    return TextLoader(file_path, encoding="utf-8").load()
+
+
+def load_web_data(urls: list, skip_unchanged: bool = False):
+    """Load data from web URLs (``skip_unchanged`` drops pages unchanged since the last fetch)"""
+    from src.web_loader import WebPageCache, fetch_pages
+
+    cache = WebPageCache(WEB_CACHE_PATH) if WEB_CACHE_ENABLED else None
+    results = fetch_pages(urls, cache)
+    counts = {}
+    web_docs = []
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+        if result.error:
+            print(f"⚠️  Failed to load {result.url}: {result.error}")
+        if result.document is None or (skip_unchanged and result.status == "unchanged"):
+            continue
+        web_docs.append(result.document)
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"🌐 Loaded {len(web_docs)} web pages ({summary})")
     return web_docs
 
 
-def chunk_documents(documents: list):
-    """Split documents into chunks"""
-    text_splitter = RecursiveCharacterTextSplitter(
+def iter_documents(pdf_path: str = None, text_path: str = None, urls: list = None, skip_unchanged: bool = False):
+    """Lazily yield documents one file/page at a time (for streaming ingestion)"""
+    if pdf_path:
+        for path in sorted(str(p) for p in Path(pdf_path).glob("**/[!.]*.pdf")):
+            yield from _load_pdfs([path])
+    if text_path:
+        for path in sorted(str(p) for p in Path(text_path).glob("**/*.txt")):
+            yield from TextLoader(path, encoding="utf-8").lazy_load()
+    if urls:
+        yield from load_web_data(urls, skip_unchanged=skip_unchanged)
+
+
+def get_text_splitter():
+    """Text splitter configured from settings"""
+    return RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP
+        chunk_overlap=CHUNK_OVERLAP,
+        add_start_index=True
     )
+
+
+def chunk_documents(documents: list):
+    """Split documents into chunks with deterministic ids"""
+    text_splitter = get_text_splitter()
     chunks = text_splitter.split_documents(documents)
+
+    # Deterministic ids, shared by the vector store and the BM25 index
+    for chunk, chunk_id in with_chunk_ids(chunks):
+        chunk.id = chunk_id
+
     print(f"✂️  Created {len(chunks)} chunks")
     return chunks
@@ -0,0 +1,202 @@
+"""
+Near-duplicate chunk detection with MinHash signatures and LSH banding
+"""
+import os
+import threading
+import zlib
+import numpy as np
+from config.settings import DEDUP_INDEX_PATH, DEDUP_THRESHOLD, DEDUP_NUM_PERM
+
+# Smallest prime above 2**32: (a * x + b) % p fits in uint64 for 32-bit a, b and x
+_PRIME = np.uint64(4294967311)
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """32-bit hashes of the lowercase word ``size``-shingles of a text"""
+    words = text.lower().split()
+    if len(words) <= size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def lsh_params(threshold: float, num_perm: int) -> tuple:
+    """(bands, rows) minimizing the false positive + false negative area around ``threshold``
+
+    A pair with Jaccard ``s`` shares at least one band with probability
+    ``1 - (1 - s**rows)**bands``; this picks the S-curve whose step sits
+    closest to the threshold.
+    """
+    s = np.linspace(0.0, 1.0, 1001)
+    below = s < threshold
+    best, best_error = (num_perm, 1), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        hit = 1.0 - (1.0 - s ** rows) ** bands
+        # Riemann sums over the grid (step 0.001)
+        error = (hit[below].sum() + (1.0 - hit[~below]).sum()) / (len(s) - 1)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex:
+    """MinHash signatures of indexed chunks, bucketed by LSH bands
+
+    Each chunk gets a ``num_perm``-value MinHash signature over its word
+    5-shingles; the fraction of equal values estimates the Jaccard
+    similarity of two chunks. Signatures are split into bands and a chunk is
+    only compared with chunks sharing at least one identical band, so a
+    lookup costs a few dictionary hits instead of a scan. Signatures are
+    persisted to ``path`` so later runs dedupe against what is already in
+    the store.
+    """
+
+    def __init__(self, path: str = DEDUP_INDEX_PATH, threshold: float = DEDUP_THRESHOLD,
+                 num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.seed = seed
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def __len__(self):
+        return len(self._slot)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._slot
+
+    def _reset(self):
+        self.ids = []          # slot -> id (None once deleted)
+        self.signatures = []   # slot -> uint32 signature
+        self.buckets = [{} for _ in range(self.bands)]  # band -> {band bytes: [slots]}
+        self._slot = {}        # id -> slot
+        self._dirty = False
+
+    # ----- persistence -----
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        data = np.load(self.path, allow_pickle=False)
+        if int(data["num_perm"]) != self.num_perm or int(data["seed"]) != self.seed:
+            print(f"⚠️  Ignoring {self.path}: built with different MinHash parameters")
+            return
+        for doc_id, signature in zip(data["ids"].tolist(), data["signatures"]):
+            self._add(doc_id, signature)
+        self._dirty = False
+
+    def save(self):
+        """Write the live signatures (dropping deleted ones)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            live = list(self._slot.values())
+            signatures = (np.stack([self.signatures[slot] for slot in live]) if live
+                          else np.empty((0, self.num_perm), dtype=np.uint32))
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp.npz"
+            np.savez(
+                tmp,
+                ids=np.array([self.ids[slot] for slot in live], dtype=str),
+                signatures=signatures,
+                num_perm=np.array(self.num_perm),
+                seed=np.array(self.seed),
+            )
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def reload(self):
+        """Drop unsaved changes (e.g. after a failed ingestion run)"""
+        with self._lock:
+            self._reset()
+            self._load()
+
+    # ----- signatures -----
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingle_hashes(text)
+        values = (hashes[:, None] * self._a[None, :] + self._b[None, :]) % _PRIME
+        return values.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _add(self, doc_id, signature):
+        if doc_id in self._slot:
+            self._remove(doc_id)
+        slot = len(self.ids)
+        self.ids.append(doc_id)
+        self.signatures.append(np.asarray(signature, dtype=np.uint32))
+        self._slot[doc_id] = slot
+        for band, key in self._band_keys(signature):
+            self.buckets[band].setdefault(key, []).append(slot)
+        self._dirty = True
+
+    def _remove(self, doc_id):
+        slot = self._slot.pop(doc_id, None)
+        if slot is not None:
+            self.ids[slot] = None
+            self._dirty = True
+
+    # ----- lookups -----
+
+    def query(self, signature: np.ndarray, exclude=None):
+        """(id, estimated Jaccard) of the most similar indexed chunk at or above the threshold, else None"""
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(key, ()))
+        candidates = [slot for slot in candidates if self.ids[slot] is not None and self.ids[slot] != exclude]
+        if not candidates:
+            return None
+        similarity = (np.stack([self.signatures[slot] for slot in candidates]) == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        if similarity[best] < self.threshold:
+            return None
+        return self.ids[candidates[best]], float(similarity[best])
+
+    def filter(self, documents):
+        """Split documents into (kept, duplicates) and index the kept ones
+
+        A document is a duplicate when an indexed chunk, or an earlier
+        document of the same call, reaches the threshold. Documents whose id
+        is already indexed are re-upserts of the same chunk and are kept.
+        ``duplicates`` holds ``(document, original_id, similarity)`` tuples.
+        """
+        kept, duplicates = [], []
+        with self._lock:
+            for doc in documents:
+                signature = self.signature(doc.page_content)
+                match = self.query(signature, exclude=doc.id)
+                if match is not None and doc.id not in self._slot:
+                    duplicates.append((doc, match[0], match[1]))
+                    continue
+                kept.append(doc)
+                if doc.id is not None and doc.id not in self._slot:
+                    self._add(doc.id, signature)
+        return kept, duplicates
+
+    def delete(self, ids):
+        """Forget chunks removed from the store"""
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+
+_shared_index = None
+
+
+def get_dedup_index():
+    """Process-wide near-duplicate index loaded from DEDUP_INDEX_PATH"""
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = NearDuplicateIndex()
+    return _shared_index
@@ -0,0 +1,164 @@
+"""
+Persistent content-hash cache for embedding models
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so cosmetic edits don't miss the cache"""
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    """Stable hash of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCacheStats:
+    """Hit/miss counters for a cache"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+    def __repr__(self):
+        return f"EmbeddingCacheStats({self.as_dict()})"
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that caches vectors by (model name, text hash)
+
+    Lookups go through a bounded in-memory LRU first and then a SQLite file
+    on disk; only texts missing from both are sent to the wrapped model, in
+    a single batch. Query and document vectors are cached separately since
+    some models embed them differently.
+    """
+
+    def __init__(self, embeddings, model_name: str, cache_path: str, memory_size: int = 10000):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache_path = cache_path
+        self.memory_size = memory_size
+        self.stats = EmbeddingCacheStats()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if os.path.dirname(cache_path):
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, kind TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, kind, hash))"
+        )
+        self._db.commit()
+
+    def __getattr__(self, name):
+        # Expose attributes of the wrapped model (e.g. model, base_url)
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    # ----- cache layers -----
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, kind: str, hashes: list) -> dict:
+        """Return {hash: vector} for every hash found in memory or on disk"""
+        found = {}
+        missing = []
+        with self._lock:
+            for h in hashes:
+                key = (kind, h)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[h] = self._memory[key]
+                    self.stats.memory_hits += 1
+                elif h not in found:
+                    missing.append(h)
+
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND kind = ? "
+                    f"AND hash IN ({','.join('?' * len(batch))})",
+                    [self.model_name, kind, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[h] = vector
+                    self._remember((kind, h), vector)
+                    self.stats.disk_hits += 1
+        return found
+
+    def _store(self, kind: str, items: dict):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, kind, hash, vector) VALUES (?, ?, ?, ?)",
+                [(self.model_name, kind, h, array("f", v).tobytes()) for h, v in items.items()],
+            )
+            self._db.commit()
+            for h, v in items.items():
+                self._remember((kind, h), v)
+
+    def _embed(self, kind: str, texts: list, embed_fn) -> list:
+        hashes = [text_hash(t) for t in texts]
+        found = self._lookup(kind, hashes)
+
+        # Embed each distinct missing text once
+        todo = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in todo:
+                todo[h] = t
+        if todo:
+            self.stats.misses += len(todo)
+            vectors = embed_fn(list(todo.values()))
+            computed = {h: list(v) for h, v in zip(todo, vectors)}
+            self._store(kind, computed)
+            found.update(computed)
+
+        return [found[h] for h in hashes]
+
+    # ----- Embeddings interface -----
+
+    def embed_documents(self, texts):
+        """Embed documents, computing only the ones not cached yet"""
+        return self._embed("document", list(texts), self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        """Embed a query, served from the cache when seen before"""
+        return self._embed("query", [text], lambda t: [self.embeddings.embed_query(t[0])])[0]
+
+    def clear(self):
+        """Drop every cached vector for this model"""
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM embeddings WHERE model = ?", (self.model_name,))
+            self._db.commit()
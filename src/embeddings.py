@@ -1,30 +1,63 @@
 """
 Embedding model initialization
+
+Provider packages are imported inside the factory that uses them, so
+selecting Ollama never loads sentence-transformers/torch and vice versa.
 """
-from langchain_ollama import OllamaEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
+from src.embedding_cache import CachedEmbeddings
 from config.settings import (
     OLLAMA_MODEL,
     OLLAMA_BASE_URL,
     OLLAMA_NUM_THREADS,
+    OLLAMA_POOLED_CLIENT,
     HUGGINGFACE_MODEL,
-    MODELS_CACHE_PATH
+    MODELS_CACHE_PATH,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MEMORY_SIZE,
+    QUERY_BATCHING_ENABLED
 )
 
 
+def with_batching(embeddings):
+    """Coalesce concurrent query embeddings into batched model calls (if enabled)"""
+    if not QUERY_BATCHING_ENABLED:
+        return embeddings
+    from src.micro_batch import MicroBatchingEmbeddings
+    return MicroBatchingEmbeddings(embeddings)
+
+
+def with_cache(embeddings, model_name: str):
+    """Wrap embeddings in the persistent content-hash cache (if enabled)"""
+    if not EMBEDDING_CACHE_ENABLED:
+        return embeddings
+    return CachedEmbeddings(
+        embeddings,
+        model_name=model_name,
+        cache_path=EMBEDDING_CACHE_PATH,
+        memory_size=EMBEDDING_CACHE_MEMORY_SIZE
+    )
+
+
 def get_ollama_embeddings():
     """Initialize Ollama embeddings"""
-    embeddings = OllamaEmbeddings(
-        model=OLLAMA_MODEL,
-        base_url=OLLAMA_BASE_URL,
-        num_thread=OLLAMA_NUM_THREADS
-    )
+    if OLLAMA_POOLED_CLIENT:
+        from src.ollama_client import PooledOllamaEmbeddings
+        embeddings = PooledOllamaEmbeddings()
+    else:
+        from langchain_ollama import OllamaEmbeddings
+        embeddings = OllamaEmbeddings(
+            model=OLLAMA_MODEL,
+            base_url=OLLAMA_BASE_URL,
+            num_thread=OLLAMA_NUM_THREADS
+        )
     print("✅ Ollama embeddings initialized")
-    return embeddings
+    return with_cache(with_batching(embeddings), f"ollama/{OLLAMA_MODEL}")
 
 
 def get_huggingface_embeddings():
     """Initialize HuggingFace embeddings"""
+    from langchain_huggingface import HuggingFaceEmbeddings
     embeddings = HuggingFaceEmbeddings(
         model_name=HUGGINGFACE_MODEL,
         model_kwargs={"device": "cpu"},
@@ -36,4 +69,13 @@ def get_huggingface_embeddings():
         show_progress=True
     )
     print("✅ HuggingFace embeddings initialized")
-    return embeddings
+    return with_cache(with_batching(embeddings), f"huggingface/{HUGGINGFACE_MODEL}")
+
+
+def get_bulk_huggingface_embeddings():
+    """HuggingFace embeddings for bulk ingestion (length buckets, worker processes)"""
+    from src.bulk_embedding import BulkEmbeddings
+    embeddings = BulkEmbeddings(model_name=HUGGINGFACE_MODEL, cache_folder=MODELS_CACHE_PATH)
+    print(f"✅ Bulk HuggingFace embeddings initialized ({embeddings.workers} worker processes)")
+    # Same model and normalization as get_huggingface_embeddings, so the cache is shared
+    return with_cache(embeddings, f"huggingface/{HUGGINGFACE_MODEL}")
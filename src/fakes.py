@@ -0,0 +1,222 @@
+"""
+Deterministic offline stand-ins for the LLM, embedding model, vector store and Ollama server
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Chat model that streams a canned answer word by word
+
+    The answer is ``response`` if given, otherwise the first ``answer_words``
+    words of the prompt's ``<context>`` block, so answers still depend on
+    what was retrieved. Delays simulate time-to-first-token and per-token
+    generation latency.
+    """
+
+    response: str = ""
+    answer_words: int = 40
+    first_token_delay: float = 0.0
+    token_delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _answer(self, messages) -> str:
+        if self.response:
+            return self.response
+        prompt = messages[-1].content if messages else ""
+        match = re.search(r"<context>(.*?)</context>", prompt, re.S)
+        words = (match.group(1) if match else prompt).split()
+        return " ".join(words[:self.answer_words]) or "I don't know."
+
+    def _tokens(self, messages):
+        words = self._answer(messages).split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_delay + self.token_delay * len(self._tokens(messages)))
+        message = AIMessage(content=self._answer(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_delay)
+        for token in self._tokens(messages):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_delay)
+        for token in self._tokens(messages):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_delay + self.token_delay * len(self._tokens(messages)))
+        message = AIMessage(content=self._answer(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class HashingEmbeddings(Embeddings):
+    """Embedding model that hashes word unigrams and bigrams into a fixed vector
+
+    Texts sharing words get similar vectors, so retrieval over the sample
+    data still returns sensible neighbours. ``delay`` adds a fixed cost per
+    text to mimic a real model's throughput.
+    """
+
+    def __init__(self, dim: int = 384, delay: float = 0.0):
+        self.dim = dim
+        self.delay = delay
+
+    def _embed(self, text: str) -> list:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = re.findall(r"\w+", text.lower())
+        for feature in words + [a + " " + b for a, b in zip(words, words[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        if self.delay:
+            time.sleep(self.delay * len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class OllamaStubServer:
+    """Local HTTP server mimicking Ollama's ``POST /api/embed``
+
+    Vectors come from ``HashingEmbeddings``. ``latency`` is added per request
+    (plus ``per_input_latency`` per input), and every ``fail_every``-th
+    request answers 503 to exercise retries. ``connections`` counts distinct
+    client connections, so keep-alive reuse can be checked. Use as a
+    context manager; ``url`` is the base URL to point a client at.
+    """
+
+    def __init__(self, latency: float = 0.0, per_input_latency: float = 0.0, fail_every: int = 0,
+                 dim: int = 384):
+        self.latency = latency
+        self.per_input_latency = per_input_latency
+        self.fail_every = fail_every
+        self.embeddings = HashingEmbeddings(dim)
+        self.requests = 0
+        self.inputs = 0
+        self.failures = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with stub._lock:
+                    stub.requests += 1
+                    stub.connections.add(self.client_address)
+                    fail = stub.fail_every and stub.requests % stub.fail_every == 0
+                    if fail:
+                        stub.failures += 1
+                if self.path != "/api/embed":
+                    return self._reply(404, {"error": "not found"})
+                if fail:
+                    return self._reply(503, {"error": "server busy"})
+                inputs = payload.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                time.sleep(stub.latency + stub.per_input_latency * len(inputs))
+                with stub._lock:
+                    stub.inputs += len(inputs)
+                self._reply(200, {"model": payload.get("model"),
+                                  "embeddings": stub.embeddings.embed_documents(inputs)})
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class SlowVectorStore:
+    """Vector store wrapper adding ``latency`` seconds to every search
+
+    Stands in for a remote database (e.g. AstraDB round trips) in front of a
+    local store; everything else is passed through to ``store``.
+    """
+
+    def __init__(self, store, latency: float = 0.0):
+        self.store = store
+        self.latency = latency
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def similarity_search(self, query, k: int = 4, **kwargs):
+        self._wait()
+        return self.store.similarity_search(query, k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs):
+        self._wait()
+        return self.store.similarity_search_by_vector(embedding, k=k, **kwargs)
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4, **kwargs):
+        self._wait()
+        return self.store.similarity_search_with_score_by_vector(embedding, k=k, **kwargs)
@@ -0,0 +1,249 @@
+"""
+Streaming ingestion pipeline (load → chunk → embed → upsert)
+"""
+import queue
+import threading
+import time
+from src.data_loaders import get_text_splitter
+from src.manifest import default_chunk_key, with_chunk_ids
+from src.upsert import UpsertCheckpoint, batch_key, upsert_batches
+from config.settings import (
+    INGEST_BATCH_SIZE,
+    INGEST_QUEUE_SIZE,
+    BM25_INDEX_ENABLED,
+    DEDUP_ENABLED,
+    UPSERT_CONCURRENCY
+)
+
+
+_DONE = object()
+
+
+def iter_chunks(documents, splitter=None):
+    """Split documents into chunks one document at a time"""
+    splitter = splitter or get_text_splitter()
+    for doc in documents:
+        yield from splitter.split_documents([doc])
+
+
+def batched(items, size: int):
+    """Group an iterable into lists of at most ``size`` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class PipelineStats:
+    """Counters collected while a pipeline runs"""
+
+    def __init__(self):
+        self.documents = 0
+        self.chunks = 0
+        self.duplicates = 0
+        self.skipped = 0  # Chunks of batches an interrupted earlier run already wrote
+        self.batches = 0
+        self.embed_seconds = 0.0
+        self.first_batch_seconds = None
+        self.total_seconds = 0.0
+        self.ids = []
+        self.duplicate_of = []  # Ids of the indexed chunks the dropped duplicates matched
+
+    @property
+    def embed_seconds_saved(self):
+        """Embedding time the dropped duplicates would have cost, None when nothing was embedded to measure it"""
+        embedded = self.chunks - self.skipped
+        if not embedded:
+            return None if self.duplicates else 0.0
+        return self.duplicates * self.embed_seconds / embedded
+
+    def as_dict(self):
+        saved = self.embed_seconds_saved
+        return {
+            "documents": self.documents,
+            "chunks": self.chunks,
+            "duplicates": self.duplicates,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "embed_seconds_saved": None if saved is None else round(saved, 3),
+            "first_batch_seconds": self.first_batch_seconds,
+            "total_seconds": round(self.total_seconds, 3),
+        }
+
+
+def _put(outbox, item, stop):
+    """Blocking put that gives up once the pipeline is stopping"""
+    while not stop.is_set():
+        try:
+            outbox.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(inbox, stop):
+    """Yield items from a queue until the end marker (or a stop)"""
+    while not stop.is_set():
+        try:
+            item = inbox.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if item is _DONE:
+            return
+        yield item
+
+
+def _stage(items, fn, outbox, stop, failures):
+    """Thread body: apply fn to each item and pass results downstream"""
+    try:
+        for item in items:
+            if not _put(outbox, fn(item), stop):
+                return
+    except BaseException as e:
+        failures.append(e)
+        stop.set()
+    finally:
+        _put(outbox, _DONE, stop)
+
+
+def run_pipeline(vectorstore, documents, embeddings=None, batch_size: int = INGEST_BATCH_SIZE,
+                 queue_size: int = INGEST_QUEUE_SIZE, key_fn=default_chunk_key, collect_ids: bool = False,
+                 concurrency: int = UPSERT_CONCURRENCY, checkpoint=None):
+    """Stream documents into the vector store in bounded batches
+
+    Loading/chunking, embedding and upserting run as separate stages linked
+    by queues that hold at most ``queue_size`` batches, so a slow stage
+    blocks the ones before it and memory stays proportional to
+    ``batch_size * queue_size`` rather than to the corpus. Each batch is
+    searchable as soon as its upsert returns.
+
+    Embedding gets its own stage only when the store can take precomputed
+    vectors (``add_vectors``); otherwise the store embeds inside the upsert.
+    Upserts go through ``upsert_batches``: up to ``concurrency`` batches in
+    flight, retried, and recorded in the upsert checkpoint so a re-run after
+    a failure neither re-embeds nor re-sends the batches already written.
+
+    With ``DEDUP_ENABLED`` near-duplicate chunks (within the run or of
+    chunks indexed earlier) are dropped before embedding.
+    """
+    stats = PipelineStats()
+    start = time.perf_counter()
+    stop = threading.Event()
+    failures = []
+    checkpoint = checkpoint if checkpoint is not None else UpsertCheckpoint()
+
+    def counted(docs):
+        for doc in docs:
+            stats.documents += 1
+            yield doc
+
+    dedup = None
+    if DEDUP_ENABLED:
+        from src.dedup import get_dedup_index
+        dedup = get_dedup_index()
+    claimed, written = set(), set()  # Ids this run added to the dedup index / got into the store
+
+    def prepare(batch):
+        docs = []
+        for chunk, chunk_id in batch:
+            chunk.id = chunk_id
+            docs.append(chunk)
+        if dedup is not None:
+            known = {doc.id for doc in docs if doc.id in dedup}
+            docs, duplicates = dedup.filter(docs)
+            claimed.update(doc.id for doc in docs if doc.id not in known)
+            stats.duplicates += len(duplicates)
+            if collect_ids:
+                stats.duplicate_of.extend(original_id for _, original_id, _ in duplicates)
+        return docs, [doc.id for doc in docs], None
+
+    def embed(item):
+        docs, ids, _ = item
+        if not docs or batch_key(ids) in checkpoint:
+            return docs, ids, None  # Nothing to write, or already written by an interrupted run
+        started = time.perf_counter()
+        vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+        stats.embed_seconds += time.perf_counter() - started
+        return docs, ids, vectors
+
+    batches = batched(with_chunk_ids(iter_chunks(counted(documents)), key_fn), batch_size)
+    chunked = queue.Queue(maxsize=queue_size)
+    threads = [threading.Thread(target=_stage, args=(batches, prepare, chunked, stop, failures), daemon=True)]
+    ready = chunked
+
+    embed_stage = embeddings is not None and hasattr(vectorstore, "add_vectors")
+    if embed_stage:
+        embedded = queue.Queue(maxsize=queue_size)
+        threads.append(threading.Thread(
+            target=_stage, args=(_drain(chunked, stop), embed, embedded, stop, failures), daemon=True
+        ))
+        ready = embedded
+
+    index = None
+    if BM25_INDEX_ENABLED:
+        from src.bm25 import get_bm25_index
+        index = get_bm25_index()
+
+    def on_batch(docs, ids, seconds):
+        if seconds is None:
+            stats.skipped += len(docs)
+        elif not embed_stage:
+            stats.embed_seconds += seconds  # The store embeds inside the upsert
+        if index is not None:
+            index.add(docs)  # Re-adding a resumed batch just replaces its entries
+        written.update(ids)
+        stats.chunks += len(docs)
+        stats.batches += 1
+        if collect_ids:
+            stats.ids.extend(ids)
+        if stats.first_batch_seconds is None:
+            stats.first_batch_seconds = round(time.perf_counter() - start, 3)
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        # Batches where every chunk was a duplicate have nothing to write
+        pending = ((docs, ids, vectors) for docs, ids, vectors in _drain(ready, stop) if docs)
+        result = upsert_batches(vectorstore, pending, concurrency=concurrency, checkpoint=checkpoint,
+                                on_batch=on_batch)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+        if index is not None and stats.batches:
+            index.save()
+        if dedup is not None:
+            # Keep the claims of chunks that reached the store, forget the rest
+            dedup.delete(claimed - written)
+            dedup.save()
+
+    if failures:
+        raise failures[0]
+    if not result.ok:
+        raise RuntimeError(f"{len(result.failed)} batches failed to upsert ({result.failed[0][1]}); "
+                           f"re-run to resume")
+    checkpoint.clear()
+
+    stats.total_seconds = time.perf_counter() - start
+    if stats.batches:
+        print(
+            f"🚰 Streamed {stats.chunks} chunks from {stats.documents} documents in {stats.batches} batches "
+            f"(first batch searchable after {stats.first_batch_seconds}s, total {stats.total_seconds:.1f}s)"
+        )
+    else:
+        print(f"🚰 Nothing new to upsert from {stats.documents} documents ({stats.total_seconds:.1f}s)")
+    if stats.skipped:
+        print(f"⏭️  Skipped {stats.skipped} chunks already written by an interrupted run")
+    if stats.duplicates:
+        saved = stats.embed_seconds_saved
+        saved = "n/a" if saved is None else f"~{saved:.2f}s"
+        print(f"🧬 Removed {stats.duplicates} near-duplicate chunks ({saved} of embedding saved)")
+    return stats
@@ -0,0 +1,202 @@
+"""
+Per-stage latency and token instrumentation for the RAG chain
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+from src.context_packer import estimate_tokens
+from config.settings import METRICS_LOG_PATH
+
+
+class RequestTrace:
+    """Timings and counters collected while answering one question"""
+
+    def __init__(self, question: str = ""):
+        self.question = question
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_estimated = False
+        self.retrieved_docs = 0
+        self.retrieved_chars = 0
+        self.context_chars = 0
+        self.cache_hit = False
+        self.retrieval_end = None
+        self.first_token = None
+        self.total_seconds = None
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def finish(self):
+        self.total_seconds = time.perf_counter() - self.start
+
+    def as_dict(self) -> dict:
+        return {
+            "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+            "total_ms": round((self.total_seconds or 0.0) * 1000, 2),
+            "time_to_first_token_ms": (
+                round((self.first_token - self.start) * 1000, 2) if self.first_token else None
+            ),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "retrieved_docs": self.retrieved_docs,
+            "retrieved_chars": self.retrieved_chars,
+            "context_chars": self.context_chars,
+            "cache_hit": self.cache_hit,
+        }
+
+
+def get_trace(config) -> RequestTrace:
+    """Trace attached to a runnable config (None when not instrumented)"""
+    return ((config or {}).get("configurable") or {}).get("rag_trace")
+
+
+@contextmanager
+def stage(trace, name: str):
+    """Time a block under ``name`` (no-op without a trace)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.add(name, time.perf_counter() - start)
+
+
+class StageCallbackHandler(BaseCallbackHandler):
+    """Times prompt assembly and generation and counts tokens from LLM callbacks
+
+    Prompt assembly is the gap between the end of retrieval and the LLM
+    call; generation runs until the LLM finishes. Token counts come from
+    the provider's usage data when available and are estimated otherwise.
+    """
+
+    run_inline = True
+
+    def __init__(self, trace: RequestTrace):
+        self.trace = trace
+        self._llm_start = None
+        self._prompt_text = ""
+        self._completion = []
+
+    def _start(self, prompt_text: str):
+        now = time.perf_counter()
+        self._llm_start = now
+        self._prompt_text = prompt_text
+        self.trace.add("prompt", now - (self.trace.retrieval_end or now))
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._start("\n".join(str(m.content) for batch in messages for m in batch))
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._start("\n".join(prompts))
+
+    def on_llm_new_token(self, token, **kwargs):
+        if self.trace.first_token is None:
+            self.trace.first_token = time.perf_counter()
+        self._completion.append(token)
+
+    def on_llm_end(self, response, **kwargs):
+        if self._llm_start is not None:
+            self.trace.add("generation", time.perf_counter() - self._llm_start)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message_usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if message_usage:
+            prompt_tokens = prompt_tokens or message_usage.get("input_tokens")
+            completion_tokens = completion_tokens or message_usage.get("output_tokens")
+        if not prompt_tokens or not completion_tokens:
+            self.trace.tokens_estimated = True
+            text = generation.text if generation is not None else "".join(self._completion)
+            prompt_tokens = prompt_tokens or estimate_tokens(self._prompt_text)
+            completion_tokens = completion_tokens or estimate_tokens(text)
+        self.trace.prompt_tokens += prompt_tokens
+        self.trace.completion_tokens += completion_tokens
+
+
+_log_lock = threading.Lock()
+
+
+def log_metrics(record: dict, path: str = METRICS_LOG_PATH):
+    """Append a metrics record to the JSONL log"""
+    if not path:
+        return
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False)
+    with _log_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+class InstrumentedRagChain:
+    """Wraps a RAG chain to time each stage of every request
+
+    Responses gain a ``metrics`` entry; ``stream``/``astream`` emit it as a
+    final ``{"metrics": ...}`` chunk. Every record is also appended to the
+    metrics log.
+    """
+
+    def __init__(self, chain, log_path: str = METRICS_LOG_PATH):
+        self.chain = chain
+        self.log_path = log_path
+        self.last_metrics = None
+
+    def __getattr__(self, name):
+        # Expose the wrapped chain's attributes (e.g. the answer cache)
+        return getattr(self.chain, name)
+
+    def _begin(self, inputs: dict, config):
+        trace = RequestTrace(inputs.get("input", ""))
+        config = dict(config or {})
+        config["configurable"] = {**config.get("configurable", {}), "rag_trace": trace}
+        callbacks = config.get("callbacks")
+        handler = StageCallbackHandler(trace)
+        if callbacks is None:
+            config["callbacks"] = [handler]
+        elif isinstance(callbacks, list):
+            config["callbacks"] = callbacks + [handler]
+        else:
+            callbacks = callbacks.copy()
+            callbacks.add_handler(handler, inherit=True)
+            config["callbacks"] = callbacks
+        return trace, config
+
+    def _finish(self, trace: RequestTrace) -> dict:
+        trace.finish()
+        metrics = trace.as_dict()
+        self.last_metrics = metrics
+        log_metrics({
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "question": trace.question[:200],
+            **metrics,
+        }, self.log_path)
+        return metrics
+
+    def invoke(self, inputs: dict, config=None, **kwargs):
+        trace, config = self._begin(inputs, config)
+        response = self.chain.invoke(inputs, config, **kwargs)
+        return {**response, "metrics": self._finish(trace)}
+
+    def stream(self, inputs: dict, config=None, **kwargs):
+        trace, config = self._begin(inputs, config)
+        for chunk in self.chain.stream(inputs, config, **kwargs):
+            yield chunk
+        yield {"metrics": self._finish(trace)}
+
+    async def ainvoke(self, inputs: dict, config=None, **kwargs):
+        trace, config = self._begin(inputs, config)
+        response = await self.chain.ainvoke(inputs, config, **kwargs)
+        return {**response, "metrics": self._finish(trace)}
+
+    async def astream(self, inputs: dict, config=None, **kwargs):
+        trace, config = self._begin(inputs, config)
+        async for chunk in self.chain.astream(inputs, config, **kwargs):
+            yield chunk
+        yield {"metrics": self._finish(trace)}
@@ -0,0 +1,235 @@
+"""
+Concurrent load generation against the RAG serving path
+"""
+import json
+import random
+import threading
+import time
+from src.benchmark import percentiles
+from src.chain import stream_rag_response
+
+
+class RequestRecord:
+    """Timings of one simulated request (seconds, measured from when the user sent it)"""
+
+    def __init__(self, user: int, question: str):
+        self.user = user
+        self.question = question
+        self.queued = 0.0
+        self.first_token = None
+        self.latency = None
+        self.error = None
+        self.cache_hit = False
+        self.stages_ms = {}
+
+
+class AdmissionGate:
+    """At most ``max_concurrency`` requests inside the chain at once (0 = no limit)
+
+    With no limit every user calls the shared chain directly, as the
+    Streamlit app does; a limit mimics the HTTP server's concurrency slots
+    so the time spent waiting for one shows up as queueing delay.
+    """
+
+    def __init__(self, max_concurrency: int = 0):
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.Semaphore(max_concurrency) if max_concurrency else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def enter(self) -> float:
+        """Wait for a slot; returns the seconds spent queued"""
+        start = time.perf_counter()
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        return time.perf_counter() - start
+
+    def exit(self):
+        with self._lock:
+            self.in_flight -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+def run_request(rag_chain, question: str, gate: AdmissionGate, user: int = 0) -> RequestRecord:
+    """Stream one answer the way the UI does, timing queueing, first token and completion"""
+    record = RequestRecord(user, question)
+    start = time.perf_counter()
+    record.queued = gate.enter()
+    try:
+        for kind, payload in stream_rag_response(rag_chain, question):
+            if kind == "token" and record.first_token is None:
+                record.first_token = time.perf_counter() - start
+            elif kind == "metrics":
+                record.stages_ms = payload.get("stages_ms", {})
+                record.cache_hit = payload.get("cache_hit", False)
+    except Exception as e:
+        record.error = f"{type(e).__name__}: {e}"
+    finally:
+        gate.exit()
+    record.latency = time.perf_counter() - start
+    return record
+
+
+def run_users(rag_chain, questions: list, users: int, duration: float, think_time: float = 0.0,
+              max_concurrency: int = 0, seed: int = 0):
+    """Run ``users`` closed-loop simulated users for ``duration`` seconds
+
+    Each user asks a random question, waits for the full answer, pauses for
+    an exponentially distributed think time (mean ``think_time``) and asks
+    again. Requests still running at the deadline are allowed to finish.
+    Returns (records, elapsed seconds, gate).
+    """
+    gate = AdmissionGate(max_concurrency)
+    records = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user_loop(user: int):
+        rng = random.Random(seed * 1000 + user)
+        while time.perf_counter() < deadline:
+            record = run_request(rag_chain, rng.choice(questions), gate, user)
+            with lock:
+                records.append(record)
+            if think_time:
+                time.sleep(min(rng.expovariate(1.0 / think_time), max(0.0, deadline - time.perf_counter())))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user_loop, args=(user,), daemon=True) for user in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - start, gate
+
+
+def summarize(records: list, seconds: float, users: int, gate: AdmissionGate = None) -> dict:
+    """Throughput, latency, time-to-first-token and queueing percentiles for one load level"""
+    ok = [r for r in records if r.error is None]
+    stage_names = sorted({name for r in ok for name in r.stages_ms})
+    summary = {
+        "users": users,
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "cache_hits": sum(r.cache_hit for r in ok),
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(ok) / seconds, 3) if seconds else 0.0,
+        "latency": percentiles([r.latency for r in ok]),
+        "first_token": percentiles([r.first_token for r in ok if r.first_token is not None]),
+        "queue": percentiles([r.queued for r in ok]),
+        "service": percentiles([r.latency - r.queued for r in ok]),
+        "stages_p95_ms": {
+            name: percentiles([r.stages_ms[name] / 1000 for r in ok if name in r.stages_ms]).get("p95_ms")
+            for name in stage_names
+        },
+    }
+    if gate is not None:
+        summary["peak_in_flight"] = gate.peak
+    errors = [r.error for r in records if r.error]
+    if errors:
+        summary["first_error"] = errors[0]
+    return summary
+
+
+def find_saturation(levels: list, min_gain: float = 0.1, latency_factor: float = 2.0) -> dict:
+    """Load levels where the system stops scaling
+
+    * ``throughput_plateau_users``: the last level before adding users
+      raised throughput by less than ``min_gain`` (relative).
+    * ``latency_knee_users``: the first level whose p95 latency exceeds
+      ``latency_factor`` times the lowest level's p95.
+    * ``queueing_dominates_users``: the first level where the median
+      request spends longer queued than being served.
+    """
+    levels = sorted((level for level in levels if level["latency"].get("count")), key=lambda level: level["users"])
+    result = {
+        "max_throughput_rps": max((level["throughput_rps"] for level in levels), default=0.0),
+        "throughput_plateau_users": None,
+        "latency_knee_users": None,
+        "queueing_dominates_users": None,
+    }
+    if not levels:
+        return result
+    base_p95 = levels[0]["latency"]["p95_ms"]
+    for previous, level in zip(levels, levels[1:]):
+        if result["throughput_plateau_users"] is None and \
+                level["throughput_rps"] < previous["throughput_rps"] * (1.0 + min_gain):
+            result["throughput_plateau_users"] = previous["users"]
+    for level in levels:
+        if result["latency_knee_users"] is None and level["latency"]["p95_ms"] > base_p95 * latency_factor:
+            result["latency_knee_users"] = level["users"]
+        if result["queueing_dominates_users"] is None and level["queue"]["p50_ms"] > level["service"]["p50_ms"]:
+            result["queueing_dominates_users"] = level["users"]
+    return result
+
+
+def load_questions(path: str) -> list:
+    """Questions from a text file (one per line) or JSONL (``question`` or ``input`` field)"""
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                line = record.get("question") or record.get("input") or ""
+            if line:
+                questions.append(line)
+    return questions
+
+
+def questions_from_chunks(chunks: list, count: int = 50, words: int = 12, seed: int = 0) -> list:
+    """Pseudo-questions made from the opening words of random chunks"""
+    rng = random.Random(seed)
+    picks = rng.sample(chunks, min(count, len(chunks)))
+    return [" ".join(chunk.page_content.split()[:words]) + "?" for chunk in picks]
+
+
+def build_offline_chain(text_path: str, embed_delay: float = 0.0, search_latency: float = 0.0,
+                        first_token_delay: float = 0.2, token_delay: float = 0.02, answer_words: int = 40,
+                        answer_cache: bool = True):
+    """RAG chain over the sample text data with stub embeddings, vector store latency and LLM
+
+    Everything except the model calls and the database round trip is the
+    real serving path (embedding cache, query micro-batching, hybrid
+    retrieval, context packing, answer cache, instrumentation). Writes its
+    caches and index under the current directory. Returns (chain, chunks).
+    """
+    from src.data_loaders import load_text_files, chunk_documents
+    from src.embeddings import with_batching, with_cache
+    from src.fakes import FakeStreamingChatModel, HashingEmbeddings, SlowVectorStore
+    from src.local_store import LocalVectorStore
+    from src.vector_store import write_documents
+    from src.chain import create_rag_chain
+    from config.settings import COLLECTION_NAME
+
+    chunks = chunk_documents(load_text_files(text_path))
+    embeddings = with_cache(with_batching(HashingEmbeddings(delay=embed_delay)), "load-test/hashing")
+    store = LocalVectorStore(embeddings, "./vector_store", COLLECTION_NAME)
+    write_documents(store, chunks)
+    llm = FakeStreamingChatModel(
+        first_token_delay=first_token_delay,
+        token_delay=token_delay,
+        answer_words=answer_words
+    )
+    rag_chain = create_rag_chain(SlowVectorStore(store, search_latency), llm=llm, answer_cache=answer_cache)
+    return rag_chain, chunks
+
+
+def missing_credentials() -> list:
+    """Settings the real chain needs that are not configured"""
+    from config import settings
+    missing = []
+    if settings.LLM_PROVIDER != "fake" and not settings.GROQ_API_KEY:
+        missing.append("GROQ_API_KEY")
+    if settings.VECTOR_STORE_BACKEND == "astradb":
+        if not settings.ASTRA_DB_API_ENDPOINT:
+            missing.append("ASTRA_DB_API_ENDPOINT")
+        if not settings.ASTRA_DB_APPLICATION_TOKEN:
+            missing.append("ASTRA_DB_APPLICATION_TOKEN")
+    return missing
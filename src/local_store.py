@@ -0,0 +1,327 @@
+"""
+Local memory-mapped vector store
+"""
+import json
+import os
+import threading
+import uuid
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from src.chunk_store import ChunkStore
+
+
+VECTORS_FILE = "vectors.f32"
+# Row store of earlier versions, migrated to the chunk store on open
+LEGACY_DOCS_FILE = "docs.jsonl"
+META_FILE = "meta.json"
+IVF_FILE = "ivf.npz"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product equals cosine similarity"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(scores.shape[0])
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class LocalVectorStore(VectorStore):
+    """Vector store kept on local disk as a contiguous float32 matrix
+
+    Vectors are normalized on insert and stored row-major in a raw file that
+    is opened with ``np.memmap``, so the OS page cache holds the hot part of
+    the index. Text and metadata live next to it in a columnar
+    ``ChunkStore``; Documents are only built for the rows a search returns.
+    """
+
+    def __init__(self, embedding, persist_directory: str, collection_name: str,
+                 quantization: str = None, rescore_factor: int = 4,
+                 index_type: str = "flat", index_params: dict = None):
+        self.embedding = embedding
+        self.path = os.path.join(persist_directory, collection_name)
+        os.makedirs(self.path, exist_ok=True)
+        self.dim = None
+        self.chunks = ChunkStore(self.path)
+        self.ids = self.chunks.ids
+        self._id_to_row = {}
+        self._matrix = None
+        self._write_lock = threading.RLock()
+        self._quantized = None
+        if quantization not in (None, "", "none"):
+            from src.quantization import QuantizedIndex, get_quantizer
+            self._quantized = QuantizedIndex(get_quantizer(quantization), rescore_factor)
+        self._ann = None
+        if index_type == "ivf":
+            from src.ann import IVFIndex
+            self._ann = IVFIndex(path=self._file(IVF_FILE), **(index_params or {}))
+        elif index_type not in (None, "", "flat"):
+            raise ValueError(f"Unknown index type '{index_type}' (expected 'flat' or 'ivf')")
+        self._load()
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    # ----- persistence -----
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        """Read metadata and map the vector file"""
+        if not os.path.exists(self._file(META_FILE)):
+            return
+        with open(self._file(META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self._migrate_docs()
+        self._recover(meta.get("count", len(self.chunks)))
+        self.ids = self.chunks.ids
+        self._id_to_row = {row_id: i for i, row_id in enumerate(self.ids)}
+        self._map()
+        self._rebuild_codes()
+        if self._ann is not None:
+            self._ann.load(self._matrix)
+
+    def _migrate_docs(self):
+        """Convert a docs.jsonl row store into the columnar chunk store (one-time)"""
+        legacy = self._file(LEGACY_DOCS_FILE)
+        if not os.path.exists(legacy):
+            return
+        ids, texts, metadatas = [], [], []
+        with open(legacy, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                ids.append(row["id"])
+                texts.append(row["text"])
+                metadatas.append(row["metadata"])
+        self.chunks.rewrite(ids, texts, metadatas)
+        os.remove(legacy)
+        print(f"🗂️  Migrated {len(ids)} chunks to the columnar chunk store")
+
+    def _recover(self, count: int):
+        """Drop rows an interrupted append wrote past the last committed meta.json"""
+        if len(self.chunks) > count:
+            self.chunks.truncate(count)
+            print(f"⚠️  Dropped uncommitted rows from {self.path}")
+        path = self._file(VECTORS_FILE)
+        size = len(self.chunks) * self.dim * np.dtype(np.float32).itemsize
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+        if len(self.chunks) != count:
+            self.ids = self.chunks.ids
+            self._write_meta()
+
+    def _map(self):
+        """(Re)open the vector file as a read-only memory map"""
+        if not self.ids:
+            self._matrix = None
+            return
+        # Swapped in whole: the file only grows between rewrites, so searches holding the old map stay valid
+        self._matrix = np.memmap(
+            self._file(VECTORS_FILE),
+            dtype=np.float32,
+            mode="r",
+            shape=(len(self.ids), self.dim),
+        )
+
+    def _write_meta(self):
+        """Commit the row count (written last, so rows past it are an interrupted append)"""
+        tmp = self._file(META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": len(self.ids)}, f)
+        os.replace(tmp, self._file(META_FILE))
+
+    def _rewrite(self, vectors: np.ndarray, ids: list, texts: list, metadatas: list):
+        """Rewrite all files from the given rows (used after updates/deletes)"""
+        self._matrix = None
+        tmp = self._file(VECTORS_FILE + ".tmp")
+        np.ascontiguousarray(vectors, dtype=np.float32).tofile(tmp)
+        os.replace(tmp, self._file(VECTORS_FILE))
+        self.chunks.rewrite(ids, texts, metadatas)
+        self.ids = self.chunks.ids
+        self._id_to_row = {row_id: i for i, row_id in enumerate(self.ids)}
+        self._write_meta()
+        self._map()
+        self._rebuild_codes()
+        if self._ann is not None:
+            self._ann.rebuild(self._matrix)
+
+    def _rebuild_codes(self):
+        """Re-encode the quantized codes from the float matrix"""
+        if self._quantized is not None:
+            self._quantized.build(self._matrix)
+
+    def _vectors(self) -> np.ndarray:
+        with self._write_lock:  # Writers only clear the map while holding the lock
+            matrix = self._matrix
+        if matrix is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return matrix
+
+    # ----- writes -----
+
+    def add_vectors(self, vectors, texts, metadatas=None, ids=None):
+        """Insert or replace rows with precomputed embeddings"""
+        with self._write_lock:
+            return self._add_vectors(vectors, texts, metadatas, ids)
+
+    def _add_vectors(self, vectors, texts, metadatas, ids):
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dim}")
+
+        # Last occurrence wins when an id repeats within the batch
+        updates = {row_id: i for i, row_id in enumerate(ids)}
+        replaced = [(self._id_to_row[row_id], i) for row_id, i in updates.items() if row_id in self._id_to_row]
+        appended = [i for row_id, i in updates.items() if row_id not in self._id_to_row]
+        if replaced:
+            self._update_rows([row for row, _ in replaced], [i for _, i in replaced], vectors, texts, metadatas)
+        if appended:
+            self._append_rows(appended, vectors, ids, texts, metadatas)
+        return ids
+
+    def _update_rows(self, rows, order, vectors, texts, metadatas):
+        """Overwrite existing rows in place, re-encoding only those rows"""
+        rows = np.asarray(rows, dtype=np.int64)
+        matrix = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode="r+", shape=(len(self.ids), self.dim))
+        matrix[rows] = vectors[order]
+        matrix.flush()
+        del matrix
+        self.chunks.update(rows, [texts[i] for i in order], [metadatas[i] for i in order])
+        if self._quantized is not None:
+            self._quantized.update(rows, vectors[order])
+        if self._ann is not None:
+            self._ann.update(rows, vectors[order])
+
+    def _append_rows(self, order, vectors, ids, texts, metadatas):
+        """Extend the files without touching existing rows; meta.json is written last as the commit"""
+        with open(self._file(VECTORS_FILE), "ab") as f:
+            np.ascontiguousarray(vectors[order]).tofile(f)
+        start = len(self.ids)
+        self.chunks.append([ids[i] for i in order], [texts[i] for i in order], [metadatas[i] for i in order])
+        for row, i in enumerate(order, start):
+            self._id_to_row[ids[i]] = row
+        self._write_meta()
+        self._map()
+        if self._quantized is not None:
+            self._quantized.append(vectors[order])
+        if self._ann is not None:
+            self._ann.add(self._matrix, vectors[order])
+
+    def add_texts(self, texts, metadatas=None, *, ids=None, **kwargs):
+        """Embed and insert texts; existing ids are overwritten"""
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self.embedding.embed_documents(texts)
+        return self.add_vectors(vectors, texts, metadatas, ids)
+
+    def delete(self, ids=None, **kwargs):
+        """Delete rows by id"""
+        with self._write_lock:
+            return self._delete(ids)
+
+    def _delete(self, ids):
+        if not ids:
+            return False
+        drop = {self._id_to_row[i] for i in ids if i in self._id_to_row}
+        if not drop:
+            return False
+        keep = [row for row in range(len(self.ids)) if row not in drop]
+        matrix = np.array(self._vectors()[keep])
+        self._rewrite(
+            matrix.reshape(len(keep), self.dim),
+            [self.ids[row] for row in keep],
+            [self.chunks.text(row) for row in keep],
+            [self.chunks.metadata(row) for row in keep],
+        )
+        return True
+
+    # ----- reads -----
+
+    def get_by_ids(self, ids, /):
+        """Return documents for the given ids (missing ids are skipped)"""
+        return [self._document(self._id_to_row[i]) for i in ids if i in self._id_to_row]
+
+    def _document(self, row: int) -> Document:
+        return self.chunks.document(row)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search_vector(self, query_vector, k: int = 4):
+        """Return (row, score) pairs for the k most similar rows"""
+        matrix = self._vectors()
+        if matrix.shape[0] == 0:
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        # The IVF index narrows the rows to score; quantized codes (if any) then shortlist them
+        candidates = self._ann.candidates(query) if self._ann is not None else None
+        if self._quantized is not None:
+            rows, scores = self._quantized.search(matrix, query, k, candidates)
+        elif candidates is not None:
+            scores = np.asarray(matrix[candidates]) @ query
+            best = top_k(scores, k)
+            rows, scores = candidates[best], scores[best]
+        else:
+            return self.exact_search_vector(query, k)
+        return [(int(row), float(score)) for row, score in zip(rows, scores)]
+
+    def exact_search_vector(self, query_vector, k: int = 4):
+        """Brute-force full-precision search (the recall baseline)"""
+        matrix = self._vectors()
+        if matrix.shape[0] == 0:
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        scores = matrix @ query
+        idx = top_k(scores, k)
+        return [(int(i), float(scores[i])) for i in idx]
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4, **kwargs):
+        return [(self._document(row), score) for row, score in self.search_vector(embedding, k)]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: min(1.0, max(0.0, (score + 1.0) / 2.0))
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, *, ids=None, persist_directory=None,
+                   collection_name=None, **kwargs):
+        """Create a store and add texts to it"""
+        from config.settings import LOCAL_STORE_PATH, COLLECTION_NAME
+        store = cls(
+            embedding,
+            persist_directory or LOCAL_STORE_PATH,
+            collection_name or COLLECTION_NAME,
+        )
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
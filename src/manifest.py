@@ -0,0 +1,244 @@
+"""
+Ingestion manifest for incremental, idempotent document updates
+"""
+import glob
+import hashlib
+import json
+import os
+import uuid
+from src.utils import bump_collection_version
+from config.settings import INGESTION_MANIFEST_PATH
+
+
+SUPPORTED_PATTERNS = ("**/*.pdf", "**/*.txt")
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(file_key: str, index: int, text: str) -> str:
+    """Deterministic chunk id from the file, chunk position and chunk text"""
+    text_digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{file_key}#{index}#{text_digest}"))
+
+
+def default_chunk_key(chunk) -> str:
+    """Group chunks by source and page for deterministic ids"""
+    return f"{chunk.metadata.get('source', '')}#{chunk.metadata.get('page', '')}"
+
+
+def with_chunk_ids(chunks, key_fn=default_chunk_key):
+    """Yield (chunk, id) pairs; ids only depend on source, position and text"""
+    counters = {}
+    for chunk in chunks:
+        key = key_fn(chunk)
+        index = counters.get(key, 0)
+        counters[key] = index + 1
+        yield chunk, chunk_id(key, index, chunk.page_content)
+
+
+def file_key(file_path: str) -> str:
+    """Normalized path used as the manifest key"""
+    return os.path.normpath(file_path).replace("\\", "/")
+
+
+def scan_files(directories) -> list:
+    """Find supported files under the given directories"""
+    files = set()
+    for directory in directories:
+        for pattern in SUPPORTED_PATTERNS:
+            files.update(glob.glob(os.path.join(directory, pattern), recursive=True))
+    return sorted(file_key(f) for f in files)
+
+
+class IngestionPlan:
+    """What a sync would change, grouped by action"""
+
+    def __init__(self):
+        self.added = []
+        self.modified = []
+        self.unchanged = []
+        self.removed = []
+        self.digests = {}
+
+    @property
+    def has_changes(self):
+        return bool(self.added or self.modified or self.removed)
+
+    def report(self, manifest=None) -> str:
+        """Human readable summary of the plan"""
+        lines = [
+            f"➕ Added:     {len(self.added)}",
+            f"✏️  Modified:  {len(self.modified)}",
+            f"🗑️  Removed:   {len(self.removed)}",
+            f"⏭️  Unchanged: {len(self.unchanged)}",
+        ]
+        for label, paths in (("+", self.added), ("~", self.modified), ("-", self.removed)):
+            for path in paths:
+                stale = ""
+                if manifest is not None and path in manifest.files:
+                    stale = f" ({len(manifest.files[path]['chunk_ids'])} old chunks)"
+                lines.append(f"   {label} {path}{stale}")
+        return "\n".join(lines)
+
+
+class IngestionManifest:
+    """Local record of ingested files and the chunk ids they produced"""
+
+    def __init__(self, path: str = INGESTION_MANIFEST_PATH):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    def save(self):
+        """Atomically write the manifest to disk"""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def plan(self, files, directories) -> IngestionPlan:
+        """Compare files on disk against the manifest
+
+        Size and mtime are checked first so untouched files are never read;
+        files whose stat changed are hashed to tell real edits from touches.
+        """
+        plan = IngestionPlan()
+        for path in files:
+            stat = os.stat(path)
+            entry = self.files.get(path)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                plan.unchanged.append(path)
+                continue
+            digest = file_digest(path)
+            plan.digests[path] = digest
+            if entry is None:
+                plan.added.append(path)
+            elif entry["sha256"] == digest:
+                plan.unchanged.append(path)
+            else:
+                plan.modified.append(path)
+
+        roots = [file_key(d).rstrip("/") + "/" for d in directories]
+        on_disk = set(files)
+        for path in sorted(self.files):
+            if path not in on_disk and any(path.startswith(root) for root in roots):
+                plan.removed.append(path)
+
+        # Unchanged files whose near-duplicate chunks were dropped in favour of
+        # chunks that are about to be purged must be re-ingested, or that text
+        # would disappear from the store
+        purged = set()
+        for path in plan.modified + plan.removed:
+            purged.update(self.files[path]["chunk_ids"])
+        while True:
+            orphaned = [path for path in plan.unchanged
+                        if purged.intersection(self.files.get(path, {}).get("duplicate_of", ()))]
+            if not orphaned:
+                break
+            for path in orphaned:
+                plan.unchanged.remove(path)
+                plan.modified.append(path)
+                plan.digests[path] = self.files[path]["sha256"]
+                purged.update(self.files[path]["chunk_ids"])
+        return plan
+
+    def record(self, path: str, digest: str, chunk_ids: list, duplicate_of=()):
+        """Store the state of a freshly ingested file
+
+        ``duplicate_of`` lists the ids of chunks (usually of other files)
+        that this file's dropped near-duplicate chunks matched.
+        """
+        stat = os.stat(path)
+        self.files[path] = {
+            "sha256": digest,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunk_ids": chunk_ids,
+        }
+        if duplicate_of:
+            self.files[path]["duplicate_of"] = sorted(set(duplicate_of))
+
+    def touch(self, path: str, digest: str):
+        """Refresh stat info for a file whose content did not change"""
+        if path in self.files and digest:
+            stat = os.stat(path)
+            self.files[path].update(size=stat.st_size, mtime=stat.st_mtime)
+
+
+def _delete_from_local_indexes(ids):
+    """Keep the local BM25 and near-duplicate indexes in step with deletions from the store"""
+    from config.settings import BM25_INDEX_ENABLED, DEDUP_ENABLED
+    if BM25_INDEX_ENABLED:
+        from src.bm25 import get_bm25_index
+        index = get_bm25_index()
+        index.delete(ids)
+        index.save()
+    if DEDUP_ENABLED:
+        from src.dedup import get_dedup_index
+        dedup = get_dedup_index()
+        dedup.delete(ids)
+        dedup.save()
+
+
+def sync_files(vectorstore, directories, load_fn, chunk_fn, manifest=None, dry_run=False):
+    """Bring the vector store in line with the files under ``directories``; returns the plan"""
+    manifest = manifest or IngestionManifest()
+    plan = manifest.plan(scan_files(directories), directories)
+
+    if dry_run or not plan.has_changes:
+        return plan
+
+    stale_ids = []
+    for path in plan.modified + plan.removed:
+        stale_ids.extend(manifest.files[path]["chunk_ids"])
+    if stale_ids:
+        vectorstore.delete(ids=stale_ids)
+        _delete_from_local_indexes(stale_ids)
+        bump_collection_version()
+        print(f"🗑️  Deleted {len(stale_ids)} stale chunks")
+    for path in plan.removed:
+        del manifest.files[path]
+
+    for path in plan.added + plan.modified:
+        key = file_key(path)
+        if chunk_fn is None:
+            # Stream the file through the bounded pipeline
+            from src.ingestion import run_pipeline
+            stats = run_pipeline(
+                vectorstore,
+                load_fn(path),
+                embeddings=getattr(vectorstore, "embeddings", None),
+                collect_ids=True
+            )
+            ids, duplicate_of = stats.ids, stats.duplicate_of
+        else:
+            chunks = chunk_fn(load_fn(path))
+            for i, chunk in enumerate(chunks):
+                chunk.id = chunk.id or chunk_id(key, i, chunk.page_content)
+            ids, duplicate_of = [], []
+            if chunks:
+                from src.vector_store import write_documents
+                result, written, duplicates = write_documents(vectorstore, chunks)
+                if not result.ok:
+                    raise RuntimeError(f"{len(result.failed)} batches of {path} failed to upsert; re-run to resume")
+                ids = [chunk.id for chunk in written]
+                duplicate_of = [original_id for _, original_id, _ in duplicates]
+        manifest.record(path, plan.digests[path], ids, duplicate_of)
+        # Persist after every file so an interrupted run never re-inserts duplicates
+        manifest.save()
+
+    for path in plan.unchanged:
+        manifest.touch(path, plan.digests.get(path))
+    manifest.save()
+    return plan
@@ -0,0 +1,133 @@
+"""
+Cross-request micro-batching of query embeddings
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from langchain_core.embeddings import Embeddings
+from config.settings import QUERY_BATCH_WINDOW_MS, QUERY_BATCH_MAX_SIZE
+
+
+class BatchingStats:
+    """Batch fill rate and the wait added by batching"""
+
+    def __init__(self, max_batch: int):
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.model_seconds = 0.0
+
+    def record(self, waits: list, model_seconds: float):
+        self.batches += 1
+        self.requests += len(waits)
+        self.wait_seconds += sum(waits)
+        self.max_wait_seconds = max(self.max_wait_seconds, max(waits))
+        self.model_seconds += model_seconds
+
+    @property
+    def mean_batch_size(self):
+        return self.requests / self.batches if self.batches else 0.0
+
+    @property
+    def fill_rate(self):
+        """Average fraction of ``max_batch`` used per model call"""
+        return self.mean_batch_size / self.max_batch if self.max_batch else 0.0
+
+    def as_dict(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.mean_batch_size, 2),
+            "fill_rate": round(self.fill_rate, 4),
+            "mean_wait_ms": round(1000 * self.wait_seconds / self.requests, 3) if self.requests else 0.0,
+            "max_wait_ms": round(1000 * self.max_wait_seconds, 3),
+            "mean_model_ms": round(1000 * self.model_seconds / self.batches, 3) if self.batches else 0.0,
+        }
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """Coalesces concurrent ``embed_query`` calls into one ``embed_documents`` call
+
+    A single worker thread owns the model. The first waiting query opens a
+    batch that closes after ``window`` seconds or at ``max_batch`` queries,
+    whichever comes first; queries arriving while the model is busy simply
+    join the next batch. Each caller blocks only on its own result, and a
+    model error is raised in every caller of that batch. This assumes the
+    model embeds queries and documents the same way (true for the Ollama and
+    sentence-transformers models used here).
+    """
+
+    def __init__(self, embeddings, window_ms: float = QUERY_BATCH_WINDOW_MS,
+                 max_batch: int = QUERY_BATCH_MAX_SIZE):
+        self.embeddings = embeddings
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.batch_stats = BatchingStats(self.max_batch)
+        self._pending = []  # (text, future, enqueued_at)
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def __getattr__(self, name):
+        # Expose the wrapped model's attributes (model name, client, ...); copy/pickle
+        # look attributes up before __init__ has set self.embeddings
+        if name == "embeddings" or (name.startswith("__") and name.endswith("__")):
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def embed_documents(self, texts):
+        """Documents already arrive in batches, so they go straight to the model"""
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self._submit(text).result()
+
+    async def aembed_query(self, text):
+        return await asyncio.wrap_future(self._submit(text))
+
+    def _submit(self, text: str) -> Future:
+        future = Future()
+        with self._cond:
+            self._pending.append((text, future, time.perf_counter()))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="query-embedding-batcher", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return future
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0][2] + self.window
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            start = time.perf_counter()
+            try:
+                vectors = self.embeddings.embed_documents([text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                model_seconds = time.perf_counter() - start
+            if len(vectors) != len(batch):
+                error = ValueError(f"Model returned {len(vectors)} vectors for {len(batch)} queries")
+                for _, future, _ in batch:
+                    future.set_exception(error)
+                continue
+            self.batch_stats.record([start - enqueued for _, _, enqueued in batch], model_seconds)
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
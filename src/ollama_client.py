@@ -0,0 +1,152 @@
+"""
+Pooled, concurrent Ollama embedding client
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from langchain_core.embeddings import Embeddings
+from src.upsert import retry
+from config.settings import (
+    OLLAMA_MODEL,
+    OLLAMA_BASE_URL,
+    OLLAMA_NUM_THREADS,
+    OLLAMA_EMBED_BATCH_SIZE,
+    OLLAMA_EMBED_CONCURRENCY,
+    OLLAMA_EMBED_MAX_RETRIES,
+    OLLAMA_EMBED_TIMEOUT,
+    OLLAMA_KEEP_ALIVE
+)
+
+
+class TransientOllamaError(Exception):
+    """Server overloaded or restarting (HTTP 429/5xx) - worth retrying"""
+
+
+_TRANSIENT = (TransientOllamaError, httpx.TransportError)
+
+
+class OllamaThroughputStats:
+    """Request and text counts for throughput reporting
+
+    ``seconds`` is wall-clock time with at least one request in flight, so
+    concurrent requests are not double counted.
+    """
+
+    def __init__(self):
+        self.texts = 0
+        self.requests = 0
+        self.retries = 0
+        self.seconds = 0.0
+        self._in_flight = 0
+        self._busy_since = 0.0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            if self._in_flight == 0:
+                self._busy_since = time.perf_counter()
+            self._in_flight += 1
+
+    def end(self, texts: int, attempts: int):
+        with self._lock:
+            self.texts += texts
+            self.requests += attempts
+            self.retries += max(0, attempts - 1)
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self.seconds += time.perf_counter() - self._busy_since
+
+    @property
+    def texts_per_second(self):
+        return self.texts / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            "texts": self.texts,
+            "requests": self.requests,
+            "retries": self.retries,
+            "seconds": round(self.seconds, 3),
+            "texts_per_s": round(self.texts_per_second, 2),
+        }
+
+
+class PooledOllamaEmbeddings(Embeddings):
+    """Ollama embeddings over persistent connections with concurrent batched calls
+
+    Texts are split into batches of ``batch_size`` and sent to ``/api/embed``
+    (which accepts a list of inputs) with at most ``concurrency`` requests in
+    flight, reusing keep-alive connections from one ``httpx.Client``.
+    Connection errors, timeouts, 429 and 5xx responses are retried with
+    exponential backoff; other errors fail immediately. ``keep_alive`` keeps
+    the model loaded in the server between calls.
+    """
+
+    def __init__(self, model: str = OLLAMA_MODEL, base_url: str = OLLAMA_BASE_URL,
+                 num_thread: int = OLLAMA_NUM_THREADS, batch_size: int = OLLAMA_EMBED_BATCH_SIZE,
+                 concurrency: int = OLLAMA_EMBED_CONCURRENCY, max_retries: int = OLLAMA_EMBED_MAX_RETRIES,
+                 timeout: float = OLLAMA_EMBED_TIMEOUT, keep_alive: str = OLLAMA_KEEP_ALIVE,
+                 backoff: float = 0.5):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.num_thread = num_thread
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.keep_alive = keep_alive
+        self.backoff = backoff
+        self.throughput = OllamaThroughputStats()
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ollama-embed")
+
+    def _post(self, texts: list) -> list:
+        response = self._client.post("/api/embed", json={
+            "model": self.model,
+            "input": texts,
+            "keep_alive": self.keep_alive,
+            "options": {"num_thread": self.num_thread} if self.num_thread else {},
+        })
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientOllamaError(f"HTTP {response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+        embeddings = response.json()["embeddings"]
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs")
+        return embeddings
+
+    def _embed_batch(self, texts: list) -> list:
+        attempts = [0]
+        self.throughput.begin()
+
+        def call():
+            attempts[0] += 1
+            return self._post(texts)
+
+        try:
+            return retry(call, self.max_retries, self.backoff, retry_on=_TRANSIENT)
+        finally:
+            self.throughput.end(len(texts), attempts[0])
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            return self._embed_batch(batches[0])
+        vectors = []
+        for block in self._pool.map(self._embed_batch, batches):
+            vectors.extend(block)
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed_batch([text])[0]
+
+    def close(self):
+        """Close pooled connections and worker threads"""
+        self._pool.shutdown()
+        self._client.close()
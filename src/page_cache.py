@@ -0,0 +1,70 @@
+"""
+On-disk cache of extracted PDF page text
+"""
+import json
+import os
+import sqlite3
+from langchain_core.documents import Document
+
+
+class PdfPageCache:
+    """Extracted page Documents keyed by (PDF content hash, extraction options, page)
+
+    The key never includes the file path, so renaming or copying a PDF still
+    hits the cache; ``source`` is rewritten to the current path on read.
+    Entries are only dropped by an explicit ``invalidate``.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(cache_path):
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self._db = sqlite3.connect(cache_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "pdf_hash TEXT NOT NULL, options TEXT NOT NULL, page INTEGER NOT NULL, "
+            "text TEXT NOT NULL, metadata TEXT NOT NULL, "
+            "PRIMARY KEY (pdf_hash, options, page))"
+        )
+        self._db.commit()
+
+    def get(self, pdf_hash: str, options: str, source: str) -> dict:
+        """Return {page: Document} for every cached page of this PDF"""
+        rows = self._db.execute(
+            "SELECT page, text, metadata FROM pages WHERE pdf_hash = ? AND options = ?",
+            (pdf_hash, options),
+        ).fetchall()
+        pages = {}
+        for page, text, metadata in rows:
+            metadata = json.loads(metadata)
+            metadata["source"] = source
+            pages[page] = Document(page_content=text, metadata=metadata)
+        self.hits += len(pages)
+        return pages
+
+    def put(self, pdf_hash: str, options: str, docs: list):
+        """Store freshly extracted page Documents"""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO pages (pdf_hash, options, page, text, metadata) VALUES (?, ?, ?, ?, ?)",
+            [
+                (pdf_hash, options, doc.metadata["page"], doc.page_content, json.dumps(doc.metadata))
+                for doc in docs
+            ],
+        )
+        self._db.commit()
+        self.misses += len(docs)
+
+    def invalidate(self, pdf_hash: str = None) -> int:
+        """Drop cached pages for one PDF (or everything); returns rows removed"""
+        if pdf_hash is None:
+            cursor = self._db.execute("DELETE FROM pages")
+        else:
+            cursor = self._db.execute("DELETE FROM pages WHERE pdf_hash = ?", (pdf_hash,))
+        self._db.commit()
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Pages served from cache vs. parsed since this cache was opened"""
+        return {"cached_pages": self.hits, "parsed_pages": self.misses}
@@ -0,0 +1,127 @@
+"""
+Parallel PDF parsing across a process pool
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pypdf
+from pypdf import PdfReader, PdfWriter
+from langchain_core.documents.base import Blob
+from langchain_community.document_loaders.parsers.pdf import PyPDFParser
+from src.manifest import file_digest
+
+
+def _parse_task(task):
+    """Worker: parse pages [start, stop) of one PDF into page Documents"""
+    path, start, stop, total, extract_images = task
+    try:
+        parser = PyPDFParser(extract_images=extract_images)
+        if start == 0 and stop == total:
+            blob = Blob.from_path(path)
+            page_labels = None
+        else:
+            # Copy the page range into an in-memory PDF so the parser only
+            # extracts (and OCRs) the pages this task owns
+            reader = PdfReader(path)
+            writer = PdfWriter()
+            for i in range(start, stop):
+                writer.add_page(reader.pages[i])
+            # Keep the original document info instead of pypdf's defaults
+            writer.metadata = None
+            if reader.metadata:
+                writer.add_metadata(reader.metadata)
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            blob = Blob.from_data(buffer.getvalue(), path=path)
+            page_labels = reader.page_labels
+
+        docs = list(parser.lazy_parse(blob))
+        for offset, doc in enumerate(docs):
+            page = start + offset
+            doc.metadata["source"] = path
+            doc.metadata["page"] = page
+            doc.metadata["total_pages"] = total
+            if page_labels is not None:
+                doc.metadata["page_label"] = page_labels[page]
+        return path, docs, None
+    except Exception as e:
+        return path, [], f"{type(e).__name__}: {e}"
+
+
+def extraction_options(extract_images: bool) -> str:
+    """Identify everything that affects extracted text (part of the cache key)"""
+    return f"pypdf={pypdf.__version__};parser=PyPDFParser;extract_images={extract_images}"
+
+
+def _page_ranges(path, pages, total, pages_per_task, extract_images):
+    """Group page numbers into consecutive runs of at most pages_per_task"""
+    step = max(1, pages_per_task)
+    tasks = []
+    run = []
+    for page in pages:
+        if run and (page != run[-1] + 1 or len(run) == step):
+            tasks.append((path, run[0], run[-1] + 1, total, extract_images))
+            run = []
+        run.append(page)
+    if run:
+        tasks.append((path, run[0], run[-1] + 1, total, extract_images))
+    return tasks
+
+
+def parse_pdfs(paths, workers: int = None, pages_per_task: int = 25, extract_images: bool = True,
+               cache=None):
+    """Parse PDFs into page Documents using a pool of worker processes
+
+    Large PDFs are split into page ranges so a single big file can use every
+    worker. Results come back in (path, page) order regardless of which task
+    finishes first. A file that fails is reported in ``errors`` (path ->
+    message) and its pages are left out instead of aborting the batch.
+
+    With a ``PdfPageCache``, pages already extracted from a PDF with the same
+    content hash and options are read from disk and only the rest are parsed.
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    options = extraction_options(extract_images)
+    pages = {}
+    digests = {}
+    errors = {}
+    tasks = []
+
+    for path in paths:
+        try:
+            total = len(PdfReader(path).pages)
+            cached = {}
+            if cache is not None:
+                digests[path] = file_digest(path)
+                cached = cache.get(digests[path], options, source=path)
+        except Exception as e:
+            errors[path] = f"{type(e).__name__}: {e}"
+            continue
+        pages[path] = cached
+        missing = [page for page in range(total) if page not in cached]
+        tasks.extend(_page_ranges(path, missing, total, pages_per_task, extract_images))
+
+    if workers <= 1 or len(tasks) <= 1:
+        _collect(map(_parse_task, tasks), pages, errors, cache, digests, options)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            _collect(pool.map(_parse_task, tasks), pages, errors, cache, digests, options)
+
+    docs = []
+    for path in paths:
+        if path in pages and path not in errors:
+            docs.extend(pages[path][page] for page in sorted(pages[path]))
+    return docs, errors
+
+
+def _collect(results, pages, errors, cache, digests, options):
+    """Merge task results into ``pages`` and cache freshly parsed pages"""
+    for path, docs, error in results:
+        if error is not None:
+            errors.setdefault(path, error)
+            continue
+        for doc in docs:
+            pages[path][doc.metadata["page"]] = doc
+        if cache is not None:
+            cache.put(digests[path], options, docs)
@@ -0,0 +1,153 @@
+"""
+Quantized vector codes (int8 scalar / 1-bit binary) for the local index
+"""
+import time
+import numpy as np
+from src.local_store import top_k
+
+
+# Number of set bits for every byte value (Hamming distance lookup)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Int8Quantizer:
+    """Symmetric per-dimension scalar quantization to int8 (4x smaller than float32)"""
+
+    name = "int8"
+
+    def __init__(self):
+        self.scale = None
+
+    def fit(self, vectors: np.ndarray):
+        """Pick per-dimension scales from the largest magnitude seen"""
+        peak = np.abs(vectors).max(axis=0) if len(vectors) else np.ones(vectors.shape[1], dtype=np.float32)
+        peak[peak == 0] = 1.0
+        self.scale = (peak / 127.0).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Approximate dot products between codes and a float query"""
+        return codes.astype(np.float32) @ (query * self.scale)
+
+
+class BinaryQuantizer:
+    """Sign-bit quantization packed 8 dims per byte (32x smaller than float32)"""
+
+    name = "binary"
+
+    def fit(self, vectors: np.ndarray):
+        pass
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(vectors > 0, axis=1)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Negative Hamming distance to the query's sign bits (higher is closer)"""
+        query_bits = np.packbits(query.reshape(1, -1) > 0, axis=1)
+        distance = _POPCOUNT[np.bitwise_xor(codes, query_bits)].sum(axis=1, dtype=np.int32)
+        return -distance.astype(np.float32)
+
+
+QUANTIZERS = {"int8": Int8Quantizer, "binary": BinaryQuantizer}
+
+
+def get_quantizer(name: str):
+    """Quantizer for a LOCAL_STORE_QUANTIZATION value (None for full precision)"""
+    if name in (None, "", "none"):
+        return None
+    if name not in QUANTIZERS:
+        raise ValueError(f"Unknown quantization '{name}' (expected one of: none, {', '.join(QUANTIZERS)})")
+    return QUANTIZERS[name]()
+
+
+class QuantizedIndex:
+    """Compact codes held in RAM with exact rescoring against the float matrix
+
+    Search scores every row with the quantized codes, keeps a shortlist of
+    ``k * rescore_factor`` candidates and re-ranks only those with the
+    full-precision vectors, so the float32 matrix can stay on disk.
+    """
+
+    def __init__(self, quantizer, rescore_factor: int = 4, block_rows: int = 8192):
+        self.quantizer = quantizer
+        self.rescore_factor = rescore_factor
+        self.block_rows = block_rows
+        self.codes = None
+
+    def _encode_blocks(self, matrix: np.ndarray) -> np.ndarray:
+        blocks = [
+            self.quantizer.encode(np.asarray(matrix[i:i + self.block_rows]))
+            for i in range(0, matrix.shape[0], self.block_rows)
+        ]
+        return np.concatenate(blocks) if blocks else None
+
+    def build(self, matrix: np.ndarray):
+        """(Re)encode every row, re-fitting the quantizer"""
+        if matrix is None or matrix.shape[0] == 0:
+            self.codes = None
+            return
+        sample = np.asarray(matrix[:: max(1, matrix.shape[0] // 100000)])
+        self.quantizer.fit(sample)
+        self.codes = self._encode_blocks(matrix)
+
+    def append(self, rows: np.ndarray):
+        """Encode newly appended rows with the current quantizer"""
+        if self.codes is None:
+            self.build(rows)
+            return
+        self.codes = np.concatenate([self.codes, self.quantizer.encode(np.asarray(rows))])
+
+    def update(self, rows: np.ndarray, vectors: np.ndarray):
+        """Re-encode rows overwritten in place"""
+        if self.codes is not None:
+            self.codes[rows] = self.quantizer.encode(np.asarray(vectors))
+
+    def nbytes(self) -> int:
+        return 0 if self.codes is None else self.codes.nbytes
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, k: int, rows: np.ndarray = None):
+        """Return (rows, exact_scores) for the best k rows (optionally among ``rows`` only)"""
+        if self.codes is None or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        codes = self.codes if rows is None else self.codes[rows]
+        # Score in blocks so int8 codes are never widened to float32 all at once
+        scores = np.concatenate([
+            self.quantizer.scores(codes[i:i + self.block_rows], query)
+            for i in range(0, codes.shape[0], self.block_rows)
+        ])
+        shortlist = top_k(scores, k * self.rescore_factor)
+        if rows is not None:
+            shortlist = rows[shortlist]
+        shortlist = np.sort(shortlist)  # sequential reads from the memory map
+        exact = np.asarray(matrix[shortlist]) @ query
+        best = top_k(exact, k)
+        return shortlist[best], exact[best]
+
+
+def recall_at_k(expected, actual) -> float:
+    """Fraction of the exact top-k rows found by an approximate search"""
+    expected = set(expected)
+    if not expected:
+        return 1.0
+    return len(expected & set(actual)) / len(expected)
+
+
+def evaluate_quantization(matrix: np.ndarray, queries: np.ndarray, k: int = 10, rescore_factor: int = 4):
+    """Recall@k, code size and latency of each quantizer against exact float search"""
+    exact = [top_k(matrix @ q, k) for q in queries]
+    report = {"float32": {"recall": 1.0, "bytes": int(matrix.nbytes)}}
+    for name in QUANTIZERS:
+        index = QuantizedIndex(get_quantizer(name), rescore_factor)
+        index.build(matrix)
+        start = time.perf_counter()
+        found = [index.search(matrix, q, k)[0] for q in queries]
+        elapsed = time.perf_counter() - start
+        recalls = [recall_at_k(e, f) for e, f in zip(exact, found)]
+        report[name] = {
+            "recall": round(float(np.mean(recalls)), 4),
+            "bytes": index.nbytes(),
+            "ms_per_query": round(1000 * elapsed / max(1, len(queries)), 3),
+        }
+    return report
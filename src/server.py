@@ -0,0 +1,237 @@
+"""
+Async HTTP query server streaming RAG answers over Server-Sent Events
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from sse_starlette.sse import EventSourceResponse
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from src.chain import astream_rag_response, ainvoke_rag_chain
+from src.utils import serialize_sources
+from config.settings import (
+    SERVER_EMBEDDINGS,
+    SERVER_MAX_CONCURRENCY,
+    SERVER_MAX_QUEUE,
+    SERVER_QUEUE_TIMEOUT
+)
+
+
+class QueueFull(Exception):
+    """Raised when no slot is free and the wait queue is full"""
+
+
+class Reservation:
+    """A place in the wait queue, given back exactly once by ``acquire()`` or ``cancel()``"""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.pending = True
+
+    def cancel(self):
+        if self.pending:
+            self.pending = False
+            self.limiter.waiting -= 1
+
+
+class ConcurrencyLimiter:
+    """At most ``max_concurrency`` active requests, up to ``max_queue`` waiting
+
+    ``reserve()`` is called before the response starts so an overloaded
+    server answers 503 straight away; ``acquire(reservation)`` then waits
+    (up to ``timeout`` seconds) for one of the active slots. A reservation
+    that is never acquired (the client went away before the stream
+    started) must be given back with ``reservation.cancel()``.
+    """
+
+    def __init__(self, max_concurrency: int = SERVER_MAX_CONCURRENCY, max_queue: int = SERVER_MAX_QUEUE,
+                 timeout: float = SERVER_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def reserve(self) -> Reservation:
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise QueueFull(f"{self.active} active and {self.waiting} queued requests")
+        self.waiting += 1
+        return Reservation(self)
+
+    async def acquire(self, reservation: Reservation) -> float:
+        """Wait for a slot; returns the seconds spent queued"""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise QueueFull(f"no slot freed up within {self.timeout:.0f}s")
+        finally:
+            reservation.cancel()
+        self.active += 1
+        return time.perf_counter() - start
+
+    def release(self):
+        self.active -= 1
+        self.served += 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.waiting,
+            "served": self.served,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+
+class ReservedEventSourceResponse(EventSourceResponse):
+    """SSE response that gives its queue reservation back however the response ends
+
+    If the client disconnects (or the send fails) before the event
+    generator starts, the generator's own ``finally`` blocks never run.
+    """
+
+    def __init__(self, content, reservation: Reservation, **kwargs):
+        super().__init__(content, **kwargs)
+        self.reservation = reservation
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.reservation.cancel()
+
+
+def build_rag_chain():
+    """Shared embeddings, vector store and LLM for every request (model and store warmed up)"""
+    from src.startup import RagWarmup
+    return RagWarmup(embeddings_provider=SERVER_EMBEDDINGS).wait()
+
+
+def _unavailable(message: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=503, headers={"Retry-After": "1"})
+
+
+def create_app(rag_chain=None, chain_factory=build_rag_chain, limiter: ConcurrencyLimiter = None):
+    """Build the Starlette app
+
+    Pass ``rag_chain`` (e.g. one built from stub LLM and vector store
+    implementations) to serve it directly; otherwise ``chain_factory`` runs
+    in a worker thread at startup and ``/ready`` reports 503 until it
+    finishes. Endpoints:
+
+    - ``GET /health``: the process is up
+    - ``GET /ready``: the chain is loaded, plus queue statistics
+    - ``POST /query``: ``{"question": ...}`` → full JSON answer
+    - ``POST /stream`` or ``GET /stream?question=...``: SSE events
+      ``queued``, ``sources``, ``token`` (one per chunk), ``metrics`` and
+      ``done``, each with a JSON payload
+    """
+    state = {"chain": rag_chain, "status": "ready" if rag_chain is not None else "starting", "error": None}
+    limiter = limiter or ConcurrencyLimiter()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = None
+        if state["chain"] is None:
+            async def load():
+                try:
+                    state["chain"] = await asyncio.to_thread(chain_factory)
+                    state["status"] = "ready"
+                except Exception as e:
+                    state["status"], state["error"] = "failed", f"{type(e).__name__}: {e}"
+                    print(f"❌ Failed to load RAG chain: {state['error']}")
+            task = asyncio.create_task(load())
+        yield
+        if task is not None:
+            task.cancel()
+
+    async def question_from(request) -> str:
+        if request.method == "GET":
+            return request.query_params.get("question", "").strip()
+        try:
+            body = await request.json()
+        except ValueError:
+            return ""
+        return str(body.get("question", "")).strip() if isinstance(body, dict) else ""
+
+    async def health(request):
+        return JSONResponse({"status": "ok"})
+
+    async def ready(request):
+        body = {"status": state["status"], **limiter.stats()}
+        if state["error"]:
+            body["error"] = state["error"]
+        return JSONResponse(body, status_code=200 if state["status"] == "ready" else 503)
+
+    async def query(request):
+        question = await question_from(request)
+        if not question:
+            return JSONResponse({"error": "missing 'question'"}, status_code=400)
+        if state["chain"] is None:
+            return _unavailable(f"RAG chain is {state['status']}")
+        try:
+            queued = await limiter.acquire(limiter.reserve())
+        except QueueFull as e:
+            return _unavailable(f"server busy: {e}")
+        try:
+            response = await ainvoke_rag_chain(state["chain"], question)
+        finally:
+            limiter.release()
+        return JSONResponse({
+            "question": question,
+            "answer": response["answer"],
+            "sources": serialize_sources(response.get("context", [])),
+            "metrics": response.get("metrics"),
+            "queued_ms": round(queued * 1000, 2),
+        })
+
+    async def stream(request):
+        question = await question_from(request)
+        if not question:
+            return JSONResponse({"error": "missing 'question'"}, status_code=400)
+        if state["chain"] is None:
+            return _unavailable(f"RAG chain is {state['status']}")
+        try:
+            reservation = limiter.reserve()
+        except QueueFull as e:
+            return _unavailable(f"server busy: {e}")
+
+        async def events():
+            try:
+                queued = await limiter.acquire(reservation)
+            except QueueFull as e:
+                yield {"event": "error", "data": json.dumps({"error": f"server busy: {e}"})}
+                return
+            try:
+                yield {"event": "queued", "data": json.dumps({"queued_ms": round(queued * 1000, 2)})}
+                async for event, payload in astream_rag_response(state["chain"], question):
+                    if event == "sources":
+                        payload = serialize_sources(payload)
+                    yield {"event": event, "data": json.dumps(payload)}
+                yield {"event": "done", "data": ""}
+            except Exception as e:
+                yield {"event": "error", "data": json.dumps({"error": f"{type(e).__name__}: {e}"})}
+            finally:
+                limiter.release()
+
+        return ReservedEventSourceResponse(events(), reservation)
+
+    return Starlette(
+        routes=[
+            Route("/health", health),
+            Route("/ready", ready),
+            Route("/query", query, methods=["POST"]),
+            Route("/stream", stream, methods=["GET", "POST"]),
+        ],
+        lifespan=lifespan,
+    )
@@ -0,0 +1,193 @@
+"""
+Background warm-up, readiness state and startup profiling for the RAG chain
+"""
+import io
+import re
+import subprocess
+import sys
+import threading
+import time
+
+# Warm-up states, in order
+STARTING = "starting"
+LOADING_MODEL = "loading embedding model"
+WARMING_MODEL = "warming up embedding model"
+OPENING_STORE = "opening vector store"
+BUILDING_CHAIN = "building chain"
+READY = "ready"
+FAILED = "failed"
+
+
+def get_embeddings_factory(provider: str):
+    """Embeddings factory for "ollama" or "huggingface" (imported only when selected)"""
+    if provider == "ollama":
+        from src.embeddings import get_ollama_embeddings
+        return get_ollama_embeddings
+    if provider == "huggingface":
+        from src.embeddings import get_huggingface_embeddings
+        return get_huggingface_embeddings
+    raise ValueError(f"Unknown embeddings provider '{provider}' (expected 'ollama' or 'huggingface')")
+
+
+def _model(embeddings):
+    """The innermost embedding model, below the cache and batching wrappers"""
+    while "embeddings" in getattr(embeddings, "__dict__", {}):
+        embeddings = embeddings.__dict__["embeddings"]
+    return embeddings
+
+
+class _ThreadOutput:
+    """stdout that diverts one thread's writes into a buffer and passes the rest through"""
+
+    def __init__(self, stream, thread_id: int):
+        self.stream = stream
+        self.thread_id = thread_id
+        self.buffer = io.StringIO()
+
+    def write(self, text):
+        if threading.get_ident() == self.thread_id:
+            return self.buffer.write(text)
+        return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class RagWarmup:
+    """Builds the RAG chain in a background thread and reports its progress
+
+    Steps: load the embedding model, run one dummy encode (bypassing the
+    embedding cache, so the model's first-call cost is paid here), open the
+    vector store and run one search to establish the connection, then
+    build the chain. ``state`` names the current step; ``timings`` holds
+    seconds per finished step. ``wait()`` blocks until the chain is ready
+    and re-raises the warm-up error if it failed.
+
+    With ``quiet=True`` the warm-up's own progress prints are kept in
+    ``log`` instead of stdout, so they don't land inside an ``input()``
+    prompt that is waiting at the same time.
+    """
+
+    def __init__(self, embeddings_provider: str = "huggingface", quiet: bool = False):
+        self.embeddings_provider = embeddings_provider
+        self.quiet = quiet
+        self.log = ""
+        self.state = STARTING
+        self.timings = {}
+        self.error = None
+        self.failed_step = None
+        self.rag_chain = None
+        self.started = None
+        self.ready_seconds = None
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def start(self):
+        """Start warming up in a daemon thread (returns self)"""
+        if self._thread is None:
+            self.started = time.perf_counter()
+            self._thread = threading.Thread(target=self.run, name="rag-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _step(self, state: str, fn, *args):
+        self.state = state
+        start = time.perf_counter()
+        result = fn(*args)
+        self.timings[state] = round(time.perf_counter() - start, 3)
+        return result
+
+    def run(self):
+        """Warm up in the calling thread"""
+        self.started = self.started or time.perf_counter()
+        output = None
+        if self.quiet:
+            output = sys.stdout = _ThreadOutput(sys.stdout, threading.get_ident())
+        try:
+            factory = get_embeddings_factory(self.embeddings_provider)
+            embeddings = self._step(LOADING_MODEL, factory)
+            vector = self._step(WARMING_MODEL, _model(embeddings).embed_query, "warm-up")
+
+            from src.vector_store import load_vector_store
+            vectorstore = self._step(OPENING_STORE, self._open_store, load_vector_store, embeddings, vector)
+
+            from src.chain import create_rag_chain
+            self.rag_chain = self._step(BUILDING_CHAIN, create_rag_chain, vectorstore)
+            self.ready_seconds = round(time.perf_counter() - self.started, 3)
+            self.state = READY
+        except Exception as e:
+            self.error = e
+            self.failed_step = self.state
+            self.state = FAILED
+        finally:
+            if output is not None:
+                if sys.stdout is output:
+                    sys.stdout = output.stream
+                self.log = output.buffer.getvalue()
+            self._done.set()
+        return self.rag_chain
+
+    @staticmethod
+    def _open_store(load_vector_store, embeddings, vector):
+        vectorstore = load_vector_store(embeddings)
+        vectorstore.similarity_search_by_vector(vector, k=1)
+        return vectorstore
+
+    def wait(self, timeout: float = None):
+        """The chain once ready (starts the warm-up if needed)"""
+        self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"RAG chain not ready after {timeout}s (still {self.state})")
+        if self.error is not None:
+            raise self.error
+        return self.rag_chain
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "ready_seconds": self.ready_seconds,
+            "timings": dict(self.timings),
+            "failed_step": self.failed_step,
+            "error": f"{type(self.error).__name__}: {self.error}" if self.error else None,
+        }
+
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module: str, top: int = 15, cwd: str = None) -> dict:
+    """Import-time breakdown of ``module`` from ``python -X importtime`` in a fresh interpreter
+
+    Returns the interpreter's wall time and the ``top`` slowest top-level
+    packages by cumulative import time. Cumulative times include whatever
+    a package imports, so entries overlap (``langchain_huggingface``
+    includes ``torch``).
+    """
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=cwd
+    )
+    total = time.perf_counter() - started
+    packages = {}
+    for line in process.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, name = int(match.group(2)), match.group(4)
+        package = name.split(".")[0]
+        # The outermost import of a package has the largest cumulative time
+        packages[package] = max(packages.get(package, 0), cumulative)
+    slowest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return {
+        "module": module,
+        "ok": process.returncode == 0,
+        "seconds": round(total, 3),
+        "error": process.stderr.strip().splitlines()[-1] if process.returncode else None,
+        "packages_ms": {package: round(us / 1000, 1) for package, us in slowest},
+    }
@@ -0,0 +1,199 @@
+"""
+Batched, concurrent vector store upserts with retry and resumable checkpoints
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.utils import bump_collection_version
+from src.manifest import with_chunk_ids
+from config.settings import (
+    UPSERT_BATCH_SIZE,
+    UPSERT_CONCURRENCY,
+    UPSERT_MAX_RETRIES,
+    UPSERT_BACKOFF_SECONDS,
+    UPSERT_CHECKPOINT_PATH
+)
+
+
+def retry(fn, max_retries: int = UPSERT_MAX_RETRIES, backoff: float = UPSERT_BACKOFF_SECONDS,
+          retry_on=Exception):
+    """Call fn, retrying with exponential backoff and jitter on ``retry_on`` exceptions"""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except retry_on:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+def batch_key(ids) -> str:
+    """Stable identifier for a batch, derived from its ids"""
+    return hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+
+
+class UpsertCheckpoint:
+    """Set of completed batch keys persisted to a JSON file"""
+
+    def __init__(self, path: str = UPSERT_CHECKPOINT_PATH):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = set(json.load(f).get("done", []))
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def mark(self, key: str):
+        """Record a completed batch and flush to disk"""
+        with self._lock:
+            self.done.add(key)
+            if not self.path:
+                return
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"done": sorted(self.done)}, f)
+            os.replace(tmp, self.path)
+
+    def clear(self):
+        """Forget all progress (called after a fully successful run)"""
+        with self._lock:
+            self.done.clear()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class UpsertResult:
+    """Outcome of an upsert run"""
+
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+        self.retried = 0
+        self.failed = []
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return not self.failed
+
+    def as_dict(self):
+        return {
+            "written": self.written,
+            "skipped": self.skipped,
+            "retried": self.retried,
+            "failed_batches": len(self.failed),
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def _write(vectorstore, docs, ids, vectors=None):
+    """One store write, reusing precomputed vectors when the store accepts them"""
+    if vectors is not None:
+        vectorstore.add_vectors(vectors, [doc.page_content for doc in docs], [doc.metadata for doc in docs], ids)
+    else:
+        vectorstore.add_documents(docs, ids=ids)
+
+
+def upsert_batches(vectorstore, batches, concurrency: int = UPSERT_CONCURRENCY,
+                   max_retries: int = UPSERT_MAX_RETRIES, backoff: float = UPSERT_BACKOFF_SECONDS,
+                   checkpoint=None, on_batch=None):
+    """Write ``(docs, ids, vectors)`` batches from an iterable with at most ``concurrency`` in flight
+
+    Batches are pulled lazily, so ``batches`` may be a stream. Batches already
+    in the checkpoint are skipped; ``on_batch(docs, ids, seconds)`` is called
+    in the caller's thread for every written batch, and with ``seconds=None``
+    for skipped ones. The checkpoint is left for the caller to clear.
+    """
+    checkpoint = checkpoint if checkpoint is not None else UpsertCheckpoint()
+    result = UpsertResult()
+    start = time.perf_counter()
+    lock = threading.Lock()
+
+    def send(key, docs, batch_ids, vectors):
+        attempts = [0]
+
+        def call():
+            attempts[0] += 1
+            _write(vectorstore, docs, batch_ids, vectors)
+
+        started = time.perf_counter()
+        try:
+            retry(call, max_retries, backoff)
+        finally:
+            with lock:
+                result.retried += attempts[0] - 1
+        checkpoint.mark(key)
+        return time.perf_counter() - started
+
+    def pending_batches():
+        for docs, batch_ids, vectors in batches:
+            key = batch_key(batch_ids)
+            if key in checkpoint:
+                result.skipped += len(batch_ids)
+                if on_batch is not None:
+                    on_batch(docs, batch_ids, None)
+                continue
+            yield key, docs, batch_ids, vectors
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            pending = {}
+            queue = pending_batches()
+            for batch in queue:
+                pending[pool.submit(send, *batch)] = batch
+                if len(pending) >= concurrency:
+                    break
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    key, docs, batch_ids, _ = pending.pop(future)
+                    try:
+                        seconds = future.result()
+                    except Exception as e:
+                        result.failed.append((batch_ids, f"{type(e).__name__}: {e}"))
+                    else:
+                        result.written += len(docs)
+                        if on_batch is not None:
+                            on_batch(docs, batch_ids, seconds)
+                    next_batch = next(queue, None)
+                    if next_batch is not None:
+                        pending[pool.submit(send, *next_batch)] = next_batch
+    finally:
+        if result.written:
+            bump_collection_version()
+        result.seconds = time.perf_counter() - start
+    return result
+
+
+def upsert_documents(vectorstore, documents, ids=None, batch_size: int = UPSERT_BATCH_SIZE,
+                     concurrency: int = UPSERT_CONCURRENCY, max_retries: int = UPSERT_MAX_RETRIES,
+                     backoff: float = UPSERT_BACKOFF_SECONDS, checkpoint=None, on_batch=None):
+    """Write documents in batches with bounded concurrency
+
+    At most ``concurrency`` batches are in flight at once. A failing batch is
+    retried with exponential backoff; if it still fails it is recorded in
+    ``result.failed`` and the rest of the run continues. Completed batches
+    are recorded in the checkpoint, so running the same documents again
+    after an interruption only sends what is missing. Ids must therefore be
+    deterministic; documents without one get an id from their source, page
+    and text.
+    """
+    documents = list(documents)
+    if ids is None:
+        ids = [doc.id or generated for doc, generated in with_chunk_ids(documents)]
+    checkpoint = checkpoint if checkpoint is not None else UpsertCheckpoint()
+    batches = ((documents[i:i + batch_size], ids[i:i + batch_size], None)
+               for i in range(0, len(documents), batch_size))
+    result = upsert_batches(vectorstore, batches, concurrency, max_retries, backoff, checkpoint, on_batch)
+    if result.ok:
+        checkpoint.clear()
+    return result
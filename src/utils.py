@@ -1,7 +1,10 @@
 """
 Utility functions
 """
+import os
+import time
 import warnings
+from config.settings import COLLECTION_VERSION_PATH
 
 
 def suppress_warnings():
@@ -10,6 +13,37 @@ def suppress_warnings():
     warnings.filterwarnings("ignore")
 
 
+def read_collection_version() -> str:
+    """Current collection version marker ("" if nothing was ingested yet)"""
+    try:
+        with open(COLLECTION_VERSION_PATH, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def bump_collection_version():
+    """Mark the collection as changed so caches built on it are invalidated"""
+    if os.path.dirname(COLLECTION_VERSION_PATH):
+        os.makedirs(os.path.dirname(COLLECTION_VERSION_PATH), exist_ok=True)
+    tmp = COLLECTION_VERSION_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp, COLLECTION_VERSION_PATH)
+
+
+def serialize_sources(docs) -> list:
+    """JSON-friendly source, page and preview of each context document"""
+    return [
+        {
+            "source": doc.metadata.get("source", "Unknown"),
+            "page": doc.metadata.get("page"),
+            "preview": doc.page_content[:200],
+        }
+        for doc in docs
+    ]
+
+
 def print_response(response: dict, show_sources: bool = True):
     """Pretty print RAG response"""
     print("\n" + "="*50)
@@ -25,3 +59,50 @@ def print_response(response: dict, show_sources: bool = True):
             source = doc.metadata.get('source', 'Unknown')
             print(f"\n{i}. {source}")
             print(f"   Preview: {doc.page_content[:150]}...")
+
+    if "metrics" in response:
+        print_metrics(response["metrics"])
+
+
+def print_metrics(metrics: dict):
+    """Print per-stage timings and token counts of one answer"""
+    print("\n" + "="*50)
+    print("⏱️  TIMINGS:")
+    print("="*50)
+    for name, ms in metrics["stages_ms"].items():
+        print(f"   {name:<14} {ms:>9.1f} ms")
+    print(f"   {'total':<14} {metrics['total_ms']:>9.1f} ms")
+    if metrics.get("cache_hit"):
+        print("   (served from the answer cache)")
+    estimated = " (estimated)" if metrics.get("tokens_estimated") else ""
+    print(f"   Tokens: {metrics['prompt_tokens']} prompt + {metrics['completion_tokens']} completion{estimated}")
+    print(f"   Retrieved: {metrics['retrieved_docs']} chunks, {metrics['retrieved_chars']} chars "
+          f"({metrics['context_chars']} chars sent as context)")
+
+
+def print_streaming_response(events, show_sources: bool = True):
+    """Print sources as soon as they are retrieved, then answer tokens as they arrive"""
+    answer = []
+    context = []
+    metrics = None
+    for event, payload in events:
+        if event == "sources":
+            context = payload
+            if show_sources:
+                print("\n" + "="*50)
+                print("📚 SOURCES:")
+                print("="*50)
+                for i, doc in enumerate(context[:3], 1):
+                    print(f"{i}. {doc.metadata.get('source', 'Unknown')}")
+            print("\n" + "="*50)
+            print("🤖 ANSWER:")
+            print("="*50)
+        elif event == "token":
+            answer.append(payload)
+            print(payload, end="", flush=True)
+        elif event == "metrics":
+            metrics = payload
+    print()
+    if metrics is not None:
+        print_metrics(metrics)
+    return {"answer": "".join(answer), "context": context, "metrics": metrics}
@@ -1,14 +1,57 @@
 """
-AstraDB vector store operations
+Vector store operations (AstraDB or local memory-mapped index)
 """
-import os
-from langchain_astradb import AstraDBVectorStore
-from config.settings import ASTRA_DB_API_ENDPOINT, ASTRA_DB_APPLICATION_TOKEN, ASTRA_DB_NAMESPACE, COLLECTION_NAME
+from src.upsert import upsert_documents
+from config.settings import (
+    ASTRA_DB_API_ENDPOINT,
+    ASTRA_DB_APPLICATION_TOKEN,
+    ASTRA_DB_NAMESPACE,
+    COLLECTION_NAME,
+    VECTOR_STORE_BACKEND,
+    BM25_INDEX_ENABLED,
+    DEDUP_ENABLED,
+    LOCAL_STORE_PATH,
+    LOCAL_STORE_QUANTIZATION,
+    LOCAL_STORE_RESCORE_FACTOR,
+    LOCAL_STORE_INDEX,
+    IVF_NLIST,
+    IVF_NPROBE,
+    IVF_TRAIN_ITERATIONS,
+    IVF_MIN_TRAIN_SIZE,
+    IVF_RETRAIN_GROWTH
+)
 
 
-def load_vector_store(embeddings):
-    """Load existing vector store from AstraDB"""
-    vectorstore = AstraDBVectorStore(
+def _backend_name():
+    """Human readable name of the configured backend"""
+    return "local index" if VECTOR_STORE_BACKEND == "local" else "AstraDB"
+
+
+def _open_vector_store(embeddings):
+    """Open the configured vector store backend"""
+    if VECTOR_STORE_BACKEND == "local":
+        from src.local_store import LocalVectorStore
+        return LocalVectorStore(
+            embedding=embeddings,
+            persist_directory=LOCAL_STORE_PATH,
+            collection_name=COLLECTION_NAME,
+            quantization=LOCAL_STORE_QUANTIZATION,
+            rescore_factor=LOCAL_STORE_RESCORE_FACTOR,
+            index_type=LOCAL_STORE_INDEX,
+            index_params={
+                "nlist": IVF_NLIST,
+                "nprobe": IVF_NPROBE,
+                "train_iterations": IVF_TRAIN_ITERATIONS,
+                "min_train_size": IVF_MIN_TRAIN_SIZE,
+                "retrain_growth": IVF_RETRAIN_GROWTH,
+            },
+        )
+
+    if VECTOR_STORE_BACKEND != "astradb":
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND '{VECTOR_STORE_BACKEND}' (expected 'astradb' or 'local')")
+
+    from langchain_astradb import AstraDBVectorStore
+    return AstraDBVectorStore(
         embedding=embeddings,
         collection_name=COLLECTION_NAME,
         api_endpoint=ASTRA_DB_API_ENDPOINT,
@@ -16,9 +59,56 @@ def load_vector_store(embeddings):
         namespace=ASTRA_DB_NAMESPACE,
     )
 
+
+def _report_upsert(result):
+    """Print resume/retry/failure details of an upsert run"""
+    if result.skipped:
+        print(f"⏭️  Resumed from checkpoint: {result.skipped} documents already written")
+    if result.retried:
+        print(f"🔁 Retried {result.retried} failed batch writes")
+    for batch_ids, error in result.failed:
+        print(f"⚠️  Batch of {len(batch_ids)} documents failed: {error}")
+    if result.failed:
+        print("⚠️  Re-run to resume the remaining batches from the checkpoint")
+
+
+def write_documents(vectorstore, documents):
+    """Upsert chunks without near-duplicates; returns (upsert result, written docs, duplicates)"""
+    dedup, duplicates, claimed, stored = None, [], set(), set()
+    if DEDUP_ENABLED:
+        from src.dedup import get_dedup_index
+        dedup = get_dedup_index()
+        known = {doc.id for doc in documents if doc.id in dedup}
+        documents, duplicates = dedup.filter(documents)
+        claimed = {doc.id for doc in documents if doc.id not in known}
+        if duplicates:
+            print(f"🧬 Removed {len(duplicates)} near-duplicate chunks")
+
     try:
-        print(f"📂 Loaded AstraDB collection '{COLLECTION_NAME}'")
-    except Exception as e:
+        result = upsert_documents(vectorstore, documents, on_batch=lambda docs, ids, _: stored.update(ids))
+    finally:
+        if dedup is not None:
+            # Keep the claims of chunks that reached the store, forget the rest
+            dedup.delete(claimed - stored)
+            dedup.save()
+
+    failed_ids = {doc_id for batch_ids, _ in result.failed for doc_id in batch_ids}
+    written = [doc for doc in documents if doc.id not in failed_ids]
+    if BM25_INDEX_ENABLED:
+        from src.bm25 import get_bm25_index
+        index = get_bm25_index()
+        index.add(written)
+        index.save()
+    return result, written, duplicates
+
+
+def load_vector_store(embeddings):
+    """Load existing vector store"""
+    vectorstore = _open_vector_store(embeddings)
+
+    if VECTOR_STORE_BACKEND == "local":
+        print(f"📂 Loaded local index '{COLLECTION_NAME}' ({len(vectorstore)} vectors)")
+    else:
         print(f"📂 Connected to AstraDB vector store (collection: {COLLECTION_NAME})")
 
     return vectorstore
@@ -26,26 +116,22 @@ def load_vector_store(embeddings):
 
 def create_vector_store(documents, embeddings):
     """Create/add to vector store from documents"""
-    vectorstore = AstraDBVectorStore(
-        embedding=embeddings,
-        collection_name=COLLECTION_NAME,
-        api_endpoint=ASTRA_DB_API_ENDPOINT,
-        token=ASTRA_DB_APPLICATION_TOKEN,
-        namespace=ASTRA_DB_NAMESPACE,
-    )
-    
+    vectorstore = _open_vector_store(embeddings)
+
     # Add documents to the collection
-    vectorstore.add_documents(documents)
-    
-    print(f"💾 Created AstraDB vector store with {len(documents)} documents")
+    result, _, _ = write_documents(vectorstore, documents)
+    _report_upsert(result)
+
+    print(f"💾 Created {_backend_name()} vector store with {result.written + result.skipped} documents")
 
     return vectorstore
 
 
 def add_new_documents_to_vectorstore(vectorstore, documents):
     """Add new documents to existing vector store"""
-    vectorstore.add_documents(documents)
-    
-    print(f"➕ Added {len(documents)} documents to AstraDB")
+    result, _, _ = write_documents(vectorstore, documents)
+    _report_upsert(result)
+
+    print(f"➕ Added {result.written} documents to {_backend_name()}")
 
     return vectorstore
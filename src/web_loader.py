@@ -0,0 +1,171 @@
+"""
+Concurrent web loader with conditional GETs and an on-disk page cache
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit
+import httpx
+from langchain_core.documents import Document
+from config.settings import (
+    WEB_CACHE_PATH,
+    WEB_MAX_CONCURRENCY,
+    WEB_PER_HOST_LIMIT,
+    WEB_TIMEOUT
+)
+
+# Bump when extraction changes so cached text is re-extracted
+EXTRACTOR_VERSION = 1
+
+USER_AGENT = os.getenv("USER_AGENT", "AIML-RAG/1.0 (+https://github.com/codewithyasho/AIML-RAG)")
+
+# Containers holding the main content, most specific first
+_MAIN_SELECTORS = ["#mw-content-text", "main", "article", "[role=main]", "#content", "#main", "body"]
+# Boilerplate removed before extracting text
+_NOISE_SELECTORS = [
+    "script", "style", "noscript", "template", "svg", "form", "nav", "header", "footer", "aside",
+    "[role=navigation]", "[role=banner]", "[role=contentinfo]", "[aria-hidden=true]",
+    ".navbox", ".vertical-navbox", ".mw-editsection", ".reference", ".reflist", ".references",
+    ".mw-jump-link", ".toc", "#toc", ".catlinks", ".printfooter", ".noprint", ".hatnote", ".sidebar",
+]
+
+
+def extract_main_content(html: str) -> dict:
+    """Title, description, language and main-content text of an HTML page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    description = soup.find("meta", attrs={"name": "description"})
+    language = soup.html.get("lang", "") if soup.html else ""
+
+    root = None
+    for selector in _MAIN_SELECTORS:
+        root = soup.select_one(selector)
+        if root is not None:
+            break
+    root = root or soup
+    for selector in _NOISE_SELECTORS:
+        for element in root.select(selector):
+            element.decompose()
+
+    lines = (re.sub(r"[ \t\xa0]+", " ", line).strip() for line in root.get_text("\n").splitlines())
+    text = "\n".join(line for line in lines if line)
+    return {
+        "title": title,
+        "description": description.get("content", "") if description else "",
+        "language": language,
+        "text": text,
+    }
+
+
+class WebPageCache:
+    """Extracted page text plus HTTP validators (ETag / Last-Modified), one JSON file per URL"""
+
+    def __init__(self, path: str = WEB_CACHE_PATH):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, url: str) -> str:
+        return os.path.join(self.path, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str):
+        try:
+            with open(self._file(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return entry if entry.get("extractor") == EXTRACTOR_VERSION else None
+
+    def put(self, url: str, entry: dict):
+        entry = {**entry, "url": url, "extractor": EXTRACTOR_VERSION, "fetched_at": time.time()}
+        tmp = self._file(url) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self._file(url))
+
+
+class WebResult:
+    """Outcome of fetching one URL: status is new, modified, unchanged or failed"""
+
+    def __init__(self, url: str, status: str, document: Document = None, error: str = None):
+        self.url = url
+        self.status = status
+        self.document = document
+        self.error = error
+
+
+def _document(url: str, entry: dict) -> Document:
+    return Document(
+        page_content=entry["text"],
+        metadata={
+            "source": url,
+            "title": entry.get("title", ""),
+            "description": entry.get("description", ""),
+            "language": entry.get("language", ""),
+        },
+    )
+
+
+async def _fetch(client, url: str, cache, limits, host_limits, host_limit: int) -> WebResult:
+    host = urlsplit(url).netloc
+    host_semaphore = host_limits.setdefault(host, asyncio.Semaphore(host_limit))
+    cached = cache.get(url) if cache is not None else None
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        # Take the host slot first so requests queued on a busy host don't hold global slots
+        async with host_semaphore, limits:
+            response = await client.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            return WebResult(url, "unchanged", _document(url, cached))
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        if cached:
+            # Serve the last good copy when the site is unreachable
+            return WebResult(url, "failed", _document(url, cached), f"{type(e).__name__}: {e}")
+        return WebResult(url, "failed", error=f"{type(e).__name__}: {e}")
+
+    entry = await asyncio.to_thread(extract_main_content, response.text)
+    entry["etag"] = response.headers.get("ETag")
+    entry["last_modified"] = response.headers.get("Last-Modified")
+    status = "new" if cached is None else "modified"
+    if cached is not None and cached.get("text") == entry["text"]:
+        status = "unchanged"  # Server ignored the validators but the content is the same
+    if cache is not None:
+        cache.put(url, entry)
+    return WebResult(url, status, _document(url, entry))
+
+
+async def afetch_pages(urls: list, cache=None, max_concurrency: int = WEB_MAX_CONCURRENCY,
+                       per_host_limit: int = WEB_PER_HOST_LIMIT, timeout: float = WEB_TIMEOUT,
+                       transport=None) -> list:
+    """Fetch URLs concurrently (bounded overall and per host); results keep the input order
+
+    ``transport`` replaces the network (e.g. ``httpx.MockTransport`` in tests).
+    """
+    limits = asyncio.Semaphore(max_concurrency)
+    host_limits = {}
+    async with httpx.AsyncClient(
+        timeout=timeout,
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+        limits=httpx.Limits(max_connections=max_concurrency),
+        transport=transport,
+    ) as client:
+        return await asyncio.gather(*[
+            _fetch(client, url, cache, limits, host_limits, per_host_limit) for url in urls
+        ])
+
+
+def fetch_pages(urls: list, cache=None, **kwargs) -> list:
+    """Blocking wrapper around afetch_pages"""
+    return asyncio.run(afetch_pages(urls, cache, **kwargs))
@@ -0,0 +1,52 @@
+"""
+Startup profile: import time of the entry points and time per warm-up step
+"""
+import argparse
+import json
+import os
+from src.utils import suppress_warnings
+from src.startup import RagWarmup, import_profile
+
+suppress_warnings()
+
+
+def main():
+    """Print where startup time goes"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", nargs="+", default=["main", "app"], help="modules to import-profile")
+    parser.add_argument("--top", type=int, default=12, help="slowest packages to list per module")
+    parser.add_argument("--warmup", choices=["none", "ollama", "huggingface"], default="none",
+                        help="also run the warm-up with these embeddings (needs the model and store)")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = {"imports": [], "warmup": None}
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in args.modules:
+        profile = import_profile(module, top=args.top, cwd=here)
+        report["imports"].append(profile)
+        status = "" if profile["ok"] else f"  ❌ {profile['error']}"
+        print(f"\n📦 import {module}: {profile['seconds']:.2f}s (fresh interpreter){status}")
+        for package, ms in profile["packages_ms"].items():
+            print(f"  {package:<28} {ms:>9.1f} ms")
+
+    if args.warmup != "none":
+        print(f"\n🔥 Warm-up ({args.warmup} embeddings)...")
+        warmup = RagWarmup(embeddings_provider=args.warmup)
+        warmup.run()
+        report["warmup"] = warmup.status()
+        for step, seconds in warmup.timings.items():
+            print(f"  {step:<28} {seconds:>9.2f} s")
+        if warmup.error is not None:
+            print(f"❌ Warm-up failed while {warmup.failed_step}: {report['warmup']['error']}")
+        else:
+            print(f"⚡ Ready after {warmup.ready_seconds:.2f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Shared pytest fixtures
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def scratch_dir(tmp_path, monkeypatch):
+    """Run every test in its own directory so ./cache and other relative paths start empty"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
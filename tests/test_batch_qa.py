@@ -0,0 +1,85 @@
+"""
+Bulk question answering: limiter accounting and rows that fail to write
+"""
+import json
+import pytest
+from langchain_core.documents import Document
+from src import batch_qa
+from src.batch_qa import AdaptiveLimiter, BatchAnswerer, BatchQuestion
+from src.fakes import HashingEmbeddings
+
+
+class EchoRetrieval:
+    def invoke(self, inputs):
+        return [Document(id="doc", page_content="context", metadata={"source": "a.txt"})]
+
+
+class EchoChain:
+    """Answers with the question; fails for questions listed in ``fail``"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+
+    def invoke(self, inputs):
+        if inputs["input"] in self.fail:
+            raise ValueError("model error")
+        return f"answer to {inputs['input']}"
+
+
+def make_answerer(chain=None, max_retries: int = 0):
+    return BatchAnswerer(HashingEmbeddings(dim=16), EchoRetrieval(), chain or EchoChain(),
+                         limiter=AdaptiveLimiter(4, 0), max_retries=max_retries, backoff=0)
+
+
+def test_failed_calls_do_not_raise_the_limit():
+    limiter = AdaptiveLimiter(max_concurrency=4, requests_per_minute=0)
+    limiter.acquire()
+    limiter.release(rate_limited_for=0)
+    assert limiter.limit == 2
+
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(failed=True)
+    assert limiter.limit == 2
+    assert limiter.failures == 10
+
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 3
+
+
+def test_model_errors_are_recorded_without_counting_as_successes():
+    answerer = make_answerer(EchoChain(fail={"q2"}), max_retries=2)
+    questions = [BatchQuestion(str(i), f"q{i}", {}) for i in range(4)]
+
+    answerer.run(questions, "answers.jsonl")
+
+    with open("answers.jsonl", encoding="utf-8") as f:
+        rows = {row["id"]: row for row in map(json.loads, f)}
+    assert rows["2"]["error"] == "ValueError: model error"
+    assert rows["1"]["answer"] == "answer to q1"
+    assert answerer.limiter.failures == 3
+
+
+def test_rows_that_fail_to_write_are_reported_and_retried(monkeypatch):
+    questions = [BatchQuestion(str(i), f"q{i}", {}) for i in range(5)]
+    write = batch_qa.OutputWriter.write
+
+    def flaky_write(self, row):
+        if row["id"] == "3":
+            raise OSError("disk full")
+        write(self, row)
+
+    monkeypatch.setattr(batch_qa.OutputWriter, "write", flaky_write)
+    answerer = make_answerer()
+    with pytest.raises(RuntimeError, match="1 questions were not written"):
+        answerer.run(questions, "answers.jsonl")
+    assert answerer.stats.lost == 1
+
+    monkeypatch.setattr(batch_qa.OutputWriter, "write", write)
+    rerun = make_answerer()
+    rerun.run(questions, "answers.jsonl")
+    assert rerun.stats.skipped == 4
+    with open("answers.jsonl", encoding="utf-8") as f:
+        assert sorted(json.loads(line)["id"] for line in f) == ["0", "1", "2", "3", "4"]
@@ -0,0 +1,62 @@
+"""
+Local vector store: in-place updates and recovery from interrupted appends
+"""
+import json
+import os
+import numpy as np
+from src.ann import _assign
+from src.fakes import HashingEmbeddings
+from src.local_store import LocalVectorStore, META_FILE, VECTORS_FILE
+
+
+def make_store(**options):
+    return LocalVectorStore(HashingEmbeddings(dim=16), "index", "test", **options)
+
+
+def test_existing_ids_are_overwritten_in_place():
+    rng = np.random.default_rng(0)
+    store = make_store(quantization="int8", index_type="ivf", index_params={"min_train_size": 50})
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    store.add_vectors(vectors, [f"text {i}" for i in range(200)], [{"n": i} for i in range(200)],
+                      [f"id-{i}" for i in range(200)])
+    store.search_vector(vectors[0], k=3)  # build the IVF lists
+
+    changed = rng.standard_normal((3, 16)).astype(np.float32)
+    store.add_vectors(changed, ["text 5", "new text", "fresh"], [{"n": 5}, {"n": -1}, {}],
+                      ["id-5", "id-7", "id-new"])
+
+    assert len(store) == 201
+    assert store.search_vector(changed[1], k=1)[0][0] == 7
+    for reopened in (store, make_store(quantization="int8", index_type="ivf", index_params={"min_train_size": 50})):
+        docs = reopened.get_by_ids(["id-5", "id-7", "id-8", "id-new"])
+        assert [doc.page_content for doc in docs] == ["text 5", "new text", "text 8", "fresh"]
+        assert [doc.metadata for doc in docs] == [{"n": 5}, {"n": -1}, {"n": 8}, {}]
+    matrix = np.asarray(store._matrix)
+    assert np.array_equal(store._quantized.codes, store._quantized.quantizer.encode(matrix))
+    assert np.array_equal(store._ann.labels, _assign(matrix, store._ann.centroids))
+    for cluster, rows in enumerate(store._ann._inverted_lists()):
+        assert set(rows.tolist()) == set(np.flatnonzero(store._ann.labels == cluster).tolist())
+
+
+def test_rows_past_the_committed_meta_are_dropped_on_open():
+    rng = np.random.default_rng(1)
+    store = make_store()
+    store.add_vectors(rng.standard_normal((4, 16)), list("abcd"), None, ["a", "b", "c", "d"])
+    path = os.path.join("index", "test")
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        committed = json.load(f)
+    # An append that crashed after the vectors and chunks but before meta.json
+    store.add_vectors(rng.standard_normal((2, 16)), ["e", "f"], None, ["e", "f"])
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(committed, f)
+
+    reopened = make_store()
+    assert reopened.ids == ["a", "b", "c", "d"]
+    assert os.path.getsize(os.path.join(path, VECTORS_FILE)) == 4 * 16 * 4
+
+    vector = rng.standard_normal(16)
+    reopened.add_vectors([vector], ["g"], None, ["g"])
+    again = make_store()
+    assert again.ids == ["a", "b", "c", "d", "g"]
+    assert again.get_by_ids(["g"])[0].page_content == "g"
+    assert again.search_vector(vector, k=1)[0][0] == 4
@@ -0,0 +1,35 @@
+"""
+Query micro-batching: wrapper attribute lookups and short model results
+"""
+import copy
+import pickle
+import pytest
+from src.fakes import HashingEmbeddings
+from src.micro_batch import MicroBatchingEmbeddings
+
+
+class DroppingEmbeddings(HashingEmbeddings):
+    """Returns one vector too few for every batch"""
+
+    def embed_documents(self, texts):
+        return super().embed_documents(texts)[:-1]
+
+
+def test_copy_and_pickle_do_not_recurse():
+    wrapper = MicroBatchingEmbeddings.__new__(MicroBatchingEmbeddings)
+    with pytest.raises(AttributeError):
+        wrapper.embeddings
+    assert copy.copy(wrapper) is not wrapper
+    assert pickle.loads(pickle.dumps(wrapper)) is not None
+
+
+def test_wrapped_attributes_are_exposed():
+    wrapper = MicroBatchingEmbeddings(HashingEmbeddings(dim=8), window_ms=1)
+    assert wrapper.dim == 8
+    assert len(wrapper.embed_query("hello")) == 8
+
+
+def test_short_model_result_fails_every_caller_instead_of_hanging():
+    wrapper = MicroBatchingEmbeddings(DroppingEmbeddings(dim=8), window_ms=1)
+    with pytest.raises(ValueError, match="0 vectors for 1 queries"):
+        wrapper._submit("hello").result(timeout=5)
@@ -0,0 +1,81 @@
+"""
+Pooled Ollama client against the in-process /api/embed stub
+"""
+import httpx
+import pytest
+from src.fakes import HashingEmbeddings, OllamaStubServer
+from src.ollama_client import PooledOllamaEmbeddings, TransientOllamaError
+
+
+@pytest.fixture
+def server():
+    with OllamaStubServer(dim=16) as stub:
+        yield stub
+
+
+def make_client(server, **kwargs) -> PooledOllamaEmbeddings:
+    options = {"model": "stub", "batch_size": 4, "concurrency": 2, "backoff": 0}
+    options.update(kwargs)
+    return PooledOllamaEmbeddings(base_url=server.url, **options)
+
+
+def test_batches_keep_input_order(server):
+    client = make_client(server)
+    texts = [f"text number {i}" for i in range(10)]
+    try:
+        vectors = client.embed_documents(texts)
+    finally:
+        client.close()
+
+    assert vectors == HashingEmbeddings(16).embed_documents(texts)
+    assert server.requests == 3  # 4 + 4 + 2 inputs
+    assert server.inputs == 10
+    assert client.throughput.texts == 10
+
+
+def test_connections_are_reused(server):
+    client = make_client(server, concurrency=1)
+    try:
+        for i in range(5):
+            client.embed_query(f"question {i}")
+    finally:
+        client.close()
+
+    assert server.requests == 5
+    assert len(server.connections) == 1
+
+
+def test_server_errors_are_retried(server):
+    server.fail_every = 2
+    client = make_client(server, concurrency=1, max_retries=2)
+    try:
+        vectors = client.embed_documents([f"text {i}" for i in range(8)])
+    finally:
+        client.close()
+
+    assert len(vectors) == 8
+    assert server.failures == 1
+    assert client.throughput.retries == 1
+
+
+def test_gives_up_after_max_retries(server):
+    server.fail_every = 1
+    client = make_client(server, max_retries=1)
+    try:
+        with pytest.raises(TransientOllamaError):
+            client.embed_query("always failing")
+    finally:
+        client.close()
+
+    assert server.requests == 2
+
+
+def test_client_errors_are_not_retried(server):
+    client = PooledOllamaEmbeddings(base_url=server.url + "/missing", model="stub", max_retries=3, backoff=0)
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            client.embed_query("wrong path")
+    finally:
+        client.close()
+
+    assert server.requests == 1
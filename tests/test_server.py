@@ -0,0 +1,157 @@
+"""
+Query server: endpoints end to end over the offline chain, and admission control
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import pytest
+from starlette.testclient import TestClient
+from src.server import ConcurrencyLimiter, create_app
+
+TEXT_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "text_data")
+QUESTION = "What is machine learning?"
+
+
+@pytest.fixture(scope="module")
+def offline_chain(tmp_path_factory):
+    """Stub LLM, hashing embeddings and a local store over the sample text data"""
+    from src.load_test import build_offline_chain
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("offline"))
+    try:
+        chain, _ = build_offline_chain(TEXT_DATA, first_token_delay=0, token_delay=0, answer_words=8,
+                                       answer_cache=False)
+    finally:
+        os.chdir(cwd)
+    return chain
+
+
+def sse_events(body: str) -> list:
+    """(event, data) pairs of a Server-Sent Events body"""
+    events = []
+    for block in body.replace("\r\n", "\n").strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) if ": " in line else (line.rstrip(":"), "")
+                      for line in block.split("\n") if line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], fields.get("data", "")))
+    return events
+
+
+def test_stream_sends_queued_sources_tokens_metrics_then_done(offline_chain):
+    with TestClient(create_app(rag_chain=offline_chain)) as client:
+        response = client.post("/stream", json={"question": QUESTION})
+
+    assert response.status_code == 200
+    events = sse_events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "queued"
+    assert names[-1] == "done"
+    assert "error" not in names
+    assert names.index("sources") < names.index("token")
+    assert names.index("metrics") > max(i for i, name in enumerate(names) if name == "token")
+    sources = json.loads(dict(events)["sources"])
+    assert sources and all(source["source"].endswith(".txt") and source["preview"] for source in sources)
+    answer = "".join(json.loads(data) for name, data in events if name == "token")
+    assert len(answer.split()) == 8
+
+
+def test_query_returns_answer_sources_and_metrics(offline_chain):
+    with TestClient(create_app(rag_chain=offline_chain)) as client:
+        response = client.post("/query", json={"question": QUESTION})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["question"] == QUESTION
+    assert len(body["answer"].split()) == 8
+    assert body["sources"]
+    assert body["metrics"] is not None
+    assert body["queued_ms"] >= 0
+
+
+def test_missing_question_is_a_400(offline_chain):
+    with TestClient(create_app(rag_chain=offline_chain)) as client:
+        assert client.post("/query", json={}).status_code == 400
+        assert client.post("/query", content=b"not json").status_code == 400
+        assert client.get("/stream").status_code == 400
+
+
+def test_full_admission_queue_is_a_503(offline_chain):
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0, timeout=1)
+    held = limiter.reserve()  # Another request holds the only place
+    with TestClient(create_app(rag_chain=offline_chain, limiter=limiter)) as client:
+        for response in (client.post("/query", json={"question": QUESTION}),
+                         client.post("/stream", json={"question": QUESTION})):
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "1"
+            assert "server busy" in response.json()["error"]
+    held.cancel()
+    assert limiter.rejected == 2
+    assert limiter.waiting == 0
+
+
+def test_ready_reports_503_until_the_chain_has_loaded(offline_chain):
+    loaded = threading.Event()
+
+    def slow_factory():
+        loaded.wait(5)
+        return offline_chain
+
+    with TestClient(create_app(chain_factory=slow_factory)) as client:
+        assert client.get("/health").status_code == 200
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "starting"
+        assert client.post("/query", json={"question": QUESTION}).status_code == 503
+
+        loaded.set()
+        deadline = time.monotonic() + 5
+        while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert client.post("/query", json={"question": QUESTION}).status_code == 200
+
+
+class NoChain:
+    """Placeholder chain; the requests below never reach it"""
+
+
+def post_stream(app, fail_send: bool):
+    body = json.dumps({"question": "What is machine learning?"}).encode("utf-8")
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http", "path": "/stream",
+        "root_path": "", "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "server": ("testserver", 80), "client": ("testclient", 50000),
+    }
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if fail_send and message["type"] == "http.response.start":
+            raise OSError("client went away")
+
+    async def run():
+        try:
+            await app(scope, receive, send)
+        except OSError:
+            pass
+
+    asyncio.run(run())
+
+
+def test_reservation_released_when_client_leaves_before_streaming():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, timeout=1)
+    app = create_app(rag_chain=NoChain(), limiter=limiter)
+
+    for _ in range(5):
+        post_stream(app, fail_send=True)
+
+    assert limiter.waiting == 0
+    assert limiter.rejected == 0
@@ -0,0 +1,147 @@
+"""
+Batched upserts: retries and resuming from the checkpoint
+"""
+import threading
+import pytest
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+from src.fakes import HashingEmbeddings
+from src import ingestion
+from src.manifest import chunk_id
+from src.upsert import UpsertCheckpoint, batch_key, upsert_documents
+
+
+class FlakyVectorStore(InMemoryVectorStore):
+    """In-memory store whose writes fail on demand
+
+    ``fail_first`` makes the first N writes raise; ``fail_ids`` makes every
+    write of a batch containing one of those ids raise.
+    """
+
+    def __init__(self, fail_first: int = 0, fail_ids=()):
+        super().__init__(HashingEmbeddings(dim=32))
+        self.fail_first = fail_first
+        self.fail_ids = set(fail_ids)
+        self.calls = 0
+        self.written_batches = []
+        self._calls_lock = threading.Lock()
+
+    def add_documents(self, documents, ids=None, **kwargs):
+        with self._calls_lock:
+            self.calls += 1
+            fail = self.calls <= self.fail_first or self.fail_ids.intersection(ids or ())
+        if fail:
+            raise ConnectionError("store unavailable")
+        self.written_batches.append(list(ids))
+        return super().add_documents(documents, ids=ids, **kwargs)
+
+
+def make_documents(n: int) -> list:
+    return [Document(id=f"doc-{i}", page_content=f"chunk number {i}", metadata={"source": "test"})
+            for i in range(n)]
+
+
+def test_transient_failures_are_retried():
+    store = FlakyVectorStore(fail_first=2)
+    documents = make_documents(10)
+
+    result = upsert_documents(store, documents, batch_size=5, concurrency=1, max_retries=3, backoff=0,
+                              checkpoint=UpsertCheckpoint("checkpoint.json"))
+
+    assert result.ok
+    assert result.written == 10
+    assert result.retried == 2
+    assert len(store.get_by_ids([doc.id for doc in documents])) == 10
+
+
+def test_batch_failing_after_retries_is_reported_and_others_continue():
+    store = FlakyVectorStore(fail_ids={"doc-7"})
+    documents = make_documents(15)
+
+    result = upsert_documents(store, documents, batch_size=5, concurrency=2, max_retries=1, backoff=0,
+                              checkpoint=UpsertCheckpoint("checkpoint.json"))
+
+    assert not result.ok
+    assert result.written == 10
+    assert [batch_ids for batch_ids, _ in result.failed] == [[f"doc-{i}" for i in range(5, 10)]]
+    assert "ConnectionError" in result.failed[0][1]
+
+
+def test_rerun_resumes_from_checkpoint():
+    documents = make_documents(15)
+    failing = FlakyVectorStore(fail_ids={"doc-7"})
+    first = upsert_documents(failing, documents, batch_size=5, concurrency=1, max_retries=0, backoff=0,
+                             checkpoint=UpsertCheckpoint("checkpoint.json"))
+    assert not first.ok
+
+    # The checkpoint survives on disk and lists only the completed batches
+    checkpoint = UpsertCheckpoint("checkpoint.json")
+    assert batch_key([f"doc-{i}" for i in range(5)]) in checkpoint
+    assert batch_key([f"doc-{i}" for i in range(5, 10)]) not in checkpoint
+
+    healthy = FlakyVectorStore()
+    second = upsert_documents(healthy, documents, batch_size=5, concurrency=1, backoff=0, checkpoint=checkpoint)
+
+    assert second.ok
+    assert second.skipped == 10
+    assert healthy.written_batches == [[f"doc-{i}" for i in range(5, 10)]]
+    # A fully successful run clears the checkpoint
+    assert not UpsertCheckpoint("checkpoint.json").done
+
+
+def test_documents_without_ids_get_deterministic_ids():
+    documents = [Document(page_content=f"text {i}", metadata={"source": "a.txt"}) for i in range(3)]
+    first, second = FlakyVectorStore(), FlakyVectorStore()
+
+    upsert_documents(first, documents, checkpoint=UpsertCheckpoint(None))
+    upsert_documents(second, documents, checkpoint=UpsertCheckpoint(None))
+
+    assert first.written_batches == second.written_batches
+    assert len(first.written_batches[0]) == 3
+
+
+def test_pipeline_upserts_resume_from_checkpoint(monkeypatch):
+    monkeypatch.setattr(ingestion, "DEDUP_ENABLED", False)
+    monkeypatch.setattr(ingestion, "BM25_INDEX_ENABLED", False)
+    pages = [Document(page_content=f"page {i} text", metadata={"source": "a.txt", "page": i}) for i in range(6)]
+
+    failing = FlakyVectorStore(fail_ids={chunk_id("a.txt#3", 0, "page 3 text")})
+    with pytest.raises(RuntimeError, match="re-run to resume"):
+        ingestion.run_pipeline(failing, pages, batch_size=2, concurrency=2,
+                               checkpoint=UpsertCheckpoint("checkpoint.json"))
+    assert len(failing.written_batches) == 2
+
+    healthy = FlakyVectorStore()
+    stats = ingestion.run_pipeline(healthy, pages, batch_size=2, concurrency=2, collect_ids=True,
+                                   checkpoint=UpsertCheckpoint("checkpoint.json"))
+
+    assert stats.skipped == 4
+    assert len(healthy.written_batches) == 1
+    assert len(stats.ids) == 6
+    assert not UpsertCheckpoint("checkpoint.json").done
+
+
+def test_failed_pipeline_keeps_dedup_claims_of_written_batches(monkeypatch, capsys):
+    from src import dedup
+    monkeypatch.setattr(ingestion, "BM25_INDEX_ENABLED", False)
+    monkeypatch.setattr(dedup, "_shared_index", dedup.NearDuplicateIndex("dedup.npz"))
+    words = [f"word{i} alpha{i} beta{i} gamma{i} delta{i} epsilon{i}" for i in range(4)]
+    pages = [Document(page_content=text, metadata={"source": "a.txt", "page": i}) for i, text in enumerate(words)]
+    failing_id = chunk_id("a.txt#3", 0, words[3])
+
+    with pytest.raises(RuntimeError):
+        ingestion.run_pipeline(FlakyVectorStore(fail_ids={failing_id}), pages, batch_size=2, concurrency=1,
+                               checkpoint=UpsertCheckpoint(None))
+
+    index = dedup.NearDuplicateIndex("dedup.npz")
+    assert chunk_id("a.txt#0", 0, words[0]) in index
+    assert failing_id not in index
+
+    # A copy of the corpus under another name is all duplicates: nothing is embedded to time
+    copies = [Document(page_content=text, metadata={"source": "b.txt", "page": i}) for i, text in enumerate(words[:2])]
+    stats = ingestion.run_pipeline(FlakyVectorStore(), copies, checkpoint=UpsertCheckpoint(None))
+    assert stats.duplicates == 2
+    assert stats.embed_seconds_saved is None
+    assert stats.as_dict()["embed_seconds_saved"] is None
+    output = capsys.readouterr().out
+    assert "Nothing new to upsert" in output and "None" not in output
@@ -0,0 +1,91 @@
+"""
+Web loader: conditional GETs against the page cache, via httpx.MockTransport
+"""
+import httpx
+from src.web_loader import WebPageCache, fetch_pages
+
+URL = "https://example.test/wiki/Page"
+
+
+def page(body: str) -> str:
+    return (f"<html lang='en'><head><title>Page</title></head>"
+            f"<body><nav>menu</nav><main><p>{body}</p></main></body></html>")
+
+
+class FakeSite:
+    """Serves one page, honouring If-None-Match; counts requests and records their headers"""
+
+    def __init__(self, body: str = "first version", etag: str = '"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+        self.fail = False
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.fail:
+            return httpx.Response(503)
+        if self.etag and request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        headers = {"ETag": self.etag} if self.etag else {}
+        return httpx.Response(200, text=page(self.body), headers=headers)
+
+    def fetch(self, cache):
+        [result] = fetch_pages([URL], cache, transport=httpx.MockTransport(self.handler))
+        return result
+
+
+def test_first_fetch_extracts_main_content_and_caches_validators():
+    site, cache = FakeSite(), WebPageCache("web")
+
+    result = site.fetch(cache)
+
+    assert result.status == "new"
+    assert result.document.page_content == "first version"
+    assert result.document.metadata["title"] == "Page"
+    assert cache.get(URL)["etag"] == '"v1"'
+    assert "If-None-Match" not in site.requests[0].headers
+
+
+def test_304_serves_the_cached_copy():
+    site, cache = FakeSite(), WebPageCache("web")
+    site.fetch(cache)
+
+    result = site.fetch(cache)
+
+    assert site.requests[1].headers["If-None-Match"] == '"v1"'
+    assert result.status == "unchanged"
+    assert result.document.page_content == "first version"
+
+
+def test_changed_etag_refetches_and_updates_the_cache():
+    site, cache = FakeSite(), WebPageCache("web")
+    site.fetch(cache)
+    site.body, site.etag = "second version", '"v2"'
+
+    result = site.fetch(cache)
+
+    assert result.status == "modified"
+    assert result.document.page_content == "second version"
+    assert cache.get(URL)["etag"] == '"v2"'
+
+
+def test_same_content_without_validators_counts_as_unchanged():
+    site, cache = FakeSite(etag=None), WebPageCache("web")
+    site.fetch(cache)
+
+    result = site.fetch(cache)
+
+    assert result.status == "unchanged"
+
+
+def test_server_error_falls_back_to_the_cached_copy():
+    site, cache = FakeSite(), WebPageCache("web")
+    site.fetch(cache)
+    site.fail = True
+
+    result = site.fetch(cache)
+
+    assert result.status == "failed"
+    assert "503" in result.error
+    assert result.document.page_content == "first version"